@@ -1,132 +1,191 @@
-from lexer import lexical_analysis
-from parser import parse
-
-label_counter = 1
-temp_counter = 1
-
-# --- TAC helpers ---
-def new_label():
-    global label_counter
-    lbl = f"L{label_counter}"
-    label_counter += 1
-    return lbl
-
-def new_temp():
-    global temp_counter
-    tmp = f"t{temp_counter}"
-    temp_counter += 1
-    return tmp
-
-# --- TAC generation functions ---
-from tac_generator import generate_tac_from_node  # reuse your existing TAC generator
-# generate_expression_tac and display_tac already in tac_generator
-
-# --- Assembly generation ---
-def generate_assembly(tac_lines):
-    assembly = []
-    reg_map = {}
-    reg_count = 1
-
-    def get_reg(v):
-        nonlocal reg_count
-        # Numeric constants
-        if v.replace('.', '', 1).isdigit():
-            return v
-        # String literals
-        if v.startswith('"') and v.endswith('"'):
-            return v
-        # Map variables to registers
-        if v not in reg_map:
-            reg_map[v] = f"R{reg_count}"
-            reg_count += 1
-        return reg_map[v]
-
-    for line in tac_lines:
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
-
-        # IF_FALSE ... GOTO
-        if line.startswith("IF_FALSE"):
-            parts = line.split()
-            _, cond_var, _, label = parts
-            r = get_reg(cond_var)
-            assembly.append(f"CMP {r}, 0")
-            assembly.append(f"JE {label}")
-
-        # GOTO label
-        elif line.startswith("GOTO"):
-            _, label = line.split()
-            assembly.append(f"JMP {label}")
-
-        # LABEL label
-        elif line.startswith("LABEL"):
-            _, label = line.split()
-            assembly.append(f"{label}:")
-
-        # Assignment / arithmetic
-        elif "=" in line:
-            lhs, rhs = [x.strip() for x in line.split("=", 1)]
-            dest = get_reg(lhs)
-            parts = rhs.split()
-
-            if len(parts) == 3 and parts[1] in {"+", "-", "*", "/"}:
-                r1, op, r2 = get_reg(parts[0]), parts[1], get_reg(parts[2])
-                if op == "+": assembly.append(f"ADD {dest}, {r1}, {r2}")
-                elif op == "-": assembly.append(f"SUB {dest}, {r1}, {r2}")
-                elif op == "*": assembly.append(f"MUL {dest}, {r1}, {r2}")
-                elif op == "/": assembly.append(f"DIV {dest}, {r1}, {r2}")
-            else:
-                src = get_reg(rhs)
-                assembly.append(f"MOV {dest}, {src}")
-
-        # PRINT statement
-        elif line.startswith("PRINT"):
-            parts = line[len("PRINT"):].strip()
-            items = [p.strip() for p in parts.split(",")]
-            asm_line = "PRINT " + " ".join(get_reg(it) for it in items)
-            assembly.append(asm_line)
-
-        # RETURN statement
-        elif line.startswith("RETURN"):
-            parts = line[len("RETURN"):].strip()
-            if parts:
-                r = get_reg(parts)
-                assembly.append(f"MOV R0, {r}")
-            assembly.append("RET")
-
-        # Fallback
-        else:
-            r = get_reg(line)
-            assembly.append(f"; standalone {r}")
-
-    return assembly
-
-def display_assembly(assembly):
-    print("\n--- Assembly Code ---")
-    for line in assembly:
-        print(line)
-
-# --- Run independently ---
-if __name__ == "__main__":
-    file_path = input("Enter the path of the C source file: ").strip()
-    try:
-        with open(file_path, "r") as f:
-            code = f.read()
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        exit(1)
-
-    # Lexical analysis
-    _, _, ordered_tokens = lexical_analysis(code)
-
-    # Parsing
-    parse_tree, _ = parse(ordered_tokens)
-
-    # Generate TAC
-    from tac_generator import generate_tac_from_node
-    tac = generate_tac_from_node(parse_tree)
-
-    # Generate assembly
-    assembly = generate_assembly(tac)
-    display_assembly(assembly)
+from lexer import lexical_analysis
+from parser import parse
+from tac_generator import generate_tac_from_node
+from context import CompilationContext
+from ir import Op, Const, Str, Temp, COMPARISONS, CONVERSIONS, evaluate
+from regalloc import allocate_registers
+
+# Pseudo-instruction for each binary TAC opcode; comparisons set dest to 0 or 1.
+ASM_OPS = {
+    Op.ADD: "ADD", Op.SUB: "SUB", Op.MUL: "MUL", Op.DIV: "DIV",
+    Op.LT: "SLT", Op.GT: "SGT", Op.LE: "SLE", Op.GE: "SGE", Op.EQ: "SEQ", Op.NE: "SNE",
+    Op.SHL: "SHL", Op.SHR: "SAR",
+}
+
+# Conditional jump taken when the comparison is false, i.e. IF_FALSE's jump.
+JUMP_IF_NOT = {
+    Op.LT: "JGE", Op.GT: "JLE", Op.LE: "JG", Op.GE: "JL", Op.EQ: "JNE", Op.NE: "JE",
+}
+# a op b is b SWAPPED[op] a; used to keep an immediate on the right of CMP.
+SWAPPED = {Op.LT: Op.GT, Op.GT: Op.LT, Op.LE: Op.GE, Op.GE: Op.LE, Op.EQ: Op.EQ, Op.NE: Op.NE}
+
+# --- Instruction selection ---
+def fused_branches(tac):
+    """
+    Positions i where tac[i] is t = a <cmp> b and tac[i + 1] is
+    IF_FALSE t GOTO L, with t a temp read nowhere else. Each such pair is
+    selected as one CMP a, b plus a conditional jump, so t is never
+    materialized and needs no register.
+    """
+    reads, writes = {}, {}
+    for instr in tac:
+        for name in instr.uses():
+            reads[name] = reads.get(name, 0) + 1
+        if instr.dest is not None:
+            writes[instr.dest] = writes.get(instr.dest, 0) + 1
+    fused = set()
+    for i in range(len(tac) - 1):
+        compare, branch = tac[i], tac[i + 1]
+        t = compare.dest
+        if (compare.op in COMPARISONS and type(t) is Temp and branch.op == Op.IF_FALSE
+                and branch.args[0] == t and reads[t] == 1 and writes[t] == 1):
+            fused.add(i)
+    return fused
+
+def allocate(tac, ctx=None):
+    """Register allocation for tac, leaving out the temps of fused compare-and-branch pairs."""
+    registers = ctx.option("registers", 8) if ctx is not None else 8
+    return allocate_registers(tac, registers, {tac[i].dest for i in fused_branches(tac)})
+
+# --- Assembly generation ---
+def stack_slot(n):
+    return f"[FP-{8 * (n + 1)}]"
+
+def generate_assembly(tac, ctx=None, allocation=None):
+    """
+    Translate a list of ir.Instr into pseudo-assembly lines. Names get the
+    registers chosen by regalloc (ctx option "registers", default 8); a
+    spilled name is loaded into a scratch register where it is read and
+    stored back where it is written. R0 holds the return value.
+    """
+    assembly = []
+    if allocation is None:
+        allocation = allocate(tac, ctx)
+    fused = fused_branches(tac)
+    scratch = [f"R{allocation.registers - n}" for n in range(allocation.scratch)][::-1]
+
+    def read(v, spare=0):
+        # Constants and string literals are used as immediates
+        if type(v) is Const or type(v) is Str:
+            return str(v)
+        reg = allocation.register(v)
+        if reg is not None:
+            return reg
+        assembly.append(f"LOAD {scratch[spare]}, {stack_slot(allocation.slot(v))}")
+        return scratch[spare]
+
+    def operand(v):
+        # Like read(), but a spilled name is used straight from its stack slot
+        reg = allocation.register(v)
+        if reg is not None or type(v) is Const or type(v) is Str:
+            return reg or str(v)
+        return stack_slot(allocation.slot(v))
+
+    def write(dest, line):
+        # line(reg) is the instruction computing dest into reg
+        reg = allocation.register(dest)
+        if reg is not None:
+            assembly.append(line(reg))
+        else:
+            assembly.append(line(scratch[0]))
+            assembly.append(f"STORE {stack_slot(allocation.slot(dest))}, {scratch[0]}")
+
+    def branch_unless(op, left, right, label):
+        # Jump to label unless left op right; an immediate goes on the right
+        if type(left) is Const and type(right) is Const:
+            if not evaluate(op, left.value, right.value):
+                assembly.append(f"JMP {label}")
+            return
+        if type(left) is Const:
+            op, left, right = SWAPPED[op], right, left
+        assembly.append(f"CMP {read(left)}, {read(right, 1)}")
+        assembly.append(f"{JUMP_IF_NOT[op]} {label}")
+
+    for position, instr in enumerate(tac):
+        op, args = instr.op, instr.args
+
+        # t = a <cmp> b; IF_FALSE t GOTO L  ->  CMP a, b; J<not cmp> L
+        if position in fused:
+            branch = tac[position + 1]
+            branch_unless(op, args[0], args[1], branch.args[1])
+
+        elif position - 1 in fused:
+            continue
+
+        # IF_FALSE ... GOTO
+        elif op == Op.IF_FALSE:
+            branch_unless(Op.NE, args[0], Const(0), args[1])
+
+        # GOTO label
+        elif op == Op.GOTO:
+            assembly.append(f"JMP {args[0]}")
+
+        # LABEL label
+        elif op == Op.LABEL:
+            assembly.append(f"{args[0]}:")
+
+        # Copy: register moves, or a load / store when one side is spilled
+        elif op == Op.COPY:
+            dest, src = allocation.register(instr.dest), args[0]
+            if dest is None:
+                assembly.append(f"STORE {stack_slot(allocation.slot(instr.dest))}, {read(src)}")
+            elif allocation.slot(src) is not None:
+                assembly.append(f"LOAD {dest}, {operand(src)}")
+            elif operand(src) != dest:
+                assembly.append(f"MOV {dest}, {operand(src)}")
+
+        # Arithmetic / comparison
+        elif op in ASM_OPS:
+            left, right = read(args[0]), read(args[1], 1)
+            write(instr.dest, lambda reg: f"{ASM_OPS[op]} {reg}, {left}, {right}")
+
+        elif op == Op.NEG:
+            src = read(args[0])
+            write(instr.dest, lambda reg: f"NEG {reg}, {src}")
+
+        # Conversions: CVTI truncates to int, CVTF rounds to single precision
+        elif op in CONVERSIONS:
+            src, mnemonic = read(args[0]), "CVTI" if op == Op.TO_INT else "CVTF"
+            write(instr.dest, lambda reg: f"{mnemonic} {reg}, {src}")
+
+        # PRINT statement
+        elif op == Op.PRINT:
+            assembly.append("PRINT " + " ".join(operand(a) for a in args))
+
+        # RETURN statement
+        elif op == Op.RETURN:
+            load = "LOAD" if allocation.slot(args[0]) is not None else "MOV"
+            assembly.append(f"{load} R0, {operand(args[0])}")
+            assembly.append("RET")
+
+    return assembly
+
+def display_assembly(assembly):
+    print("\n--- Assembly Code ---")
+    for line in assembly:
+        print(line)
+
+# --- Run independently ---
+if __name__ == "__main__":
+    file_path = input("Enter the path of the C source file: ").strip()
+    try:
+        with open(file_path, "r") as f:
+            code = f.read()
+    except FileNotFoundError:
+        print(f"Error: File '{file_path}' not found.")
+        exit(1)
+
+    ctx = CompilationContext()
+
+    # Lexical analysis
+    _, _, ordered_tokens = lexical_analysis(code)
+
+    # Parsing
+    parse_tree, _ = parse(ordered_tokens, ctx=ctx)
+
+    # Generate TAC
+    tac = generate_tac_from_node(parse_tree, ctx=ctx)
+
+    # Generate assembly
+    assembly = generate_assembly(tac, ctx)
+    display_assembly(assembly)
@@ -0,0 +1,303 @@
+# algebra.py
+"""
+Table-driven algebraic simplification of TAC.
+
+Every arithmetic or comparison instruction goes through four steps, in
+order:
+
+    canonicalize   constants go to the right of + and *: 3 + x -> x + 3
+    reassociate    (x + c1) + c2 -> x + (c1 + c2), likewise for - and *
+    IDENTITIES     x + 0 -> x, x * 0 -> 0, x - x -> 0, x * -1 -> -x, ...
+    REDUCTIONS     multiplies and divides by powers of two become shifts
+                   (int) or a multiply by the exact reciprocal (float)
+
+A rule only fires when the operand types are known and allow it. Floats
+are not reassociated (that changes rounding), and identities that are
+wrong for -0.0, infinities or NaN are int-only. Integer division
+truncates toward zero while >> rounds down, so x / 2**k adds 2**k - 1 to
+a negative x before shifting.
+
+Types come from ctx.symbols for variables and from the defining
+instruction for temps; see infer_types().
+"""
+import math
+
+from ir import Instr, Op, ARITHMETIC, COMPARISONS, SHIFTS, Temp, Var, Const, wrap_int
+
+INT, FLOAT = "int", "float"
+ANY = "any"  # the rule holds for int and float alike
+
+# (op, left, right, operand types, result). In patterns, "x" matches any
+# operand (both sides must then be the same one) and a number matches an
+# equal Const. A result is "x", a number, or (Op.NEG, "x").
+IDENTITIES = (
+    (Op.ADD, "x", 0, INT, "x"),                  # float: -0.0 + 0 is 0.0
+    (Op.SUB, "x", 0, ANY, "x"),
+    (Op.SUB, 0, "x", INT, (Op.NEG, "x")),        # float: 0 - 0.0 is 0.0, not -0.0
+    (Op.SUB, "x", "x", INT, 0),                  # float: inf - inf is NaN
+    (Op.MUL, "x", 1, ANY, "x"),
+    (Op.MUL, "x", 0, INT, 0),                    # float: -1.0 * 0 is -0.0
+    (Op.MUL, "x", -1, ANY, (Op.NEG, "x")),
+    (Op.DIV, "x", 1, ANY, "x"),
+    (Op.DIV, "x", -1, ANY, (Op.NEG, "x")),
+    (Op.SHL, "x", 0, INT, "x"),
+    (Op.SHR, "x", 0, INT, "x"),
+    (Op.EQ, "x", "x", INT, 1),                   # float: NaN != NaN
+    (Op.NE, "x", "x", INT, 0),
+    (Op.LE, "x", "x", INT, 1),
+    (Op.GE, "x", "x", INT, 1),
+    (Op.LT, "x", "x", INT, 0),
+    (Op.GT, "x", "x", INT, 0),
+)
+
+_IDENTITIES_BY_OP = {}
+for _rule in IDENTITIES:
+    _IDENTITIES_BY_OP.setdefault(_rule[0], []).append(_rule[1:])
+
+_COMMUTATIVE = frozenset((Op.ADD, Op.MUL))
+_TYPE_NAMES = {"int": INT, "float": FLOAT}
+
+
+# --- Types ---
+def infer_types(cfg, symbols):
+    """
+    {Temp or Var: INT or FLOAT} for the names whose type is certain.
+    The generator converts every assignment to the declared type with
+    TO_INT / TO_FLOAT, but hand-written TAC need not, so a variable still
+    keeps its declared type only if every assignment to it produces that
+    type. A temp gets the type its definitions agree on.
+    """
+    declared = {Var(name): _TYPE_NAMES[t] for name, t in symbols.items() if t in _TYPE_NAMES}
+    defs = [instr for block in cfg.blocks for instr in block.instrs if instr.dest is not None]
+    while True:
+        types = dict(declared)
+        for _ in range(8):  # more sweeps only for temps used above their definition
+            found = {}
+            for instr in defs:
+                if type(instr.dest) is Temp:
+                    found.setdefault(instr.dest, set()).add(_result_type(instr, types))
+            new = dict(declared)
+            for temp, results in found.items():
+                if len(results) == 1 and None not in results:
+                    new[temp] = results.pop()
+            if new == types:
+                break
+            types = new
+        wrong = {instr.dest for instr in defs if instr.dest in declared
+                 and _result_type(instr, types) != declared[instr.dest]}
+        if not wrong:
+            return types
+        for var in wrong:
+            del declared[var]
+
+
+def converting_copies(cfg, symbols):
+    """
+    Predicate converts(dest, source) for COPY dest = source: True when dest
+    has a known type (declared for a variable, inferred for a temp) and
+    source is not known to have the same one. Such a copy is an implicit conversion (hand-written
+    TAC; the generator emits TO_INT / TO_FLOAT instead), so it must not be
+    propagated through or folded away.
+    """
+    types = infer_types(cfg, symbols)
+    types.update((Var(name), _TYPE_NAMES[t]) for name, t in symbols.items() if t in _TYPE_NAMES)
+
+    def converts(dest, source):
+        want = types.get(dest)
+        return want is not None and _type_of(source, types) != want
+    return converts
+
+
+def _type_of(operand, types):
+    if type(operand) is Const:
+        return FLOAT if type(operand.value) is float else INT
+    return types.get(operand)
+
+
+def _result_type(instr, types):
+    op = instr.op
+    if op in COMPARISONS or op in SHIFTS:
+        return INT
+    if op == Op.COPY or op == Op.NEG:
+        return _type_of(instr.args[0], types)
+    if op == Op.TO_INT:
+        return INT
+    if op == Op.TO_FLOAT:
+        return FLOAT
+    if op in ARITHMETIC:
+        left, right = (_type_of(a, types) for a in instr.args)
+        if left is None or right is None:
+            return None
+        return FLOAT if FLOAT in (left, right) else INT
+    return None
+
+
+# --- Rewriting ---
+def _matches(pattern, operand, bound):
+    if isinstance(pattern, str):
+        if pattern in bound:
+            return bound[pattern] == operand
+        bound[pattern] = operand
+        return True
+    return type(operand) is Const and operand.value == pattern
+
+
+def _apply_identity(instr, types):
+    dest, (left, right) = instr.dest, instr.args
+    left_type, right_type = _type_of(left, types), _type_of(right, types)
+    if left_type is None or right_type is None:
+        return None
+    result_type = FLOAT if FLOAT in (left_type, right_type) else INT
+    for left_pattern, right_pattern, when, result in _IDENTITIES_BY_OP.get(instr.op, ()):
+        if when == INT and result_type != INT:
+            continue
+        bound = {}
+        if not (_matches(left_pattern, left, bound) and _matches(right_pattern, right, bound)):
+            continue
+        if type(result) is int:
+            return Instr(Op.COPY, dest, (Const(result),))  # int-only rules and comparisons
+        x = bound["x"]
+        if _type_of(x, types) != result_type:
+            continue  # x + 0.0 with an int x is a float, not x
+        if result == "x":
+            return Instr(Op.COPY, dest, (x,))
+        return Instr(result[0], dest, (x,))
+    return None
+
+
+def _power_of_two(operand):
+    """k if operand is the int constant 2**k (k >= 1), else None."""
+    if type(operand) is not Const or type(operand.value) is not int:
+        return None
+    value = operand.value
+    if value > 1 and value & (value - 1) == 0:
+        return value.bit_length() - 1
+    return None
+
+
+def _shift_left(instr, types, ctx):
+    k = _power_of_two(instr.args[1])
+    if k is None:
+        return None
+    return [Instr(Op.SHL, instr.dest, (instr.args[0], Const(k)))]
+
+
+def _signed_shift_right(instr, types, ctx):
+    """x / 2**k rounding toward zero: (x + (x < 0) * (2**k - 1)) >> k."""
+    x, divisor = instr.args
+    k = _power_of_two(divisor)
+    if k is None:
+        return None
+    negative = Temp(ctx.new_temp())
+    biased = Temp(ctx.new_temp())
+    code = [Instr(Op.LT, negative, (x, Const(0)))]
+    if k == 1:
+        bias = negative
+    else:
+        scaled = Temp(ctx.new_temp())
+        bias = Temp(ctx.new_temp())
+        code += [Instr(Op.SHL, scaled, (negative, Const(k))),
+                 Instr(Op.SUB, bias, (scaled, negative))]
+    code += [Instr(Op.ADD, biased, (x, bias)),
+             Instr(Op.SHR, instr.dest, (biased, Const(k)))]
+    return code
+
+
+def _reciprocal(instr, types, ctx):
+    divisor = instr.args[1]
+    if type(divisor) is not Const:
+        return None
+    mantissa, _ = math.frexp(abs(divisor.value))
+    if divisor.value == 0 or mantissa != 0.5 or abs(divisor.value) < 2.0 ** -1022:
+        return None  # only powers of two have an exact reciprocal
+    return [Instr(Op.MUL, instr.dest, (instr.args[0], Const(1.0 / divisor.value)))]
+
+
+# (op, result type) -> rewrite returning replacement instructions, or None.
+REDUCTIONS = {
+    (Op.MUL, INT): _shift_left,
+    (Op.DIV, INT): _signed_shift_right,
+    (Op.DIV, FLOAT): _reciprocal,
+}
+
+
+def simplify_algebra(cfg, ctx):
+    """Apply the rewrite tables to every block; returns the number of rewrites."""
+    types = infer_types(cfg, ctx.symbols)
+    rewrites = 0
+    for block in cfg.blocks:
+        chains = {}  # name -> (op, x, c) for name = x op c with int x and c
+        readers = {}  # x -> names in chains computed from it
+        out = []
+        for instr in block.instrs:
+            if instr.op in ARITHMETIC or instr.op in COMPARISONS:
+                new = _simplify(instr, types, chains, ctx)
+                if new is not None:
+                    rewrites += 1
+                    out += new
+                    instr = new[-1]
+                else:
+                    out.append(instr)
+            else:
+                out.append(instr)
+            dest = instr.dest
+            if dest is None:
+                continue
+            chains.pop(dest, None)
+            for name in readers.pop(dest, ()):
+                chains.pop(name, None)
+            link = _chain_link(instr, types)
+            if link is not None and link[1] != dest:
+                chains[dest] = link
+                readers.setdefault(link[1], []).append(dest)
+        block.instrs = out
+    return rewrites
+
+
+def _chain_link(instr, types):
+    """(op, x, c) if instr is dest = x + c, x - c or x * c on ints, else None."""
+    if instr.op not in (Op.ADD, Op.SUB, Op.MUL):
+        return None
+    x, c = instr.args
+    if (type(c) is not Const or type(c.value) is not int or type(x) is Const
+            or _type_of(x, types) != INT):
+        return None
+    return instr.op, x, c.value
+
+
+def _simplify(instr, types, chains, ctx):
+    """Replacement instructions for instr (the last one defines its dest), or None."""
+    op, dest, (left, right) = instr.op, instr.dest, instr.args
+    changed = False
+
+    # 1. Canonicalize: constant operand on the right of + and *.
+    if op in _COMMUTATIVE and type(left) is Const and type(right) is not Const:
+        left, right = right, left
+        changed = True
+    instr = Instr(op, dest, (left, right))
+
+    # 2. Reassociate int chains: t = x + c1; d = t + c2  ->  d = x + (c1 + c2).
+    link = _chain_link(instr, types)
+    inner = chains.get(left) if link is not None else None
+    if inner is not None:
+        inner_op, x, c1 = inner
+        c2 = link[2]
+        if op == Op.MUL and inner_op == Op.MUL:
+            instr = Instr(Op.MUL, dest, (x, Const(wrap_int(c1 * c2))))
+            changed = True
+        elif op != Op.MUL and inner_op != Op.MUL:
+            offset = (c1 if inner_op == Op.ADD else -c1) + (c2 if op == Op.ADD else -c2)
+            instr = Instr(Op.ADD, dest, (x, Const(wrap_int(offset))))
+            changed = True
+
+    # 3. Identities, then 4. strength reduction.
+    simpler = _apply_identity(instr, types) if instr.op in _IDENTITIES_BY_OP else None
+    if simpler is not None:
+        return [simpler]
+    result_type = _result_type(instr, types)
+    reduce = REDUCTIONS.get((instr.op, result_type))
+    if reduce is not None and _type_of(instr.args[0], types) == result_type:
+        code = reduce(instr, types, ctx)
+        if code is not None:
+            return code
+    return [instr] if changed else None
@@ -0,0 +1,182 @@
+# arena.py
+"""
+Flat, columnar parse-tree representation.
+
+Instead of one Python object per node, an Arena keeps every node as a row
+across parallel arrays: kind code, first child, next sibling, token index
+and an interned text id (identifier, operator, literal or type name).
+Child order matches the `fields` order of the equivalent ast_nodes class,
+except that a For keeps its children in execution order: init, cond, body,
+step. Optional children that are absent (an If without else, an empty For
+clause) are stored as "Empty" nodes so positions stay meaningful.
+"""
+from array import array
+
+NIL = -1
+
+NODE_KINDS = ("Empty", "Program", "Function", "Block", "Declaration", "Assign", "If",
+              "While", "For", "Call", "Return", "BinOp", "UnaryOp", "Name", "Const", "Str")
+KIND_CODES = {name: code for code, name in enumerate(NODE_KINDS)}
+
+
+class Arena:
+    __slots__ = ("kinds", "first_child", "next_sibling", "tokens", "text_ids",
+                 "texts", "_interned", "root")
+
+    def __init__(self):
+        self.kinds = array("B")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+        self.tokens = array("i")
+        self.text_ids = array("i")
+        self.texts = []
+        self._interned = {}
+        self.root = NIL
+
+    def __len__(self):
+        return len(self.kinds)
+
+    # --- Node creation ---
+    def add(self, kind, pos=NIL, text=None, children=()):
+        """Append a node and link the given child ids under it; returns its id."""
+        children = [self.add("Empty") if child is None else child for child in children]
+        node = len(self.kinds)
+        self.kinds.append(KIND_CODES[kind])
+        self.tokens.append(pos)
+        if text is None:
+            self.text_ids.append(NIL)
+        else:
+            idx = self._interned.get(text)
+            if idx is None:
+                idx = self._interned[text] = len(self.texts)
+                self.texts.append(text)
+            self.text_ids.append(idx)
+        self.first_child.append(children[0] if children else NIL)
+        self.next_sibling.append(NIL)
+        for prev, child in zip(children, children[1:]):
+            self.next_sibling[prev] = child
+        self.root = node
+        return node
+
+    def compact(self):
+        """
+        Trim the columns to their length and drop the text index used while
+        adding nodes. Call once the tree is complete; add() no longer works.
+        """
+        for column in ("kinds", "first_child", "next_sibling", "tokens", "text_ids"):
+            setattr(self, column, getattr(self, column)[:])
+        self._interned = None
+
+    # --- Accessors ---
+    def kind(self, node):
+        return NODE_KINDS[self.kinds[node]]
+
+    def text(self, node):
+        idx = self.text_ids[node]
+        return self.texts[idx] if idx != NIL else None
+
+    def children(self, node):
+        child = self.first_child[node]
+        while child != NIL:
+            yield child
+            child = self.next_sibling[child]
+
+    def walk(self, root=None):
+        """
+        Non-recursive depth-first traversal.
+        Yields (node, parent, index, entering) twice per node: once on the way
+        down (entering=True) and once after all its children (entering=False).
+        index is the node's position among its parent's children.
+        """
+        first, nxt = self.first_child, self.next_sibling
+        root = self.root if root is None else root
+        stack = [(root, NIL, 0, True)]
+        pop, push = stack.pop, stack.append
+        while stack:
+            node, parent, index, entering = pop()
+            yield node, parent, index, entering
+            if entering:
+                push((node, parent, index, False))
+                child = first[node]
+                if child != NIL:
+                    push((child, node, 0, True))
+            else:
+                sibling = nxt[node]
+                if sibling != NIL:
+                    push((sibling, parent, index + 1, True))
+
+    def label(self, node):
+        text = self.text(node)
+        kind = self.kind(node)
+        return f"{kind} ({text})" if text is not None else kind
+
+    def display(self):
+        depth = 0
+        for node, _, _, entering in self.walk():
+            if not entering:
+                depth -= 1
+                continue
+            if self.kinds[node] != 0:
+                print(" " * (depth * 4) + ("├── " if depth > 0 else "") + self.label(node))
+            depth += 1
+
+
+class ArenaBuilder:
+    """
+    Node factory with the same call signatures as the ast_nodes classes, so
+    parser.parse can build an Arena directly instead of a tree of objects.
+    Every method returns the new node's id.
+    """
+
+    def __init__(self):
+        self.arena = Arena()
+
+    def finish(self):
+        """The completed Arena, compacted."""
+        self.arena.compact()
+        return self.arena
+
+    def Program(self, function, pos=0):
+        return self.arena.add("Program", pos, None, (function,))
+
+    def Function(self, ret_type, ident, body, pos=0):
+        return self.arena.add("Function", pos, ident, (body,))
+
+    def Block(self, statements, pos=0):
+        return self.arena.add("Block", pos, None, statements)
+
+    def Declaration(self, var_type, items, pos=0):
+        return self.arena.add("Declaration", pos, var_type, items)
+
+    def Assign(self, target, value, pos=0):
+        return self.arena.add("Assign", pos, None, (target, value))
+
+    def If(self, cond, then, orelse=None, pos=0):
+        return self.arena.add("If", pos, None, (cond, then, orelse))
+
+    def While(self, cond, body, pos=0):
+        return self.arena.add("While", pos, None, (cond, body))
+
+    def For(self, init, cond, step, body, pos=0):
+        return self.arena.add("For", pos, None, (init, cond, body, step))
+
+    def Call(self, func, args, pos=0):
+        return self.arena.add("Call", pos, func, args)
+
+    def Return(self, value=None, pos=0):
+        return self.arena.add("Return", pos, None, () if value is None else (value,))
+
+    def BinOp(self, op, left, right, pos=0):
+        return self.arena.add("BinOp", pos, op, (left, right))
+
+    def UnaryOp(self, op, operand, pos=0):
+        return self.arena.add("UnaryOp", pos, op, (operand,))
+
+    def Name(self, ident, pos=0):
+        return self.arena.add("Name", pos, ident)
+
+    def Const(self, value, pos=0):
+        return self.arena.add("Const", pos, value)
+
+    def Str(self, value, pos=0):
+        return self.arena.add("Str", pos, value)
@@ -0,0 +1,222 @@
+# ast_nodes.py
+"""
+Typed syntax-tree nodes produced by parser.parse.
+
+Every node uses __slots__ and records `pos`, the index of its first token
+in the TokenTable it was parsed from. `fields` lists the attributes that
+hold child nodes (a node, a list or other sequence of nodes, or None) in
+source order.
+"""
+from functools import partial
+from operator import is_not
+
+from visitor import TreePrinter
+
+
+class Node:
+    __slots__ = ("pos",)
+    fields = ()
+
+    @property
+    def name(self):
+        return type(self).__name__
+
+    def label(self):
+        """One-line description used by display()."""
+        return self.name
+
+    def iter_children(self):
+        for field in self.fields:
+            child = getattr(self, field)
+            if child is None:
+                continue
+            if isinstance(child, list):
+                yield from child
+            elif isinstance(child, Node):
+                yield child
+            else:
+                # A shared statement column (incremental.reparse): None marks a
+                # statement that failed to parse.
+                yield from filter(partial(is_not, None), child)
+
+    def display(self, level=0):
+        TreePrinter(level).walk(self)
+
+    def __repr__(self):
+        return f"<{self.label()}>"
+
+
+# --- Structure ---
+class Program(Node):
+    __slots__ = ("function",)
+    fields = ("function",)
+
+    def __init__(self, function, pos=0):
+        self.function = function
+        self.pos = pos
+
+
+class Function(Node):
+    __slots__ = ("ret_type", "ident", "body")
+    fields = ("body",)
+
+    def __init__(self, ret_type, ident, body, pos=0):
+        self.ret_type = ret_type
+        self.ident = ident
+        self.body = body
+        self.pos = pos
+
+    def label(self):
+        return f"Function ({self.ret_type} {self.ident})"
+
+
+class Block(Node):
+    __slots__ = ("statements",)
+    fields = ("statements",)
+
+    def __init__(self, statements, pos=0):
+        self.statements = statements
+        self.pos = pos
+
+
+# --- Statements ---
+class Declaration(Node):
+    """`int a, b = 1;` -- items are Name (no initializer) or Assign nodes."""
+    __slots__ = ("var_type", "items")
+    fields = ("items",)
+
+    def __init__(self, var_type, items, pos=0):
+        self.var_type = var_type
+        self.items = items
+        self.pos = pos
+
+    def label(self):
+        return f"Declaration ({self.var_type})"
+
+
+class Assign(Node):
+    __slots__ = ("target", "value")
+    fields = ("target", "value")
+
+    def __init__(self, target, value, pos=0):
+        self.target = target
+        self.value = value
+        self.pos = pos
+
+
+class If(Node):
+    __slots__ = ("cond", "then", "orelse")
+    fields = ("cond", "then", "orelse")
+
+    def __init__(self, cond, then, orelse=None, pos=0):
+        self.cond = cond
+        self.then = then
+        self.orelse = orelse
+        self.pos = pos
+
+
+class While(Node):
+    __slots__ = ("cond", "body")
+    fields = ("cond", "body")
+
+    def __init__(self, cond, body, pos=0):
+        self.cond = cond
+        self.body = body
+        self.pos = pos
+
+
+class For(Node):
+    __slots__ = ("init", "cond", "step", "body")
+    fields = ("init", "cond", "step", "body")
+
+    def __init__(self, init, cond, step, body, pos=0):
+        self.init = init
+        self.cond = cond
+        self.step = step
+        self.body = body
+        self.pos = pos
+
+
+class Call(Node):
+    __slots__ = ("func", "args")
+    fields = ("args",)
+
+    def __init__(self, func, args, pos=0):
+        self.func = func
+        self.args = args
+        self.pos = pos
+
+    def label(self):
+        return f"Call ({self.func})"
+
+
+class Return(Node):
+    __slots__ = ("value",)
+    fields = ("value",)
+
+    def __init__(self, value=None, pos=0):
+        self.value = value
+        self.pos = pos
+
+
+# --- Expressions ---
+class BinOp(Node):
+    __slots__ = ("op", "left", "right")
+    fields = ("left", "right")
+
+    def __init__(self, op, left, right, pos=0):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.pos = pos
+
+    def label(self):
+        return f"BinOp ({self.op})"
+
+
+class UnaryOp(Node):
+    __slots__ = ("op", "operand")
+    fields = ("operand",)
+
+    def __init__(self, op, operand, pos=0):
+        self.op = op
+        self.operand = operand
+        self.pos = pos
+
+    def label(self):
+        return f"UnaryOp ({self.op})"
+
+
+class Name(Node):
+    __slots__ = ("ident",)
+
+    def __init__(self, ident, pos=0):
+        self.ident = ident
+        self.pos = pos
+
+    def label(self):
+        return f"Name ({self.ident})"
+
+
+class Const(Node):
+    """Numeric literal; value keeps the source text, e.g. "2.5"."""
+    __slots__ = ("value",)
+
+    def __init__(self, value, pos=0):
+        self.value = value
+        self.pos = pos
+
+    def label(self):
+        return f"Const ({self.value})"
+
+
+class Str(Node):
+    """String literal; value keeps the surrounding quotes."""
+    __slots__ = ("value",)
+
+    def __init__(self, value, pos=0):
+        self.value = value
+        self.pos = pos
+
+    def label(self):
+        return f"Str ({self.value})"
@@ -0,0 +1,751 @@
+# benchmark.py
+"""
+Performance benchmarks for the compiler phases.
+
+Usage: python benchmark.py [name ...]
+Runs every benchmark when no names are given.
+"""
+import contextlib
+import gc
+import io
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from lexer import lexical_analysis, tokenize_file, KEYWORDS, OPERATORS, PUNCTUATIONS
+from parser import parse
+from optimizer import optimize_tac
+from cfg import CFG
+from liveness import Liveness
+import optimizer
+from ac_generator import generate_assembly
+from x86_backend import generate_x86_assembly, build_executable
+import vm
+from ir import format_tac
+import ir
+import tac_generator
+import incremental
+from context import CompilationContext
+
+
+def generate_source(target_bytes):
+    """Build a synthetic but valid program of roughly target_bytes characters."""
+    chunk = (
+        "    int a{n} = {n}, b{n} = a{n} * 2 + 7;\n"
+        "    float f{n} = 2.5;\n"
+        "    if (a{n} < b{n}) {{\n"
+        "        printf(\"a is smaller %d\\n\", a{n});\n"
+        "    }} else {{\n"
+        "        b{n} = b{n} - 1;\n"
+        "    }}\n"
+        "    while (a{n} < 10) {{\n"
+        "        a{n} = a{n} + 1;\n"
+        "    }}\n"
+    )
+    parts = ["void main() {\n"]
+    size = len(parts[0])
+    n = 0
+    while size < target_bytes:
+        piece = chunk.format(n=n)
+        parts.append(piece)
+        size += len(piece)
+        n += 1
+    parts.append("    return 0;\n}\n")
+    return "".join(parts)
+
+
+def _timed(fn, *args, repeat=3):
+    """Return (best wall time, last result) over repeat runs."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - t0
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+# --- Baseline lexer (findall + per-token re.match chain) ---
+def legacy_lexical_analysis(code):
+    token_pattern = (
+        r'\".*?\"'
+        r'|[A-Za-z_][A-Za-z0-9_]*'
+        r'|\d+\.\d+'
+        r'|\d+'
+        r'|==|!=|<=|>=|[+\-*/=<>;,(){}]'
+    )
+    ordered_tokens = []
+    for token in re.findall(token_pattern, code):
+        if token in KEYWORDS:
+            ordered_tokens.append(("Keyword", token))
+        elif re.match(r'^".*"$', token):
+            ordered_tokens.append(("String", token))
+        elif re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', token):
+            ordered_tokens.append(("Identifier", token))
+        elif re.match(r'^\d+\.\d+$', token):
+            ordered_tokens.append(("Constant", token))
+        elif re.match(r'^\d+$', token):
+            ordered_tokens.append(("Constant", token))
+        elif token in OPERATORS:
+            ordered_tokens.append(("Operator", token))
+        elif token in PUNCTUATIONS:
+            ordered_tokens.append(("Punctuation", token))
+    return ordered_tokens
+
+
+def bench_lexer(megabytes=(1, 4)):
+    """Tokens/sec of the legacy findall lexer against the master-regex scanner."""
+    print("\n--- Lexer: tokens/sec ---")
+    print(f"{'size':>8} {'tokens':>10} {'legacy':>14} {'scanner':>14} {'speed-up':>9}")
+    for mb in megabytes:
+        code = generate_source(mb * 1024 * 1024)
+        t_old, old_tokens = _timed(legacy_lexical_analysis, code)
+        t_new, (_, _, new_tokens) = _timed(lexical_analysis, code)
+        count = len(new_tokens)
+        print(f"{mb:>6}MB {count:>10} {len(old_tokens) / t_old:>14,.0f} "
+              f"{count / t_new:>14,.0f} {t_old / t_new:>8.2f}x")
+
+
+def _peak_memory(fn, *args):
+    """Return the peak traced Python allocation (bytes) while running fn."""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _read_and_lex(path):
+    with open(path, "r") as f:
+        code = f.read()
+    for _ in lexical_analysis(code)[2]:
+        pass
+
+
+def _stream_lex(path):
+    for _ in tokenize_file(path):
+        pass
+
+
+def bench_stream(megabytes=(1, 4, 16)):
+    """
+    Peak memory of read()+lexical_analysis against the mmap token stream,
+    for ordinary source and for the same source on one line (as machine
+    generators often write it).
+    """
+    print("\n--- Lexer: peak memory ---")
+    print(f"{'size':>8} {'layout':>9} {'read+lex':>14} {'mmap stream':>14} {'stream time':>12}")
+    for mb in megabytes:
+        source = generate_source(mb * 1024 * 1024)
+        for layout, text in (("lines", source), ("one line", source.replace("\n", " "))):
+            fd, path = tempfile.mkstemp(suffix=".c")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(text)
+                whole = _peak_memory(_read_and_lex, path)
+                streamed = _peak_memory(_stream_lex, path)
+                elapsed, _ = _timed(_stream_lex, path, repeat=1)
+                print(f"{mb:>6}MB {layout:>9} {whole / 2**20:>12.1f}MB {streamed / 2**20:>12.2f}MB "
+                      f"{elapsed:>11.2f}s")
+            finally:
+                os.remove(path)
+
+
+def _traced_size(fn, *args):
+    """Return (result, bytes still allocated by fn's result) using tracemalloc."""
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_arena(megabytes=(1, 4)):
+    """
+    Tree memory and TAC lowering time: typed node objects against the arena.
+    The arena takes about 18 bytes per node (five array columns plus the
+    interned texts), roughly 5.5x less than typed nodes rather than an
+    order of magnitude. Lowering it is no faster, about 10% slower: in
+    CPython the per-node dispatch costs more than the pointer chasing the
+    columns save. Its gains are memory and no recursion limit.
+    """
+    print("\n--- Parse tree: typed nodes vs arena ---")
+    print(f"{'size':>8} {'nodes':>9} {'typed mem':>11} {'arena mem':>11} {'ratio':>6} "
+          f"{'typed TAC':>10} {'arena TAC':>10}")
+    for mb in megabytes:
+        _, _, tokens = lexical_analysis(generate_source(mb * 1024 * 1024))
+        (tree, _), typed_mem = _traced_size(parse, tokens)
+        (arena, _), arena_mem = _traced_size(parse, tokens, True)
+        t_typed, _ = _timed(tac_generator.generate_tac_from_node, tree, repeat=1)
+        t_arena, _ = _timed(tac_generator.generate_tac_from_node, arena, repeat=1)
+        print(f"{mb:>6}MB {len(arena):>9} {typed_mem / 2**20:>9.1f}MB {arena_mem / 2**20:>9.1f}MB "
+              f"{typed_mem / arena_mem:>5.1f}x {t_typed:>9.2f}s {t_arena:>9.2f}s")
+
+
+_DEEP_HEADER = "void main() {\n    int c = 1, x;\n"
+
+
+def _nested_ifs(depth):
+    """if (c) { if (c) { ... x = 1; } } nested depth levels deep."""
+    return _DEEP_HEADER + "if (c) {\n" * depth + "x = 1;\n" + "}\n" * depth + "}\n"
+
+
+def _flat_ifs(count):
+    """The same number of if statements side by side in main."""
+    return _DEEP_HEADER + "if (c) {\n    x = 1;\n}\n" * count + "}\n"
+
+
+def _deep_expression(depth):
+    """x = 1 + (1 + (1 + ...)), a right-leaning chain depth operators deep."""
+    return _DEEP_HEADER + "    x = " + "1 + (" * depth + "1" + ")" * depth + ";\n}\n"
+
+
+def _parse_source(code, ctx):
+    _, _, tokens = lexical_analysis(code)
+    tree, errors = parse(tokens, ctx=ctx)
+    if errors:
+        raise ValueError(f"benchmark source does not parse: {errors[0]}")
+    return tree
+
+
+class _CountingSink:
+    """A stdout stand-in that only counts the characters written to it."""
+
+    def __init__(self):
+        self.chars = 0
+
+    def write(self, text):
+        self.chars += len(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _count_nodes(tree):
+    count, stack = 0, [tree]
+    while stack:
+        count += 1
+        stack.extend(stack.pop().iter_children())
+    return count
+
+
+def _recursive_display(node, level=0):
+    """The old Node.display recursion, kept as a reference point."""
+    print(" " * (level * 4) + ("├── " if level > 0 else "") + node.label())
+    for child in node.iter_children():
+        _recursive_display(child, level + 1)
+
+
+def bench_deep(depths=(1000, 10000, 100000), display_limit=10000):
+    """
+    Parsing, display and TAC generation on deep trees against flat trees of
+    equal size, all built from source. Every display line is indented by
+    its depth, so display output (and time) per node grows linearly with
+    depth; the "chars/n" column shows that output size. Display writes to
+    a sink that only counts characters, and is only timed up to
+    display_limit.
+    """
+    print("\n--- Visitor framework: deep vs flat trees (from source) ---")
+    print(f"{'shape':>16} {'depth':>7} {'nodes':>8} {'parse':>12} {'display':>12} {'chars/n':>9} "
+          f"{'TAC':>12} {'recursive display':>18}")
+    for depth in depths:
+        for shape, code in (("nested if", _nested_ifs(depth)),
+                            ("flat if", _flat_ifs(depth)),
+                            ("deep expression", _deep_expression(depth))):
+            ctx = CompilationContext()
+            t_parse, tree = _timed(_parse_source, code, ctx, repeat=1)
+            nodes = _count_nodes(tree)
+            shown_depth = 1 if shape == "flat if" else depth
+            display = chars = "-"
+            if shown_depth <= display_limit:
+                sink = _CountingSink()
+                with contextlib.redirect_stdout(sink):
+                    t_disp, _ = _timed(tree.display, repeat=1)
+                display = f"{t_disp * 1e6 / nodes:.2f}us/n"
+                chars = f"{sink.chars // nodes}"
+            with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+                try:
+                    _recursive_display(tree)
+                    legacy = "ok"
+                except RecursionError:
+                    legacy = "RecursionError"
+            t_tac, _ = _timed(lambda: tac_generator.generate_tac_from_node(tree, ctx=ctx), repeat=1)
+            print(f"{shape:>16} {shown_depth:>7} {nodes:>8} {t_parse * 1e6 / nodes:>8.2f}us/n "
+                  f"{display:>12} {chars:>9} {t_tac * 1e6 / nodes:>8.2f}us/n {legacy:>18}")
+
+
+def bench_incremental(megabytes=(1, 4, 16)):
+    """
+    Latency of re-analysis after a small edit: full vs incremental, for an
+    edit that keeps the length and one that inserts a character. Re-lexing,
+    re-parsing and moving later offsets are local to the edit, and the new
+    state shares every untouched column chunk with the old one, so the
+    incremental times should stay nearly flat as the file grows.
+    """
+    print("\n--- Incremental reparse after a small edit ---")
+    print(f"{'size':>8} {'tokens':>10} {'full':>10} {'replace':>10} {'insert':>10}")
+    for mb in megabytes:
+        code = generate_source(mb * 1024 * 1024)
+        state = incremental.analyze(code)
+        # Change the constant in one initializer halfway through the file.
+        start = code.index("= 2.5", len(code) // 2) + 2
+        replaced = code[:start] + "7" + code[start + 1:]
+        inserted = code[:start] + "17" + code[start + 1:]
+        t_full, _ = _timed(incremental.analyze, replaced, repeat=1)
+        t_replace, result = _timed(incremental.reparse, state, replaced, start, start + 1, start + 1)
+        assert not result.errors
+        t_insert, result = _timed(incremental.reparse, state, inserted, start, start + 1, start + 2)
+        assert not result.errors
+        print(f"{mb:>6}MB {len(state.tokens):>10} {t_full * 1000:>8.0f}ms {t_replace * 1000:>8.2f}ms "
+              f"{t_insert * 1000:>8.2f}ms")
+
+
+# --- Baseline backend (TAC as strings, re-parsed with regexes and split()) ---
+def legacy_optimize_tac(tac_lines):
+    optimized = []
+    consts = {}  
+
+    # Pass 1: Constant folding + propagation
+    for line in tac_lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        # Match arithmetic operations: t1 = 3 + 4
+        m = re.match(r"(t\d+)\s*=\s*([0-9.]+)\s*([\+\-\*/])\s*([0-9.]+)", line)
+        if m:
+            var, a, op, b = m.groups()
+            try:
+                val = eval(f"{a}{op}{b}")
+            except Exception:
+                val = f"{a}{op}{b}"
+            consts[var] = str(val)
+            optimized.append(f"{var} = {val}")
+            continue
+
+        # Replace known constants in expressions
+        for c, v in consts.items():
+            line = re.sub(rf"\b{c}\b", v, line)
+
+        # Propagate direct assignments (e.g., t2 = 5)
+        assign_match = re.match(r"(t\d+)\s*=\s*([0-9.]+)$", line)
+        if assign_match:
+            consts[assign_match.group(1)] = assign_match.group(2)
+
+        optimized.append(line)
+
+    # Pass 2: Dead code elimination (remove temps never used)
+    used = set()
+    for line in optimized:
+        # Find all temps used in expressions or conditions
+        for t in re.findall(r"\bt\d+\b", line):
+            used.add(t)
+
+    final = []
+    for line in optimized:
+        assign_match = re.match(r"(t\d+)\s*=", line)
+        if assign_match:
+            lhs = assign_match.group(1)
+            if lhs not in used:
+                continue  # remove unused temp
+        final.append(line)
+
+    # Pass 3: Remove unused labels
+    labels = set(re.findall(r"\bL\d+\b", " ".join(final)))
+    cleaned = []
+    for line in final:
+        label_match = re.match(r"LABEL\s+(L\d+)", line)
+        if label_match and label_match.group(1) not in labels:
+            continue
+        cleaned.append(line)
+
+    # Pass 4: Remove redundant jumps (GOTO immediately before its label)
+    compacted = []
+    skip_next_label = None
+    for i, line in enumerate(cleaned):
+        if line.startswith("GOTO"):
+            target = re.findall(r"L\d+", line)
+            if target and i + 1 < len(cleaned):
+                next_line = cleaned[i + 1]
+                if next_line.strip() == f"LABEL {target[0]}":
+                    # redundant jump
+                    continue
+        compacted.append(line)
+
+    return compacted
+
+
+def legacy_generate_assembly(tac_lines):
+    assembly = []
+    reg_map = {}
+    reg_count = 1
+
+    def get_reg(v):
+        nonlocal reg_count
+        # Numeric constants
+        if v.replace('.', '', 1).isdigit():
+            return v
+        # String literals
+        if v.startswith('"') and v.endswith('"'):
+            return v
+        # Map variables to registers
+        if v not in reg_map:
+            reg_map[v] = f"R{reg_count}"
+            reg_count += 1
+        return reg_map[v]
+
+    for line in tac_lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        # IF_FALSE ... GOTO
+        if line.startswith("IF_FALSE"):
+            parts = line.split()
+            _, cond_var, _, label = parts
+            r = get_reg(cond_var)
+            assembly.append(f"CMP {r}, 0")
+            assembly.append(f"JE {label}")
+
+        # GOTO label
+        elif line.startswith("GOTO"):
+            _, label = line.split()
+            assembly.append(f"JMP {label}")
+
+        # LABEL label
+        elif line.startswith("LABEL"):
+            _, label = line.split()
+            assembly.append(f"{label}:")
+
+        # Assignment / arithmetic
+        elif "=" in line:
+            lhs, rhs = [x.strip() for x in line.split("=", 1)]
+            dest = get_reg(lhs)
+            parts = rhs.split()
+
+            if len(parts) == 3 and parts[1] in {"+", "-", "*", "/"}:
+                r1, op, r2 = get_reg(parts[0]), parts[1], get_reg(parts[2])
+                if op == "+": assembly.append(f"ADD {dest}, {r1}, {r2}")
+                elif op == "-": assembly.append(f"SUB {dest}, {r1}, {r2}")
+                elif op == "*": assembly.append(f"MUL {dest}, {r1}, {r2}")
+                elif op == "/": assembly.append(f"DIV {dest}, {r1}, {r2}")
+            else:
+                src = get_reg(rhs)
+                assembly.append(f"MOV {dest}, {src}")
+
+        # PRINT statement
+        elif line.startswith("PRINT"):
+            parts = line[len("PRINT"):].strip()
+            items = [p.strip() for p in parts.split(",")]
+            asm_line = "PRINT " + " ".join(get_reg(it) for it in items)
+            assembly.append(asm_line)
+
+        # RETURN statement
+        elif line.startswith("RETURN"):
+            parts = line[len("RETURN"):].strip()
+            if parts:
+                r = get_reg(parts)
+                assembly.append(f"MOV R0, {r}")
+            assembly.append("RET")
+
+        # Fallback
+        else:
+            r = get_reg(line)
+            assembly.append(f"; standalone {r}")
+
+    return assembly
+
+
+def _string_backend(lines):
+    return legacy_generate_assembly(legacy_optimize_tac(lines))
+
+
+def _ir_backend(tac):
+    return generate_assembly(optimize_tac(tac))
+
+
+def bench_backend(kilobytes=(16, 64)):
+    """Optimization + code generation time: string TAC against ir.Instr lists."""
+    print("\n--- Backend: string TAC vs structured IR ---")
+    print(f"{'size':>8} {'TAC lines':>10} {'strings':>10} {'IR':>10} {'speed-up':>9}")
+    for kb in kilobytes:
+        _, _, tokens = lexical_analysis(generate_source(kb * 1024))
+        tree, _ = parse(tokens)
+        tac = tac_generator.generate_tac_from_node(tree)
+        lines = format_tac(tac)
+        t_old, _ = _timed(_string_backend, lines, repeat=1)
+        t_new, _ = _timed(_ir_backend, tac)
+        print(f"{kb:>6}KB {len(tac):>10} {t_old:>9.2f}s {t_new:>9.3f}s {t_old / t_new:>8.1f}x")
+
+
+def bench_liveness(megabytes=(1, 2)):
+    """Bitset liveness and fixed-point dead-store elimination on large programs."""
+    print("\n--- Liveness and dead-store elimination ---")
+    print(f"{'size':>8} {'TAC lines':>10} {'globals':>10} {'blocks':>8} "
+          f"{'liveness':>10} {'DSE':>10} {'removed':>8}")
+    for mb in megabytes:
+        _, _, tokens = lexical_analysis(generate_source(mb * 1024 * 1024))
+        tree, _ = parse(tokens)
+        tac = tac_generator.generate_tac_from_node(tree)
+        cfg = CFG(tac)
+        t_live, live_sets = _timed(Liveness, cfg, repeat=1)
+        t_dse, removed = _timed(optimizer.remove_dead_stores, cfg, repeat=1)
+        print(f"{mb:>6}MB {len(tac):>10} {len(live_sets.names):>10} {len(cfg):>8} "
+              f"{t_live:>9.2f}s {t_dse:>9.2f}s {removed:>8}")
+
+
+def _constant_chain_tac(lines):
+    """Straight-line TAC of about `lines` instructions where every temp is a foldable constant."""
+    tac = []
+    for k in range(lines // 3):
+        t1, t2 = ir.Temp(f"t{2 * k + 1}"), ir.Temp(f"t{2 * k + 2}")
+        tac.append(ir.Instr(ir.Op.ADD, t1, (ir.Const(k), ir.Const(1))))
+        tac.append(ir.Instr(ir.Op.MUL, t2, (t1, ir.Const(2))))
+        tac.append(ir.Instr(ir.Op.COPY, ir.Var(f"v{k}"), (t2,)))
+    return tac
+
+
+def bench_propagation(sizes=(500, 1000, 2000, 25000, 50000, 100000), legacy_limit=2000):
+    """
+    Constant propagation + folding: per-line regex substitution against
+    dictionary lookups on IR operands. The regex pass is quadratic, so it is
+    only run up to legacy_limit lines.
+    """
+    print("\n--- Constant propagation scaling ---")
+    print(f"{'TAC lines':>10} {'regex':>10} {'us/line':>9} {'IR':>9} {'us/line':>9}")
+    for size in sizes:
+        tac = _constant_chain_tac(size)
+        old = "-", "-"
+        if size <= legacy_limit:
+            t_old, _ = _timed(legacy_optimize_tac, format_tac(tac), repeat=1)
+            old = f"{t_old:.2f}s", f"{t_old * 1e6 / len(tac):.1f}"
+        t_new, _ = _timed(optimizer.fold_constants, CFG(tac), repeat=1)
+        print(f"{len(tac):>10} {old[0]:>10} {old[1]:>9} {t_new:>8.3f}s {t_new * 1e6 / len(tac):>9.2f}")
+
+
+def bench_levels(kilobytes=(16, 64, 256)):
+    """
+    Compile time against output size for each -O level, and the pass that
+    costs the most. Every pass is linear in the program, so the time per
+    input instruction should stay roughly flat as the size grows.
+    """
+    print("\n--- Optimization levels ---")
+    print(f"{'size':>8} {'level':>6} {'TAC in':>8} {'TAC out':>8} {'time':>9} {'us/instr':>9} "
+          f"{'slowest pass':>22}")
+    for kb in kilobytes:
+        source = generate_source(kb * 1024)
+        for level in sorted(optimizer.PIPELINES):
+            ctx = CompilationContext(opt_level=level)
+            _, _, tokens = lexical_analysis(source)
+            tree, _ = parse(tokens, ctx=ctx)
+            tac = tac_generator.generate_tac_from_node(tree, ctx=ctx)
+            manager = optimizer.PassManager(ctx)
+            elapsed, out = _timed(manager.optimize, tac, repeat=1)
+            slowest = max(manager.stats.items(), key=lambda item: item[1].seconds, default=None)
+            slowest = f"{slowest[0]} {slowest[1].seconds:.2f}s" if slowest else "-"
+            print(f"{kb:>6}KB {'-O%d' % level:>6} {len(tac):>8} {len(out):>8} "
+                  f"{elapsed:>8.2f}s {elapsed * 1e6 / len(tac):>9.1f} {slowest:>22}")
+
+
+def _nested_if_else(depth):
+    """if (c) { ... } else { ... } nested depth levels deep: each end label only jumps on."""
+    return (_DEEP_HEADER + "if (c) {\nx = x + 1;\n" * depth
+            + "}\nelse {\nx = 2;\n}\n" * depth + "}\n")
+
+
+def bench_jumps(depths=(1000, 2000, 4000, 8000, 16000)):
+    """
+    Control-flow simplification on nested if/else, whose exits form chains
+    of blocks that only jump. Jump threading resolves each block once, so
+    the time per instruction should stay flat as nesting deepens. Objects
+    alive before the pass are frozen out of garbage collection, whose
+    rescans of them would otherwise grow with the heap.
+    """
+    print("\n--- Jump threading on nested code ---")
+    print(f"{'depth':>7} {'TAC':>8} {'blocks':>8} {'simplify':>10} {'us/instr':>9}")
+    for depth in depths:
+        ctx = CompilationContext()
+        tac = tac_generator.generate_tac_from_node(_parse_source(_nested_if_else(depth), ctx), ctx=ctx)
+        cfg = CFG(tac)
+        blocks = len(cfg.blocks)
+        gc.freeze()  # keep the collector from rescanning the tree and TAC built above
+        try:
+            elapsed, _ = _timed(optimizer.simplify_cfg, cfg, ctx, repeat=1)
+        finally:
+            gc.unfreeze()
+        print(f"{depth:>7} {len(tac):>8} {blocks:>8} {elapsed:>9.3f}s {elapsed * 1e6 / len(tac):>9.2f}")
+
+
+NATIVE_SOURCE = """void main() {
+    int i, j, s = 0, n = %d;
+    float f = 0.5, g;
+    for (i = 0; i < n; i++) {
+        for (j = 0; j < n; j = j + 1) {
+            s = s + i * j + j / 3;
+            if (s > 1000000) {
+                s = s - 999983;
+            }
+        }
+        f = f + 0.25;
+        g = f * 1.1 + i;
+        s = s + g / 3;
+    }
+    printf("%%d %%f %%f\\n", s, f, g);
+    return 0;
+}
+"""
+
+
+def _run_native(path):
+    """(best wall time over three runs, stdout) of an executable."""
+    return _timed(lambda: subprocess.run([path], capture_output=True, text=True).stdout)
+
+
+def bench_native(sizes=(3000, 10000)):
+    """
+    Run time of executables built by the x86-64 backend at -O0 and -O3
+    against gcc -O0 on the same source (an n*n loop nest, with float
+    arithmetic and int/float conversions in the outer loop).
+    """
+    print("\n--- Native code: x86-64 backend vs gcc -O0 ---")
+    if shutil.which("gcc") is None:
+        print("gcc not found; skipped")
+        return
+    print(f"{'n':>6} {'gcc -O0':>10} {'ours -O0':>10} {'ours -O3':>10} {'output':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            source = NATIVE_SOURCE % n
+            c_path = os.path.join(tmp, "bench.c")
+            with open(c_path, "w") as f:
+                f.write(source)
+            subprocess.run(["gcc", "-w", "-O0", c_path, "-o", os.path.join(tmp, "gcc")], check=True)
+            t_gcc, expected = _run_native(os.path.join(tmp, "gcc"))
+            row = [f"{t_gcc:>9.3f}s"]
+            same = True
+            for level in (0, 3):
+                ctx = CompilationContext(opt_level=level)
+                tree, _ = parse(lexical_analysis(source)[2], ctx=ctx)
+                tac = optimize_tac(tac_generator.generate_tac_from_node(tree, ctx=ctx), ctx)
+                output = os.path.join(tmp, f"ours{level}")
+                build_executable(generate_x86_assembly(tac, ctx), output)
+                elapsed, out = _run_native(output)
+                row.append(f"{elapsed:>9.3f}s")
+                same = same and out == expected
+            print(f"{n:>6} {' '.join(row)} {'same' if same else 'DIFFERS':>8}")
+
+
+# --- Baseline runtime (TAC text, re-parsed on every step) ---
+def legacy_run_tac(tac_lines):
+    """Run TAC lines directly; returns (printed text, steps executed)."""
+    env = {}
+    labels = {}
+    output = []
+    for i, line in enumerate(tac_lines):
+        if line.startswith("LABEL"):
+            labels[line.split()[1]] = i
+
+    def value(token):
+        if token.startswith('"'):
+            return token[1:-1].replace("\\n", "\n")
+        if re.match(r"^-?\d+$", token):
+            return int(token)
+        if re.match(r"^-?\d+\.\d*(e[+-]?\d+)?$", token):
+            return float(token)
+        if token.startswith("-"):
+            return ir.evaluate(ir.Op.NEG, env.get(token[1:], 0))
+        return env.get(token, 0)
+
+    pc = steps = 0
+    while pc < len(tac_lines):
+        line = tac_lines[pc]
+        pc += 1
+        steps += 1
+        if line.startswith("LABEL"):
+            continue
+        if line.startswith("GOTO"):
+            pc = labels[line.split()[1]]
+        elif line.startswith("IF_FALSE"):
+            _, cond, _, label = line.split()
+            if not value(cond):
+                pc = labels[label]
+        elif line.startswith("PRINT"):
+            items = re.findall(r'"(?:[^"\\]|\\.)*"|[^,\s]+', line[len("PRINT"):])
+            values = [value(item) for item in items]
+            fmt = values[0]
+            output.append(fmt % tuple(values[1:1 + fmt.count("%") - 2 * fmt.count("%%")]))
+        elif line.startswith("RETURN"):
+            break
+        elif " = (" in line:
+            dest, cast, src = re.match(r"^(\S+) = \((int|float)\) (\S+)$", line).groups()
+            env[dest] = ir.evaluate(ir.Op.TO_INT if cast == "int" else ir.Op.TO_FLOAT, value(src))
+        else:
+            m = re.match(r"^(\S+) = (\S+) (\S+) (\S+)$", line)
+            if m:
+                dest, a, op, b = m.groups()
+                env[dest] = ir.evaluate(ir.BINARY_OPS[op], value(a), value(b))
+            else:
+                dest, src = [x.strip() for x in line.split("=", 1)]
+                env[dest] = value(src)
+    return "".join(output), steps
+
+
+def _vm_run(program):
+    out = io.StringIO()
+    execution = vm.run(program, out)
+    return out.getvalue(), execution
+
+
+def bench_vm(sizes=(60, 150)):
+    """
+    Run time of the bytecode VM against a string TAC interpreter on an n*n
+    loop nest, and the dynamic instruction counts -O0 and -O3 leave.
+    """
+    print("\n--- Runtime: string TAC interpreter vs bytecode VM ---")
+    print(f"{'n':>5} {'level':>6} {'executed':>10} {'strings':>9} {'VM':>9} {'speed-up':>9} {'output':>8}")
+    for n in sizes:
+        source = NATIVE_SOURCE % n
+        for level in (0, 3):
+            ctx = CompilationContext(opt_level=level)
+            tree, _ = parse(lexical_analysis(source)[2], ctx=ctx)
+            tac = optimize_tac(tac_generator.generate_tac_from_node(tree, ctx=ctx), ctx)
+            program = vm.compile_bytecode(tac)
+            t_old, (old_out, _) = _timed(legacy_run_tac, format_tac(tac), repeat=1)
+            t_new, (new_out, execution) = _timed(_vm_run, program)
+            same = "same" if old_out == new_out else "DIFFERS"
+            print(f"{n:>5} {'-O%d' % level:>6} {execution.steps:>10} {t_old:>8.2f}s "
+                  f"{t_new:>8.3f}s {t_old / t_new:>8.1f}x {same:>8}")
+
+
+BENCHMARKS = {
+    "lexer": bench_lexer,
+    "stream": bench_stream,
+    "arena": bench_arena,
+    "deep": bench_deep,
+    "incremental": bench_incremental,
+    "backend": bench_backend,
+    "liveness": bench_liveness,
+    "propagation": bench_propagation,
+    "levels": bench_levels,
+    "jumps": bench_jumps,
+    "native": bench_native,
+    "vm": bench_vm,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        BENCHMARKS[name]()
@@ -0,0 +1,181 @@
+# cfg.py
+"""
+Control-flow graph over a list of ir.Instr.
+
+A new basic block starts at the first instruction, at every LABEL and
+after every IF_FALSE, GOTO or RETURN. A block that begins with a LABEL
+keeps that LABEL as its first instruction, so instructions() gives back
+the linear TAC. Edges are stored as lists of block indices:
+
+    GOTO L        -> the block labelled L
+    IF_FALSE c L  -> the block labelled L, then the next block
+    RETURN        -> none
+    otherwise     -> the next block (fall-through)
+
+Passes may edit block.instrs in place; after changing a terminator or
+removing blocks, call link() (or rebuild with CFG(cfg.instructions())).
+"""
+from ir import Op, JUMPS
+
+ENDS_BLOCK = JUMPS | {Op.RETURN}
+
+
+class BasicBlock:
+    __slots__ = ("index", "instrs", "succs", "preds")
+
+    def __init__(self, index, instrs):
+        self.index = index
+        self.instrs = instrs
+        self.succs = []
+        self.preds = []
+
+    @property
+    def label(self):
+        """The Label this block starts with, or None."""
+        if self.instrs and self.instrs[0].op == Op.LABEL:
+            return self.instrs[0].args[0]
+        return None
+
+    @property
+    def terminator(self):
+        """The closing IF_FALSE, GOTO or RETURN, or None for a fall-through block."""
+        if self.instrs and self.instrs[-1].op in ENDS_BLOCK:
+            return self.instrs[-1]
+        return None
+
+    def __repr__(self):
+        return f"<BasicBlock {self.index} ({len(self.instrs)} instrs) -> {self.succs}>"
+
+
+class CFG:
+    __slots__ = ("blocks", "labels", "unrolled")
+
+    def __init__(self, tac):
+        self.blocks = []
+        self.unrolled = set()  # header labels of loops partially unrolled in this CFG
+        current = []
+        for instr in tac:
+            if instr.op == Op.LABEL and current:
+                self._add_block(current)
+                current = []
+            current.append(instr)
+            if instr.op in ENDS_BLOCK:
+                self._add_block(current)
+                current = []
+        if current:
+            self._add_block(current)
+        self.link()
+
+    def _add_block(self, instrs):
+        self.blocks.append(BasicBlock(len(self.blocks), instrs))
+
+    def link(self):
+        """(Re)compute block indices, the label map and all edges."""
+        blocks = self.blocks
+        self.labels = {}
+        for index, block in enumerate(blocks):
+            block.index = index
+            block.succs = []
+            block.preds = []
+            if block.label is not None:
+                self.labels[block.label] = index
+        for block in blocks:
+            last = block.terminator
+            if last is not None and last.op != Op.IF_FALSE:
+                if last.op == Op.GOTO:
+                    block.succs.append(self.labels[last.args[0]])
+            else:
+                if last is not None:
+                    block.succs.append(self.labels[last.args[1]])
+                if block.index + 1 < len(blocks) and block.index + 1 not in block.succs:
+                    block.succs.append(block.index + 1)
+            for succ in block.succs:
+                blocks[succ].preds.append(block.index)
+
+    def instructions(self):
+        return [instr for block in self.blocks for instr in block.instrs]
+
+    def __len__(self):
+        return len(self.blocks)
+
+    # --- Orderings and dominance ---
+    def reverse_postorder(self):
+        """Indices of the blocks reachable from the entry, in reverse postorder."""
+        if not self.blocks:
+            return []
+        blocks = self.blocks
+        order = []
+        seen = {0}
+        stack = [(0, iter(blocks[0].succs))]
+        while stack:
+            node, succs = stack[-1]
+            for succ in succs:
+                if succ not in seen:
+                    seen.add(succ)
+                    stack.append((succ, iter(blocks[succ].succs)))
+                    break
+            else:
+                stack.pop()
+                order.append(node)
+        order.reverse()
+        return order
+
+    def dominators(self):
+        """
+        Immediate dominator of every block (Cooper, Harvey and Kennedy's
+        iterative algorithm). The entry is its own idom; unreachable blocks
+        get None.
+        """
+        order = self.reverse_postorder()
+        rpo_number = {node: i for i, node in enumerate(order)}
+        idom = [None] * len(self.blocks)
+        if not order:
+            return idom
+        idom[0] = 0
+
+        def intersect(a, b):
+            while a != b:
+                while rpo_number[a] > rpo_number[b]:
+                    a = idom[a]
+                while rpo_number[b] > rpo_number[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for node in order[1:]:
+                new_idom = None
+                for pred in self.blocks[node].preds:
+                    if idom[pred] is None:
+                        continue
+                    new_idom = pred if new_idom is None else intersect(pred, new_idom)
+                if idom[node] != new_idom:
+                    idom[node] = new_idom
+                    changed = True
+        return idom
+
+
+def dominance_frontiers(cfg, idom):
+    """Per block, the set of blocks where its dominance ends (join points it reaches)."""
+    blocks = cfg.blocks
+    frontiers = [set() for _ in blocks]
+    for block in blocks:
+        b = block.index
+        if len(block.preds) < 2 or idom[b] is None:
+            continue
+        for pred in block.preds:
+            runner = pred
+            while idom[runner] is not None and runner != idom[b]:
+                frontiers[runner].add(b)
+                runner = idom[runner]
+    return frontiers
+
+
+def dominates(idom, a, b):
+    """True if block a dominates block b under the idom list from CFG.dominators()."""
+    while b != a:
+        if b == 0 or idom[b] is None:
+            return False
+        b = idom[b]
+    return True
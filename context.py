@@ -0,0 +1,45 @@
+# context.py
+"""
+Per-compilation state shared by every phase.
+
+A CompilationContext owns the fresh-name counters, the symbol table and
+the options of one compilation. Phases take it as an optional `ctx`
+argument and create a fresh one when none is given. No phase keeps
+module-level state, so compilations can run concurrently in threads or
+processes, and each produces the same names no matter what ran before it.
+"""
+
+
+class CompilationContext:
+
+    def __init__(self, **options):
+        self.options = options
+        self.label_counter = 1
+        self.temp_counter = 1
+        self.symbols = {}  # variable name -> declared type
+
+    def new_label(self):
+        lbl = f"L{self.label_counter}"
+        self.label_counter += 1
+        return lbl
+
+    def new_temp(self):
+        tmp = f"t{self.temp_counter}"
+        self.temp_counter += 1
+        return tmp
+
+    def reserve(self, name):
+        """Keep new_label()/new_temp() from ever returning an existing name like L4 or t12."""
+        number = name[1:]
+        if number.isdigit():
+            if name[0] == "L":
+                self.label_counter = max(self.label_counter, int(number) + 1)
+            elif name[0] == "t":
+                self.temp_counter = max(self.temp_counter, int(number) + 1)
+
+    def declare(self, name, var_type):
+        """Record a variable's type; the first declaration wins."""
+        self.symbols.setdefault(name, var_type)
+
+    def option(self, name, default=None):
+        return self.options.get(name, default)
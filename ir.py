@@ -0,0 +1,307 @@
+# ir.py
+"""
+Three-address code as instruction objects.
+
+An Instr has an opcode (Op), an optional destination operand and a tuple
+of argument operands:
+
+    COPY      dest = a
+    ADD..NE   dest = a <op> b
+    SHL, SHR  dest = a << b, dest = a >> b   (int only; >> is arithmetic)
+    NEG       dest = -a
+    TO_INT    dest = (int) a                  truncates toward zero
+    TO_FLOAT  dest = (float) a                rounds to single precision
+    IF_FALSE  IF_FALSE cond GOTO label        args (cond, label)
+    GOTO      GOTO label                      args (label,)
+    LABEL     LABEL label                     args (label,)
+    PRINT     PRINT "fmt", a, b               args (fmt, a, b)
+    RETURN    RETURN a                        args (a,)
+    PHI       dest = PHI(a, b)                one arg per predecessor block (SSA only)
+
+Operands are small immutable objects (Temp, Var, Const, Str, Label) that
+compare and hash by value, so passes can key dictionaries and sets on them
+directly. str() of an instruction gives the textual TAC used for display;
+parse_tac() reads that text back for debugging.
+"""
+import math
+import operator
+import re
+import struct
+from enum import IntEnum
+
+
+class Op(IntEnum):
+    COPY = 0
+    ADD = 1
+    SUB = 2
+    MUL = 3
+    DIV = 4
+    LT = 5
+    GT = 6
+    LE = 7
+    GE = 8
+    EQ = 9
+    NE = 10
+    IF_FALSE = 11
+    GOTO = 12
+    LABEL = 13
+    PRINT = 14
+    RETURN = 15
+    NEG = 16
+    PHI = 17
+    SHL = 18
+    SHR = 19
+    TO_INT = 20
+    TO_FLOAT = 21
+
+
+SYMBOLS = {
+    Op.ADD: "+", Op.SUB: "-", Op.MUL: "*", Op.DIV: "/",
+    Op.LT: "<", Op.GT: ">", Op.LE: "<=", Op.GE: ">=", Op.EQ: "==", Op.NE: "!=",
+    Op.SHL: "<<", Op.SHR: ">>",
+}
+BINARY_OPS = {symbol: op for op, symbol in SYMBOLS.items()}
+ARITHMETIC = frozenset((Op.ADD, Op.SUB, Op.MUL, Op.DIV, Op.SHL, Op.SHR))
+SHIFTS = frozenset((Op.SHL, Op.SHR))
+COMPARISONS = frozenset((Op.LT, Op.GT, Op.LE, Op.GE, Op.EQ, Op.NE))
+JUMPS = frozenset((Op.IF_FALSE, Op.GOTO))
+CONVERSIONS = frozenset((Op.TO_INT, Op.TO_FLOAT))
+UNARY = CONVERSIONS | {Op.NEG}
+CASTS = {Op.TO_INT: "int", Op.TO_FLOAT: "float"}
+
+INT_MIN, INT_MAX = -2**31, 2**31 - 1
+
+_EVAL = {
+    Op.ADD: operator.add, Op.SUB: operator.sub, Op.MUL: operator.mul,
+    Op.LT: operator.lt, Op.GT: operator.gt, Op.LE: operator.le,
+    Op.GE: operator.ge, Op.EQ: operator.eq, Op.NE: operator.ne,
+    Op.SHL: operator.lshift, Op.SHR: operator.rshift,
+}
+
+
+def wrap_int(value):
+    """Reduce an integer to 32-bit two's complement, as C int arithmetic does."""
+    return (value - INT_MIN) % 2**32 + INT_MIN
+
+
+def to_float32(value):
+    """value rounded to the nearest single-precision float (as a Python float)."""
+    try:
+        return struct.unpack("f", struct.pack("f", value))[0]
+    except OverflowError:
+        return math.copysign(math.inf, value)
+
+
+def to_int(value):
+    """
+    (int) value: floats truncate toward zero. Values outside the int range
+    (and NaN) give INT_MIN, as x86-64 cvttsd2si does.
+    """
+    if type(value) is int:
+        return value
+    if not math.isfinite(value) or not INT_MIN <= math.trunc(value) <= INT_MAX:
+        return INT_MIN
+    return math.trunc(value)
+
+
+def evaluate(op, a, b=None):
+    """
+    Value of a binary or unary op on constant values with C semantics, or
+    None when it must be left to run time.
+    int op int stays a 32-bit int (wrapping; '/' truncates toward zero);
+    with a float operand the other is converted and the result is a float.
+    Comparisons give int 1 or 0. Division by zero, INT_MIN / -1,
+    non-finite float results, (int) of a value out of int range and
+    shifts of floats or by a count outside 0..31 are never folded.
+    """
+    if op == Op.NEG:
+        return wrap_int(-a) if type(a) is int else -a
+    if op == Op.TO_INT:
+        result = to_int(a)
+        return None if result == INT_MIN and a != INT_MIN else result  # out of range
+    if op == Op.TO_FLOAT:
+        result = to_float32(a)
+        return result if math.isfinite(result) else None
+    if op in SHIFTS:
+        if type(a) is not int or type(b) is not int or not 0 <= b < 32:
+            return None
+        return wrap_int(_EVAL[op](a, b))
+    if type(a) is int and type(b) is int:
+        if op == Op.DIV:
+            if b == 0 or (a == INT_MIN and b == -1):
+                return None
+            quotient = abs(a) // abs(b)
+            return quotient if (a < 0) == (b < 0) else -quotient
+        result = _EVAL[op](a, b)
+        return int(result) if op in COMPARISONS else wrap_int(result)
+    a, b = float(a), float(b)
+    if op == Op.DIV:
+        if b == 0.0:
+            return None
+        result = a / b
+    else:
+        result = _EVAL[op](a, b)
+        if op in COMPARISONS:
+            return int(result)
+    return result if math.isfinite(result) else None
+
+
+# --- Operands ---
+class Operand:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.value == other.value
+
+    def __hash__(self):
+        return hash((type(self), self.value))
+
+    def __str__(self):
+        return str(self.value)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.value!r})"
+
+
+class Temp(Operand):
+    """Compiler-generated temporary, e.g. t3."""
+    __slots__ = ()
+
+
+class Var(Operand):
+    """User variable."""
+    __slots__ = ()
+
+
+class Const(Operand):
+    """Numeric constant; value is an int or a float."""
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return (type(self) is type(other) and self.value == other.value
+                and type(self.value) is type(other.value))
+
+    __hash__ = Operand.__hash__
+
+
+class Str(Operand):
+    """String literal; value keeps the surrounding quotes."""
+    __slots__ = ()
+
+
+class Label(Operand):
+    __slots__ = ()
+
+
+def number(text):
+    """Value of a numeric literal: int, or float when it has a '.' or exponent."""
+    return int(text) if text.lstrip("-").isdigit() else float(text)
+
+
+# --- Instructions ---
+class Instr:
+    __slots__ = ("op", "dest", "args")
+
+    def __init__(self, op, dest=None, args=()):
+        self.op = op
+        self.dest = dest
+        self.args = args
+
+    def uses(self):
+        """Temps and variables read by this instruction."""
+        return [a for a in self.args if type(a) is Temp or type(a) is Var]
+
+    def __str__(self):
+        op, args = self.op, self.args
+        if op == Op.COPY:
+            return f"{self.dest} = {args[0]}"
+        if op in SYMBOLS:
+            return f"{self.dest} = {args[0]} {SYMBOLS[op]} {args[1]}"
+        if op == Op.NEG:
+            return f"{self.dest} = -{args[0]}"
+        if op in CASTS:
+            return f"{self.dest} = ({CASTS[op]}) {args[0]}"
+        if op == Op.IF_FALSE:
+            return f"IF_FALSE {args[0]} GOTO {args[1]}"
+        if op == Op.PRINT:
+            return "PRINT " + ", ".join(map(str, args))
+        if op == Op.PHI:
+            return f"{self.dest} = PHI({', '.join(map(str, args))})"
+        return f"{op.name} {args[0]}"
+
+    def __repr__(self):
+        return f"<{self}>"
+
+
+def format_tac(tac):
+    return [str(instr) for instr in tac]
+
+
+# --- Text parser (debugging aid) ---
+_OPERAND = re.compile(
+    r'(?P<Str>"(?:[^"\\]|\\.)*")'
+    r'|(?P<Const>-?\d+(?:\.\d*)?(?:e[+-]?\d+)?)'
+    r'|(?P<Temp>t\d+(?:\.\d+)?)'          # SSA versions are written t3.1, x.2
+    r'|(?P<Var>[A-Za-z_]\w*(?:\.\d+)?)'
+)
+_ASSIGN = re.compile(r"(\S+)\s*=\s*(\S+)(?:\s*(<<|>>|<=|>=|==|!=|[-+*/<>])\s*(\S+))?$")
+_IF_FALSE = re.compile(r"IF_FALSE\s+(\S+)\s+GOTO\s+(\S+)$")
+_PHI = re.compile(r"(\S+)\s*=\s*PHI\((.*)\)$")
+_CAST = re.compile(r"(\S+)\s*=\s*\((int|float)\)\s*(\S+)$")
+
+
+def parse_operand(text):
+    m = _OPERAND.fullmatch(text)
+    if m is None:
+        raise ValueError(f"Bad TAC operand '{text}'")
+    kind = m.lastgroup
+    if kind == "Const":
+        return Const(number(text))
+    return {"Str": Str, "Temp": Temp, "Var": Var}[kind](text)
+
+
+def parse_instr(line):
+    line = line.strip()
+    word, _, rest = line.partition(" ")
+    rest = rest.strip()
+    if word == "LABEL" or word == "GOTO":
+        return Instr(Op[word], None, (Label(rest),))
+    if word == "IF_FALSE":
+        m = _IF_FALSE.match(line)
+        if m:
+            return Instr(Op.IF_FALSE, None, (parse_operand(m.group(1)), Label(m.group(2))))
+    elif word == "RETURN":
+        return Instr(Op.RETURN, None, (parse_operand(rest) if rest else Const(0),))
+    elif word == "PRINT":
+        items = [m.group() for m in _OPERAND.finditer(rest)]
+        return Instr(Op.PRINT, None, tuple(map(parse_operand, items)))
+    else:
+        m = _PHI.match(line)
+        if m:
+            args = [a.strip() for a in m.group(2).split(",")]
+            return Instr(Op.PHI, parse_operand(m.group(1)), tuple(map(parse_operand, args)))
+        m = _CAST.match(line)
+        if m:
+            op = Op.TO_INT if m.group(2) == "int" else Op.TO_FLOAT
+            return Instr(op, parse_operand(m.group(1)), (parse_operand(m.group(3)),))
+        m = _ASSIGN.match(line)
+        if m:
+            dest, a, symbol, b = m.groups()
+            if symbol is None:
+                if a.startswith("-") and not _OPERAND.fullmatch(a):
+                    return Instr(Op.NEG, parse_operand(dest), (parse_operand(a[1:]),))
+                return Instr(Op.COPY, parse_operand(dest), (parse_operand(a),))
+            return Instr(BINARY_OPS[symbol], parse_operand(dest),
+                         (parse_operand(a), parse_operand(b)))
+    raise ValueError(f"Bad TAC line '{line}'")
+
+
+def parse_tac(lines):
+    """Parse textual TAC (a string or an iterable of lines); blank and # lines are skipped."""
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    return [parse_instr(line) for line in lines
+            if line.strip() and not line.lstrip().startswith("#")]
@@ -1,97 +1,493 @@
-# lexer.py
-import re
-import os
-
-KEYWORDS = {"int", "float", "string", "void", 
-            "return", "if", "else", "for", "while", 
-            "printf"}
-
-OPERATORS = {"+", "-", "*", "/", "=", ">", "<", 
-             "==", ">=", "<=", "!=", "++", "--"}
-
-PUNCTUATIONS = {";", ",", "(", ")", "{", "}"}
-
-
-def lexical_analysis(code):
-    """
-    Perform lexical analysis on the given code string.
-    Returns:
-        result: dict of categorized tokens
-        errors: list of unrecognized tokens
-        ordered_tokens: list of tokens in order of appearance
-    """
-    token_pattern = (
-        r'\".*?\"'                # string literals
-        r'|[A-Za-z_][A-Za-z0-9_]*'  # identifiers
-        r'|\d+\.\d+'              # float constants
-        r'|\d+'                   # integer constants
-        r'|==|!=|<=|>=|[+\-*/=<>;,(){}]'  # operators & punctuations
-    )
-
-    tokens = re.findall(token_pattern, code)
-
-    result = {
-        "Keyword": set(),
-        "Identifier": set(),
-        "Operator": set(),
-        "Constant": set(),
-        "String": set(),
-        "Punctuation": set()
-    }
-
-    errors = []
-    ordered_tokens = []
-
-    for token in tokens:
-        if token in KEYWORDS:
-            result["Keyword"].add(token)
-            ordered_tokens.append(("Keyword", token))
-        elif re.match(r'^".*"$', token):
-            result["String"].add(token)
-            ordered_tokens.append(("String", token))
-        elif re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', token):
-            result["Identifier"].add(token)
-            ordered_tokens.append(("Identifier", token))
-        elif re.match(r'^\d+\.\d+$', token):
-            result["Constant"].add(token)
-            ordered_tokens.append(("Constant", token))
-        elif re.match(r'^\d+$', token):
-            result["Constant"].add(token)
-            ordered_tokens.append(("Constant", token))
-        elif token in OPERATORS:
-            result["Operator"].add(token)
-            ordered_tokens.append(("Operator", token))
-        elif token in PUNCTUATIONS:
-            result["Punctuation"].add(token)
-            ordered_tokens.append(("Punctuation", token))
-        else:
-            errors.append(token)
-
-    # Convert sets to sorted lists
-    for k in result:
-        result[k] = sorted(result[k])
-
-    return result, errors, ordered_tokens
-
-
-def display_tokens(result, errors):
-    """Display lexical analysis results"""
-    print("\n--- Lexical Analysis ---")
-    for category, items in result.items():
-        if items:
-            print(f"{category} ({len(items)}): {', '.join(items)}")
-    if errors:
-        print(f"\nInvalid Tokens ({len(errors)}): {', '.join(errors)}")
-
-
-# --- Run independently from a file ---
-if __name__ == "__main__":
-    path = input("Enter the path of the code file: ").strip()
-    if not os.path.exists(path):
-        print(" File not found.")
-    else:
-        with open(path, "r") as f:
-            code = f.read()
-
-        result, errors, ordered_tokens = lexical_analysis(code)
-        display_tokens(result, errors)
+# lexer.py
+import codecs
+import mmap
+import re
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+KEYWORDS = {"int", "float", "string", "void", 
+            "return", "if", "else", "for", "while", 
+            "printf"}
+
+OPERATORS = {"+", "-", "*", "/", "=", ">", "<", 
+             "==", ">=", "<=", "!=", "++", "--"}
+
+PUNCTUATIONS = {";", ",", "(", ")", "{", "}"}
+
+
+# Token categories in match priority order. Each becomes a named group of the
+# master pattern so a single finditer pass yields both the value and its kind.
+# Leading whitespace is absorbed by the pattern itself, so any gap between two
+# consecutive matches is text no token rule accepts.
+TOKEN_SPEC = [
+    ("String", r'"(?:[^"\\\n]|\\.)*"'),            # string literals
+    ("Identifier", r'[A-Za-z_][A-Za-z0-9_]*'),     # identifiers & keywords
+    ("Constant", r'\d+\.\d+|\d+'),                 # float & integer constants
+    ("Operator", r'==|!=|<=|>=|\+\+|--|[+\-*/=<>]'),
+    ("Punctuation", r'[;,(){}]'),
+]
+
+MASTER_PATTERN = re.compile(
+    r"\s*(?:" + "|".join(f"(?P<{kind}>{pattern})" for kind, pattern in TOKEN_SPEC) + ")"
+)
+
+
+def _unmatched_span(code, pos, end):
+    """Return (text, start, end) for non-blank text in code[pos:end], else None."""
+    gap = code[pos:end]
+    if gap.isspace():
+        return None
+    text = gap.strip()
+    start = pos + len(gap) - len(gap.lstrip())
+    return text, start, start + len(text)
+
+
+def scan(code):
+    """
+    Single-pass scanner over the code string.
+    Yields (kind, value, start, end) for every token. Any non-blank text the
+    pattern skips over is yielded as an "Unknown" token covering that span.
+    """
+    pos = 0
+    for m in MASTER_PATTERN.finditer(code):
+        if m.start() != pos:
+            span = _unmatched_span(code, pos, m.start())
+            if span:
+                yield ("Unknown",) + span
+        kind = m.lastgroup
+        start = m.start(kind)
+        pos = m.end()
+        value = code[start:pos]
+        if kind == "Identifier" and value in KEYWORDS:
+            kind = "Keyword"
+        yield kind, value, start, pos
+    if pos < len(code):
+        span = _unmatched_span(code, pos, len(code))
+        if span:
+            yield ("Unknown",) + span
+
+
+# Characters no token continues past, so text can be cut right after one
+# as long as no string literal covers it (a subset of what \s matches,
+# plus the single-character punctuations).
+_CUT_AFTER = " \t\r;,(){}"
+_STRING = re.compile(TOKEN_SPEC[0][1])
+
+
+def _safe_cut(text):
+    """
+    Length of the longest prefix of text that scans the same on its own:
+    up to a newline, or on the unfinished last line up to the last cut
+    character outside a string literal. A quote not yet closed may still
+    open a string, so nothing after it is cut.
+    """
+    cut = pos = text.rfind("\n") + 1
+    while True:
+        quote = text.find('"', pos)
+        stop = len(text) if quote < 0 else quote
+        for ch in _CUT_AFTER:
+            at = text.rfind(ch, pos, stop)
+            if at >= cut:
+                cut = at + 1
+        if quote < 0:
+            return cut
+        string = _STRING.match(text, quote)
+        if string is None:
+            return cut
+        pos = string.end()
+
+
+def stream_tokens(f, chunk_size=1 << 16):
+    """
+    Lazily tokenize a file-like object (text handle, binary handle or mmap).
+    Reads chunk_size units at a time and only scans up to the last point
+    no token can cross (see _safe_cut), carrying the remainder into the
+    next chunk. Tokens crossing a chunk boundary are therefore never
+    split, and memory stays bounded by chunk_size plus the longest run of
+    text with no whitespace or punctuation outside a string literal, even
+    for machine-generated files that are one long line.
+    Yields (kind, value, start, end) with character offsets into the file.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    base = 0
+    pending = ""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        pending += chunk
+        cut = _safe_cut(pending)
+        if cut == 0:
+            continue  # nothing can be scanned on its own yet
+        for kind, value, start, end in scan(pending[:cut]):
+            yield kind, value, base + start, base + end
+        base += cut
+        pending = pending[cut:]
+
+    pending += decoder.decode(b"", final=True)
+    for kind, value, start, end in scan(pending):
+        yield kind, value, base + start, base + end
+
+
+def tokenize_file(path, chunk_size=None, ctx=None):
+    """
+    Stream tokens from a file on disk through a read-only memory map.
+    chunk_size defaults to the context's "chunk_size" option, or 64KB.
+    """
+    if chunk_size is None:
+        chunk_size = ctx.option("chunk_size", 1 << 16) if ctx else 1 << 16
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from stream_tokens(mm, chunk_size)
+
+
+def file_lines(path, offsets, chunk_size=1 << 16):
+    """
+    1-based line numbers of ascending character offsets into a file (as
+    reported by tokenize_file), counting newlines a chunk at a time.
+    """
+    lines = []
+    line = 1
+    base = done = 0  # offset of the current chunk; how much of it is counted
+    with open(path, encoding="utf-8", newline="") as f:
+        chunk = f.read(chunk_size)
+        for offset in offsets:
+            while chunk and offset >= base + len(chunk):
+                line += chunk.count("\n", done)
+                base += len(chunk)
+                done = 0
+                chunk = f.read(chunk_size)
+            line += chunk.count("\n", done, offset - base)
+            done = max(offset - base, done)
+            lines.append(line)
+    return lines
+
+
+# Kind codes stored in TokenTable.kinds; the index is the code.
+KIND_NAMES = ("Keyword", "Identifier", "Operator", "Constant",
+              "String", "Punctuation", "Unknown")
+KIND_CODES = {name: code for code, name in enumerate(KIND_NAMES)}
+
+
+CHUNK = 2048  # entries per ChunkedList chunk
+
+
+class ChunkedList:
+    """
+    Persistent sequence stored as a list of chunks: arrays of `typecode`,
+    or lists when typecode is None. splice() returns a new version that
+    shares every chunk the edit does not touch, so an edit copies at most
+    a few chunks plus one reference per chunk, and this version stays
+    valid. Indexing finds the chunk by bisection; flat() gives a plain
+    array or list for passes that index every entry.
+    """
+    __slots__ = ("typecode", "chunks", "firsts", "size")
+
+    def __init__(self, items=(), typecode=None):
+        self.typecode = typecode
+        self.chunks = [items[k:k + CHUNK] for k in range(0, len(items), CHUNK)]
+        self.firsts = list(range(0, len(items), CHUNK))  # index of each chunk's first entry
+        self.size = len(items)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.size
+        k = bisect_right(self.firsts, i) - 1
+        if k < 0 or i >= self.size:
+            raise IndexError("ChunkedList index out of range")
+        return self.chunks[k][i - self.firsts[k]]
+
+    def __iter__(self):
+        return chain.from_iterable(self.chunks)
+
+    def flat(self):
+        items = array(self.typecode) if self.typecode else []
+        for chunk in self.chunks:
+            items.extend(chunk)
+        return items
+
+    def _piece(self, k, lo, hi, shift):
+        """Entries lo..hi-1 of chunk k as a fresh chunk, moved by shift."""
+        return self.chunks[k][lo:hi]
+
+    def _moved(self, fresh, ka, hi, count, shift):
+        """Hook for OffsetArray: chunks ka..hi-1 became `count` new ones."""
+
+    def splice(self, a, b, values, shift=0):
+        """
+        Return a new list with entries a..b-1 replaced by values and every
+        later entry moved by shift (OffsetArray only). This list is unchanged.
+        """
+        chunks, firsts = self.chunks, self.firsts
+        merged = array(self.typecode, values) if self.typecode else list(values)
+        if chunks:
+            ka = max(bisect_right(firsts, a) - 1, 0)
+            hi = max(bisect_right(firsts, b - 1), ka + 1)
+            merged = (self._piece(ka, 0, a - firsts[ka], 0) + merged
+                      + self._piece(hi - 1, b - firsts[hi - 1], CHUNK * 2, shift))
+            # Keep chunks from shrinking edit after edit: absorb a neighbour.
+            if len(merged) < CHUNK // 2 and hi < len(chunks):
+                merged += self._piece(hi, 0, CHUNK * 2, shift)
+                hi += 1
+            elif len(merged) < CHUNK // 2 and ka > 0:
+                ka -= 1
+                merged = self._piece(ka, 0, CHUNK * 2, 0) + merged
+        else:
+            ka = hi = 0
+        fresh = object.__new__(type(self))
+        fresh.typecode = self.typecode
+        fresh.size = self.size + len(values) - (b - a)
+        # Split evenly, so a full chunk that grows by one entry does not leave a sliver.
+        step = -(-len(merged) // -(-len(merged) // CHUNK)) if merged else CHUNK
+        new = [merged[k:k + step] for k in range(0, len(merged), step)]
+        fresh.chunks = chunks[:ka] + new + chunks[hi:]
+        base = firsts[ka] if ka < len(firsts) else self.size
+        grow = fresh.size - self.size
+        fresh.firsts = (firsts[:ka] + list(range(base, base + len(merged), step))
+                        + [first + grow for first in firsts[hi:]])
+        self._moved(fresh, ka, hi, len(new), shift)
+        return fresh
+
+
+class OffsetArray(ChunkedList):
+    """
+    Sorted ChunkedList of ints (array 'i') that can be spliced with every
+    later entry moved by a shift, without rewriting them all: each chunk
+    carries a pending shift, so splice() adds to one int per later chunk
+    instead of touching their entries.
+    """
+    __slots__ = ("shifts",)
+
+    def __init__(self, items=None):
+        super().__init__(array("i") if items is None else items, "i")
+        self.shifts = [0] * len(self.chunks)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.size
+        k = bisect_right(self.firsts, i) - 1
+        if k < 0 or i >= self.size:
+            raise IndexError("OffsetArray index out of range")
+        return self.chunks[k][i - self.firsts[k]] + self.shifts[k]
+
+    def __iter__(self):
+        for chunk, shift in zip(self.chunks, self.shifts):
+            yield from map(shift.__add__, chunk) if shift else chunk
+
+    def flat(self):
+        return array("i", self)
+
+    def _piece(self, k, lo, hi, shift):
+        piece = self.chunks[k][lo:hi]
+        shift += self.shifts[k]
+        return array("i", map(shift.__add__, piece)) if shift else piece
+
+    def _moved(self, fresh, ka, hi, count, shift):
+        shifts = self.shifts
+        fresh.shifts = shifts[:ka] + [0] * count + [s + shift for s in shifts[hi:]]
+
+    def _bisect(self, value, side):
+        # Chunks are sorted too: find the one by its last entry, then bisect inside it.
+        chunks, shifts = self.chunks, self.shifts
+        k = side(range(len(chunks)), value, key=lambda k: chunks[k][-1] + shifts[k])
+        if k == len(chunks):
+            return self.size
+        return self.firsts[k] + side(chunks[k], value - shifts[k])
+
+    def bisect_left(self, value):
+        return self._bisect(value, bisect_left)
+
+    def bisect_right(self, value):
+        return self._bisect(value, bisect_right)
+
+
+class TokenTable:
+    """
+    Columnar token store.
+    Each token costs one kind code (array 'B'), a start and end offset into
+    the source ('i') and an index into the interned text table, so
+    repeated identifiers, constants and punctuation share one string.
+    Tables from the lexer hold flat arrays; shared() and splice() give the
+    columns as ChunkedList/OffsetArray, so edited versions of a table share
+    everything the edit does not touch.
+    Indexing returns the (kind, value) pair older callers expect.
+    """
+    __slots__ = ("kinds", "starts", "ends", "ids", "texts", "_interned")
+
+    def __init__(self):
+        self.kinds = array("B")
+        self.starts = array("i")
+        self.ends = array("i")
+        self.ids = array("I")
+        self.texts = []
+        self._interned = {}
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """Build a table from (kind, value) pairs or (kind, value, start, end) tuples."""
+        table = cls()
+        for tok in tokens:
+            if len(tok) == 4:
+                table.append(*tok)
+            else:
+                table.append(tok[0], tok[1], 0, 0)
+        return table
+
+    def intern(self, value):
+        """Return the text id for value, adding it to the table if new."""
+        idx = self._interned.get(value)
+        if idx is None:
+            idx = self._interned[value] = len(self.texts)
+            self.texts.append(value)
+        return idx
+
+    def lookup(self, value):
+        """Return the text id for value, or -1 if no token has that text."""
+        return self._interned.get(value, -1)
+
+    def append(self, kind, value, start, end):
+        # Only flat tables being built are appended to.
+        self.kinds.append(KIND_CODES[kind])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.ids.append(self.intern(value))
+
+    def _with(self, kinds, starts, ends, ids):
+        table = TokenTable.__new__(TokenTable)
+        table.kinds, table.starts, table.ends, table.ids = kinds, starts, ends, ids
+        table.texts = self.texts
+        table._interned = self._interned
+        return table
+
+    def shared(self):
+        """Return this table with chunked columns (itself if they already are)."""
+        if isinstance(self.kinds, ChunkedList):
+            return self
+        return self._with(ChunkedList(self.kinds, "B"), OffsetArray(self.starts),
+                          OffsetArray(self.ends), ChunkedList(self.ids, "I"))
+
+    def flat(self):
+        """Return this table with flat array columns (itself if they already are)."""
+        if not isinstance(self.kinds, ChunkedList):
+            return self
+        return self._with(self.kinds.flat(), self.starts.flat(), self.ends.flat(), self.ids.flat())
+
+    def splice(self, a, b, tokens, shift):
+        """
+        Return a new table with tokens a..b-1 replaced by the given
+        (kind, value, start, end) tuples and every later offset moved by
+        shift. The new table shares the text table and every untouched
+        column chunk with this one, which is unchanged.
+        """
+        table = self.shared()
+        return table._with(
+            table.kinds.splice(a, b, [KIND_CODES[tok[0]] for tok in tokens]),
+            table.starts.splice(a, b, [tok[2] for tok in tokens], shift),
+            table.ends.splice(a, b, [tok[3] for tok in tokens], shift),
+            table.ids.splice(a, b, [table.intern(tok[1]) for tok in tokens]))
+
+    def kind(self, i):
+        return KIND_NAMES[self.kinds[i]]
+
+    def value(self, i):
+        return self.texts[self.ids[i]]
+
+    def span(self, i):
+        return self.starts[i], self.ends[i]
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, i):
+        return KIND_NAMES[self.kinds[i]], self.texts[self.ids[i]]
+
+    def __iter__(self):
+        texts = self.texts
+        for code, idx in zip(self.kinds, self.ids):
+            yield KIND_NAMES[code], texts[idx]
+
+
+def lexical_analysis(code):
+    """
+    Perform lexical analysis on the given code string.
+    Returns:
+        result: dict of categorized tokens
+        errors: list of unrecognized spans with their line numbers
+        ordered_tokens: TokenTable of tokens in order of appearance
+    """
+    return collect_tokens(scan(code), code)
+
+
+def collect_tokens(tokens, code=None, path=None):
+    """
+    Build the (result, errors, ordered_tokens) triple from a token stream.
+    Errors carry a line number when the source text or the path of the
+    file it was streamed from is given, otherwise the character offset
+    reported by the stream.
+    """
+    result = {
+        "Keyword": set(),
+        "Identifier": set(),
+        "Operator": set(),
+        "Constant": set(),
+        "String": set(),
+        "Punctuation": set()
+    }
+
+    unknown = []  # (value, start)
+    ordered_tokens = TokenTable()
+    append = ordered_tokens.append
+
+    for kind, value, start, end in tokens:
+        if kind == "Unknown":
+            unknown.append((value, start))
+            continue
+        result[kind].add(value)
+        append(kind, value, start, end)
+
+    starts = [start for _, start in unknown]
+    if code is not None:
+        lines = [code.count("\n", 0, start) + 1 for start in starts]
+    elif path is not None and unknown:
+        lines = file_lines(path, starts)
+    else:
+        lines = None
+    if lines is None:
+        errors = [f"{value} (offset {start})" for value, start in unknown]
+    else:
+        errors = [f"{value} (line {line})" for (value, _), line in zip(unknown, lines)]
+
+    # Convert sets to sorted lists
+    for k in result:
+        result[k] = sorted(result[k])
+
+    return result, errors, ordered_tokens
+
+
+def display_tokens(result, errors):
+    """Display lexical analysis results"""
+    print("\n--- Lexical Analysis ---")
+    for category, items in result.items():
+        if items:
+            print(f"{category} ({len(items)}): {', '.join(items)}")
+    if errors:
+        print(f"\nInvalid Tokens ({len(errors)}): {', '.join(errors)}")
+
+
+# --- Run independently from a file ---
+if __name__ == "__main__":
+    path = input("Enter the path of the code file: ").strip()
+    if not os.path.exists(path):
+        print(" File not found.")
+    else:
+        result, errors, ordered_tokens = collect_tokens(tokenize_file(path), path=path)
+        display_tokens(result, errors)
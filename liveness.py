@@ -0,0 +1,98 @@
+# liveness.py
+"""
+Live-variable analysis over a CFG, with Python ints as bitsets.
+
+Temps and variables are numbered with bit indices. Per block, `uses`
+holds the names read before any write in the block and `defs` those
+written.
+live_in / live_out are then solved backwards with a worklist:
+
+    live_out[b] = union of live_in[s] over the successors s of b
+    live_in[b]  = uses[b] | (live_out[b] & ~defs[b])
+
+Only names that can be live across a block boundary (read in some block
+before being written there) get a bit; block-local temps never appear in
+the sets. Bitset unions and differences run a machine word at a time, so
+programs with tens of thousands of variables stay cheap to analyze.
+"""
+from collections import deque
+
+
+class Liveness:
+    __slots__ = ("index", "names", "live_in", "live_out")
+
+    def __init__(self, cfg):
+        blocks = cfg.blocks
+
+        # Names read in some block before being written there are the only
+        # ones that can be live across a block boundary; only they get bits.
+        exposed = []
+        self.index = {}  # Temp/Var operand -> bit number
+        self.names = []  # bit number -> operand
+        for block in blocks:
+            written = set()
+            reads = []
+            for instr in block.instrs:
+                for operand in instr.uses():
+                    if operand not in written:
+                        reads.append(operand)
+                        self.bit(operand)
+                if instr.dest is not None:
+                    written.add(instr.dest)
+            exposed.append((reads, written))
+
+        uses = [0] * len(blocks)
+        defs = [0] * len(blocks)
+        index = self.index
+        for b, (reads, written) in enumerate(exposed):
+            use = define = 0
+            for operand in reads:
+                use |= 1 << index[operand]
+            for operand in written:
+                if operand in index:
+                    define |= 1 << index[operand]
+            uses[b] = use
+            defs[b] = define
+
+        live_in = [0] * len(blocks)
+        live_out = [0] * len(blocks)
+        # Seed in postorder so most successors are final before their predecessors.
+        order = cfg.reverse_postorder()[::-1]
+        reached = set(order)
+        order += [b.index for b in blocks if b.index not in reached]
+        work = deque(order)
+        queued = set(order)
+        while work:
+            b = work.popleft()
+            queued.discard(b)
+            out = 0
+            for succ in blocks[b].succs:
+                out |= live_in[succ]
+            live_out[b] = out
+            new_in = uses[b] | (out & ~defs[b])
+            if new_in != live_in[b]:
+                live_in[b] = new_in
+                for pred in blocks[b].preds:
+                    if pred not in queued:
+                        queued.add(pred)
+                        work.append(pred)
+        self.live_in = live_in
+        self.live_out = live_out
+
+    def bit(self, operand):
+        """Bit number of a Temp or Var, assigning the next free one if new."""
+        index = self.index.get(operand)
+        if index is None:
+            index = self.index[operand] = len(self.names)
+            self.names.append(operand)
+        return index
+
+    def decode(self, bits):
+        """Operands whose bits are set, e.g. decode(live_out[b])."""
+        names = self.names
+        found = []
+        while bits:
+            low = bits & -bits
+            found.append(names[low.bit_length() - 1])
+            bits ^= low
+        return found
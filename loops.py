@@ -0,0 +1,477 @@
+# loops.py
+"""
+Natural loops and the loop optimizations built on them.
+
+A back edge is an edge n -> h whose target h dominates n; its natural
+loop is h plus every block that can reach n without passing through h.
+Back edges into the same header form one loop. find_loops() lists loops
+innermost (smallest) first, so code hoisted out of an inner loop lands in
+a block of the outer one and can be hoisted again from there.
+
+Both transformations put code in a preheader: a block placed just before
+the header that every entry into the loop runs through and no back edge
+does.
+
+    hoist_invariants()  loop-invariant code motion: computations whose
+                        operands never change inside the loop run once,
+                        before it
+    reduce_strength()   i * c, with i an int induction variable (updated
+                        once per trip by i = i + k or i = i - k), becomes
+                        a running sum that is bumped by k * c right after
+                        that update
+
+unroll_loops() copies the body of for loops with a constant trip count,
+fully when it fits a code-size budget and partially otherwise.
+"""
+from collections import Counter
+
+from cfg import CFG, BasicBlock, dominates
+from ir import (Instr, Op, ARITHMETIC, COMPARISONS, CONVERSIONS, JUMPS, Temp, Var, Const, Label,
+                INT_MIN, INT_MAX, evaluate, wrap_int)
+from liveness import Liveness
+
+_HOISTABLE = ARITHMETIC | COMPARISONS | CONVERSIONS | {Op.COPY, Op.NEG}
+
+
+class Loop:
+    __slots__ = ("header", "blocks", "latches")
+
+    def __init__(self, header):
+        self.header = header  # block index
+        self.blocks = {header}
+        self.latches = []     # sources of the back edges
+
+    def __repr__(self):
+        return f"<Loop header={self.header} blocks={sorted(self.blocks)}>"
+
+
+def find_loops(cfg, idom=None):
+    """Natural loops of cfg, smallest first."""
+    if idom is None:
+        idom = cfg.dominators()
+    blocks = cfg.blocks
+    rpo_number = {b: i for i, b in enumerate(cfg.reverse_postorder())}
+    loops = {}
+    for block in blocks:
+        n = block.index
+        if idom[n] is None:
+            continue
+        for h in block.succs:
+            # Only a retreating edge (against reverse postorder) can be a back edge.
+            if rpo_number[h] > rpo_number[n] or not dominates(idom, h, n):
+                continue
+            loop = loops.get(h)
+            if loop is None:
+                loop = loops[h] = Loop(h)
+            loop.latches.append(n)
+            work = [n]
+            while work:
+                b = work.pop()
+                if b not in loop.blocks and idom[b] is not None:
+                    loop.blocks.add(b)
+                    work.extend(blocks[b].preds)
+    return sorted(loops.values(), key=lambda loop: len(loop.blocks))
+
+
+def preheader_fits(cfg, loop):
+    """False when a block of the loop falls through into its header, leaving no room for a preheader."""
+    h = loop.header
+    if h - 1 in loop.blocks:
+        last = cfg.blocks[h - 1].terminator
+        return last is not None and last.op != Op.IF_FALSE
+    return True
+
+
+def insert_preheaders(cfg, loops, ctx):
+    """
+    Put an empty block right before each loop's header, send every entry
+    edge through it, and return the new blocks in the order of loops.
+    Every loop must pass preheader_fits(). Block indices shift, so the
+    loops are stale afterwards.
+    """
+    blocks = cfg.blocks
+    preheaders = {}  # header index -> new block
+    for loop in loops:
+        header = blocks[loop.header]
+        instrs = []
+        for p in header.preds:
+            last = blocks[p].terminator
+            if (p in loop.blocks or last is None or last.op not in JUMPS
+                    or last.args[-1] != header.label):
+                continue
+            if not instrs:
+                instrs.append(Instr(Op.LABEL, None, (Label(ctx.new_label()),)))
+            label = instrs[0].args[0]
+            blocks[p].instrs[-1] = Instr(last.op, None, last.args[:-1] + (label,))
+        preheaders[loop.header] = BasicBlock(loop.header, instrs)
+    cfg.blocks = []
+    for block in blocks:
+        if block.index in preheaders:
+            cfg.blocks.append(preheaders[block.index])
+        cfg.blocks.append(block)
+    cfg.link()
+    return [preheaders[loop.header] for loop in loops]
+
+
+def _disjoint(loops, cfg, wanted):
+    """
+    Loops (innermost first) for which wanted(loop) is true, skipping any
+    that overlap one already taken, plus what wanted returned for each.
+    One round can transform all of them on the same analyses.
+    """
+    taken = []
+    claimed = set()
+    for loop in loops:
+        if claimed.isdisjoint(loop.blocks) and preheader_fits(cfg, loop):
+            found = wanted(loop)
+            if found:
+                taken.append((loop, found))
+                claimed |= loop.blocks
+    return taken
+
+
+# --- Loop-invariant code motion ---
+def _dominates_in_loop(idom, a, b, header):
+    """dominates() for two blocks of one loop: the idom walk can stop at the header."""
+    while b != a:
+        if b == header:
+            return False
+        b = idom[b]
+    return True
+
+
+def _can_trap(instr):
+    divisor = instr.args[1] if instr.op == Op.DIV else None
+    return divisor is not None and not (type(divisor) is Const and divisor.value not in (0, -1))
+
+
+def _invariant_code(cfg, loop, live, idom, rpo_number):
+    """
+    Instructions of loop that can run once in its preheader, in an order
+    that keeps each one after the definitions it reads. An instruction
+    qualifies when:
+      - its operands are constants, defined nowhere in the loop, or
+        defined by an instruction that qualifies;
+      - it is the only definition of its target in the loop, and the
+        target's value from before the loop is never read in it;
+      - the target is dead after the loop, or its block dominates every
+        exit (otherwise the loop could leave with the old value);
+      - it cannot trap (a division needs a constant divisor other than
+        0 and -1).
+    """
+    blocks = cfg.blocks
+    body = loop.blocks
+    defs = Counter(instr.dest for b in body for instr in blocks[b].instrs
+                   if instr.dest is not None)
+    exits = [b for b in body if any(s not in body for s in blocks[b].succs)]
+    live_after = 0
+    for b in exits:
+        for s in blocks[b].succs:
+            if s not in body:
+                live_after |= live.live_in[s]
+    live_before = live.live_in[loop.header]
+    covers_exits = {b: all(_dominates_in_loop(idom, b, e, loop.header) for e in exits)
+                    for b in body}
+
+    def is_live(bits, name):
+        bit = live.index.get(name)
+        return bit is not None and bits >> bit & 1
+
+    code = []
+    invariant = set()  # targets of the instructions in code
+    changed = True
+    while changed:
+        changed = False
+        for b in sorted(body, key=rpo_number.__getitem__):
+            for instr in blocks[b].instrs:
+                dest = instr.dest
+                if (instr.op not in _HOISTABLE or dest in invariant or defs[dest] != 1
+                        or _can_trap(instr) or is_live(live_before, dest)):
+                    continue
+                if not covers_exits[b] and is_live(live_after, dest):
+                    continue
+                if all(type(a) is Const or defs[a] == 0 or a in invariant for a in instr.args):
+                    invariant.add(dest)
+                    code.append(instr)
+                    changed = True
+    return code
+
+
+def hoist_invariants(cfg, ctx):
+    """Move loop-invariant computations into preheaders; returns how many moved."""
+    moved = 0
+    while True:
+        idom = cfg.dominators()
+        live = Liveness(cfg)
+        rpo_number = {b: i for i, b in enumerate(cfg.reverse_postorder())}
+        plans = _disjoint(find_loops(cfg, idom), cfg,
+                          lambda loop: _invariant_code(cfg, loop, live, idom, rpo_number))
+        if not plans:
+            return moved
+        bodies = [[cfg.blocks[b] for b in loop.blocks] for loop, _ in plans]
+        preheaders = insert_preheaders(cfg, [loop for loop, _ in plans], ctx)
+        for (_, code), body, preheader in zip(plans, bodies, preheaders):
+            taken = set(map(id, code))
+            for block in body:
+                block.instrs = [instr for instr in block.instrs if id(instr) not in taken]
+            preheader.instrs.extend(code)
+            moved += len(code)
+
+
+# --- Induction-variable strength reduction ---
+def _int_const(operand):
+    return type(operand) is Const and type(operand.value) is int
+
+
+def _induction_variables(cfg, loop, symbols):
+    """{i: (update instr, step)} for int variables whose only update in the loop is i = i +/- k."""
+    defs = {}
+    for b in loop.blocks:
+        for instr in cfg.blocks[b].instrs:
+            if instr.dest is not None:
+                defs.setdefault(instr.dest, []).append(instr)
+    found = {}
+    for name, updates in defs.items():
+        if len(updates) != 1 or type(name) is not Var or symbols.get(name.value) != "int":
+            continue
+        instr = updates[0]
+        if instr.op == Op.ADD or instr.op == Op.SUB:
+            a, b = instr.args
+            if a == name and _int_const(b):
+                found[name] = (instr, b.value if instr.op == Op.ADD else -b.value)
+            elif instr.op == Op.ADD and b == name and _int_const(a):
+                found[name] = (instr, a.value)
+    return found, defs
+
+
+def _scaled(instr, ivs):
+    """(i, c) if instr is t = i * c or t = c * i for an induction variable i, else None."""
+    if instr.op != Op.MUL or instr.dest in ivs:
+        return None
+    a, b = instr.args
+    if a in ivs and _int_const(b):
+        return a, b.value
+    if b in ivs and _int_const(a):
+        return b, a.value
+    return None
+
+
+def _reducible(cfg, loop, symbols):
+    ivs, defs = _induction_variables(cfg, loop, symbols)
+    targets = [instr for b in loop.blocks for instr in cfg.blocks[b].instrs
+               if len(defs.get(instr.dest, ())) == 1 and _scaled(instr, ivs)]
+    return (ivs, targets) if targets else None
+
+
+def reduce_strength(cfg, ctx):
+    """Replace multiplies of int induction variables by additions; returns how many."""
+    reduced = 0
+    while True:
+        plans = _disjoint(find_loops(cfg), cfg,
+                          lambda loop: _reducible(cfg, loop, ctx.symbols))
+        if not plans:
+            return reduced
+        bodies = [[cfg.blocks[b] for b in loop.blocks] for loop, _ in plans]
+        preheaders = insert_preheaders(cfg, [loop for loop, _ in plans], ctx)
+        for (_, (ivs, targets)), body, preheader in zip(plans, bodies, preheaders):
+            sums = {}  # (i, c) -> temp holding i * c
+            for instr in targets:
+                key = _scaled(instr, ivs)
+                if key not in sums:
+                    sums[key] = Temp(ctx.new_temp())
+            rewritten = {id(instr): Instr(Op.COPY, instr.dest, (sums[_scaled(instr, ivs)],))
+                         for instr in targets}
+            for block in body:
+                instrs = []
+                for instr in block.instrs:
+                    instrs.append(rewritten.get(id(instr), instr))
+                    for (i, c), total in sums.items():
+                        update, step = ivs[i]
+                        if instr is update:
+                            instrs.append(Instr(Op.ADD, total, (total, Const(wrap_int(step * c)))))
+                block.instrs = instrs
+            for (i, c), total in sums.items():
+                preheader.instrs.append(Instr(Op.MUL, total, (i, Const(c))))
+            reduced += len(targets)
+
+
+# --- Unrolling of counted loops ---
+_FLIPPED = {Op.LT: Op.GT, Op.GT: Op.LT, Op.LE: Op.GE, Op.GE: Op.LE, Op.EQ: Op.EQ, Op.NE: Op.NE}
+
+
+def _trip_count(op, start, bound, step):
+    """
+    How often a loop runs whose header tests i <op> bound with i = start,
+    start + step, ...; None when unknown or when i would overflow.
+    """
+    if not evaluate(op, start, bound):
+        return 0
+    if op == Op.LT and step > 0:
+        trips = -(-(bound - start) // step)
+    elif op == Op.LE and step > 0:
+        trips = (bound - start) // step + 1
+    elif op == Op.GT and step < 0:
+        trips = -(-(start - bound) // -step)
+    elif op == Op.GE and step < 0:
+        trips = (start - bound) // -step + 1
+    elif op == Op.NE and step != 0 and (bound - start) % step == 0:
+        trips = (bound - start) // step
+    elif op == Op.EQ and step != 0:
+        trips = 1
+    else:
+        return None
+    return trips if trips > 0 and INT_MIN <= start + trips * step <= INT_MAX else None
+
+
+def _counted_loop(cfg, loop, live, idom, ctx):
+    """
+    (trip count, last body block) when loop has the shape a for loop over
+    constant bounds lowers to, else None:
+
+        LABEL Lh                      header: only the test
+        t = i <op> c
+        IF_FALSE t GOTO Lexit         the loop's only exit
+        ...body...                    blocks right after the header
+        GOTO Lh                       the only back edge, from the last one
+
+    where i is an int induction variable updated on every trip and set to
+    a constant just before the loop.
+    """
+    blocks = cfg.blocks
+    h = loop.header
+    last = h + len(loop.blocks) - 1
+    if loop.latches != [last] or not all(b in loop.blocks for b in range(h, last + 1)):
+        return None
+    header = blocks[h]
+    code = header.instrs[1:]
+    if header.label is None or len(code) != 2 or code[0].op not in COMPARISONS:
+        return None
+    if header.label in cfg.unrolled:
+        return None
+    test, branch = code
+    latch = blocks[last].terminator
+    if (branch.op != Op.IF_FALSE or branch.args[0] != test.dest
+            or latch is None or latch.op != Op.GOTO):
+        return None
+    if any(s not in loop.blocks for b in range(h + 1, last + 1) for s in blocks[b].succs):
+        return None
+    bit = live.index.get(test.dest)
+    if bit is not None and live.live_in[cfg.labels[branch.args[1]]] >> bit & 1:
+        return None
+
+    ivs, _ = _induction_variables(cfg, loop, ctx.symbols)
+    op, (a, b) = test.op, test.args
+    if a in ivs and _int_const(b):
+        i, bound = a, b.value
+    elif b in ivs and _int_const(a):
+        i, bound, op = b, a.value, _FLIPPED[op]
+    else:
+        return None
+    update, step = ivs[i]
+    update_block = next(x for x in range(h, last + 1) if update in blocks[x].instrs)
+    if not dominates(idom, update_block, last):
+        return None  # not updated on every trip
+
+    entries = [p for p in header.preds if p not in loop.blocks]
+    if len(entries) != 1:
+        return None
+    start = None
+    for instr in reversed(blocks[entries[0]].instrs):
+        if instr.dest == i:
+            if instr.op == Op.COPY and _int_const(instr.args[0]):
+                start = instr.args[0].value
+            break
+    if start is None:
+        return None
+    trips = _trip_count(op, start, bound, step)
+    return None if trips is None else (trips, last)
+
+
+def _copy_body(blocks, first, last, carried, ctx, rename):
+    """
+    The instructions of blocks first..last without the closing GOTO. With
+    rename, the copy's labels and the temps it defines (other than those
+    in carried, live across trips) get fresh names, so each temp keeps a
+    single definition.
+    """
+    fresh = {}
+    if rename:
+        for block in blocks[first:last + 1]:
+            for instr in block.instrs:
+                if instr.op == Op.LABEL:
+                    fresh[instr.args[0]] = Label(ctx.new_label())
+                elif type(instr.dest) is Temp and instr.dest not in carried:
+                    fresh[instr.dest] = Temp(ctx.new_temp())
+    code = [Instr(instr.op, fresh.get(instr.dest, instr.dest),
+                  tuple(fresh.get(a, a) for a in instr.args))
+            for block in blocks[first:last + 1] for instr in block.instrs]
+    code.pop()
+    return code
+
+
+def unroll_loops(cfg, ctx):
+    """
+    Unroll counted loops (see _counted_loop); returns how many were unrolled.
+
+    A loop of n trips whose n body copies fit in the code-size budget
+    (ctx option "unroll_budget", in instructions) becomes straight-line
+    code. Otherwise the body is repeated f times per test, f at most the
+    "unroll_factor" option and the f copies plus n % f peeled ones still
+    fitting the budget; the n % f copies run first, so every later test
+    starts a full group of f trips. Partially unrolled loops are recorded
+    in cfg.unrolled and left alone from then on; the mark lives as long
+    as the CFG, so other code compiled with the same ctx is unaffected.
+    """
+    factor = ctx.option("unroll_factor", 4)
+    budget = ctx.option("unroll_budget", 64)
+    unrolled = 0
+    while True:
+        idom = cfg.dominators()
+        live = Liveness(cfg)
+        blocks = cfg.blocks
+        regions = {}  # header index -> (last body block, replacement code)
+        for loop, (trips, last) in _disjoint(
+                find_loops(cfg, idom), cfg,
+                lambda loop: _counted_loop(cfg, loop, live, idom, ctx)):
+            h = loop.header
+            header = blocks[h]
+            size = sum(instr.op != Op.LABEL for b in range(h + 1, last + 1)
+                       for instr in blocks[b].instrs) - 1
+            carried = set(live.decode(live.live_in[h]))
+            label, test, branch = header.instrs
+            if trips * size <= budget:
+                code = [label]
+                for n in range(trips):
+                    code += _copy_body(blocks, h + 1, last, carried, ctx, n > 0)
+                code.append(Instr(Op.GOTO, None, (branch.args[1],)))
+            else:
+                f = next((f for f in range(min(factor, trips), 1, -1)
+                          if (f + trips % f) * size <= budget), None)
+                if f is None:
+                    continue
+                code = [label]
+                for _ in range(trips % f):
+                    code += _copy_body(blocks, h + 1, last, carried, ctx, True)
+                if trips % f:
+                    label = Instr(Op.LABEL, None, (Label(ctx.new_label()),))
+                    code.append(label)
+                code += [test, branch]
+                for n in range(f):
+                    code += _copy_body(blocks, h + 1, last, carried, ctx, n > 0)
+                code.append(Instr(Op.GOTO, None, label.args))
+                cfg.unrolled.add(label.args[0])
+            regions[h] = (last, code)
+        if not regions:
+            return unrolled
+        code = []
+        b = 0
+        while b < len(blocks):
+            if b in regions:
+                b, region = regions[b]
+                code += region
+            else:
+                code += blocks[b].instrs
+            b += 1
+        cfg.blocks = CFG(code).blocks
+        cfg.link()
+        unrolled += len(regions)
@@ -1,67 +1,86 @@
-import os
-import re
-from lexer import lexical_analysis, display_tokens
-from parser import parse
-from tac_generator import generate_tac_from_node, display_tac
-from ac_generator import generate_assembly, display_assembly
-from optimizer import optimize_tac, display_optimization   # <-- added import
-
-def preprocess_code(lines):
-    clean_lines = []
-    for raw_line in lines:
-        line = raw_line.strip()
-        if not line:
-            continue
-        if line.startswith(("if", "else", "for", "while", "printf", "return", "{", "}")):
-            print(f"; Unhandled TAC: ; Control structure detected: {line}")
-            continue
-        line = re.sub(r'(\w+)\+\+', r'\1 = \1 + 1', line)
-        line = re.sub(r'(\w+)\-\-', r'\1 = \1 - 1', line)
-        if line.startswith("int ") and "=" not in line:
-            continue
-        line = line.rstrip(";")
-        clean_lines.append(line)
-    return clean_lines
-
-
-def main():
-    path = input("Enter the path of the C source file: ").strip()
-    if not os.path.exists(path):
-        print("File not found!!!")
-        return
-
-    with open(path, "r") as f:
-        code = f.read()
-    print("File loaded successfully.")
-
-    # --- Phase 1: Lexical Analysis ---
-    result, errors, ordered_tokens = lexical_analysis(code)
-    display_tokens(result, errors)
-
-    # --- Phase 2: Parsing ---
-    tree, parse_errors = parse(ordered_tokens)
-    print("\n--- Parsing & Parse Tree ---")
-    if parse_errors:
-        for e in parse_errors:
-            print(e)
-    else:
-        tree.display()
-
-    # --- Phase 3: TAC Generation ---
-    print("\n--- Generating Three Address Code (TAC) ---")
-    all_tac = generate_tac_from_node(tree)
-    display_tac(all_tac)
-
-    # --- Phase 4: Optimization ---
-    print("\n--- Optimizing TAC ---")
-    optimized_tac = optimize_tac(all_tac)
-    display_optimization(all_tac, optimized_tac)
-
-    # --- Phase 5: Assembly Generation ---
-    print("\n--- Generating Assembly Code (from Optimized TAC) ---")
-    assembly = generate_assembly(optimized_tac)
-    display_assembly(assembly)
-
-
-if __name__ == "__main__":
-    main()
+import os
+import re
+import sys
+from lexer import tokenize_file, collect_tokens, display_tokens
+from parser import parse
+from tac_generator import generate_tac_from_node, display_tac
+from ac_generator import allocate, generate_assembly, display_assembly
+from regalloc import display_allocation
+from vm import compile_bytecode, run, display_execution, VMError
+from optimizer import PassManager, display_optimization
+from context import CompilationContext
+
+def preprocess_code(lines):
+    clean_lines = []
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+        if line.startswith(("if", "else", "for", "while", "printf", "return", "{", "}")):
+            print(f"; Unhandled TAC: ; Control structure detected: {line}")
+            continue
+        line = re.sub(r'(\w+)\+\+', r'\1 = \1 + 1', line)
+        line = re.sub(r'(\w+)\-\-', r'\1 = \1 - 1', line)
+        if line.startswith("int ") and "=" not in line:
+            continue
+        line = line.rstrip(";")
+        clean_lines.append(line)
+    return clean_lines
+
+
+def main():
+    path = input("Enter the path of the C source file: ").strip()
+    if not os.path.exists(path):
+        print("File not found!!!")
+        return
+
+    print("File loaded successfully.")
+    # -O0 .. -O3 on the command line picks the optimization level (default -O3).
+    levels = [int(arg[2:]) for arg in sys.argv[1:] if re.fullmatch(r"-O[0-3]", arg)]
+    # --registers=N sets the size of the register file (default 8).
+    registers = [int(arg[12:]) for arg in sys.argv[1:] if re.fullmatch(r"--registers=\d+", arg)]
+    ctx = CompilationContext(opt_level=levels[-1] if levels else 3,
+                             registers=registers[-1] if registers else 8)
+
+    # --- Phase 1: Lexical Analysis (streamed from a memory map) ---
+    result, errors, ordered_tokens = collect_tokens(tokenize_file(path, ctx=ctx), path=path)
+    display_tokens(result, errors)
+
+    # --- Phase 2: Parsing ---
+    tree, parse_errors = parse(ordered_tokens, ctx=ctx)
+    print("\n--- Parsing & Parse Tree ---")
+    if parse_errors:
+        for e in parse_errors:
+            print(e)
+    else:
+        tree.display()
+
+    # --- Phase 3: TAC Generation ---
+    print("\n--- Generating Three Address Code (TAC) ---")
+    all_tac = generate_tac_from_node(tree, ctx=ctx)
+    display_tac(all_tac)
+
+    # --- Phase 4: Optimization ---
+    print("\n--- Optimizing TAC ---")
+    manager = PassManager(ctx)
+    optimized_tac = manager.optimize(all_tac)
+    display_optimization(all_tac, optimized_tac)
+    manager.display_stats()
+
+    # --- Phase 5: Assembly Generation ---
+    print("\n--- Generating Assembly Code (from Optimized TAC) ---")
+    allocation = allocate(optimized_tac, ctx)
+    display_allocation(allocation, tree.function.ident)
+    assembly = generate_assembly(optimized_tac, ctx, allocation)
+    display_assembly(assembly)
+
+    # --- Phase 6: Execution on the bytecode VM ---
+    print("\n--- Running Optimized TAC ---")
+    try:
+        display_execution(run(compile_bytecode(optimized_tac)))
+    except VMError as e:
+        print(f"Runtime error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,107 +1,711 @@
-import re
-
-def optimize_tac(tac_lines):
-    optimized = []
-    consts = {}  
-
-    # Pass 1: Constant folding + propagation
-    for line in tac_lines:
-        line = line.strip()
-        if not line:
-            continue
-
-        # Match arithmetic operations: t1 = 3 + 4
-        m = re.match(r"(t\d+)\s*=\s*([0-9.]+)\s*([\+\-\*/])\s*([0-9.]+)", line)
-        if m:
-            var, a, op, b = m.groups()
-            try:
-                val = eval(f"{a}{op}{b}")
-            except Exception:
-                val = f"{a}{op}{b}"
-            consts[var] = str(val)
-            optimized.append(f"{var} = {val}")
-            continue
-
-        # Replace known constants in expressions
-        for c, v in consts.items():
-            line = re.sub(rf"\b{c}\b", v, line)
-
-        # Propagate direct assignments (e.g., t2 = 5)
-        assign_match = re.match(r"(t\d+)\s*=\s*([0-9.]+)$", line)
-        if assign_match:
-            consts[assign_match.group(1)] = assign_match.group(2)
-
-        optimized.append(line)
-
-    # Pass 2: Dead code elimination (remove temps never used)
-    used = set()
-    for line in optimized:
-        # Find all temps used in expressions or conditions
-        for t in re.findall(r"\bt\d+\b", line):
-            used.add(t)
-
-    final = []
-    for line in optimized:
-        assign_match = re.match(r"(t\d+)\s*=", line)
-        if assign_match:
-            lhs = assign_match.group(1)
-            if lhs not in used:
-                continue  # remove unused temp
-        final.append(line)
-
-    # Pass 3: Remove unused labels
-    labels = set(re.findall(r"\bL\d+\b", " ".join(final)))
-    cleaned = []
-    for line in final:
-        label_match = re.match(r"LABEL\s+(L\d+)", line)
-        if label_match and label_match.group(1) not in labels:
-            continue
-        cleaned.append(line)
-
-    # Pass 4: Remove redundant jumps (GOTO immediately before its label)
-    compacted = []
-    skip_next_label = None
-    for i, line in enumerate(cleaned):
-        if line.startswith("GOTO"):
-            target = re.findall(r"L\d+", line)
-            if target and i + 1 < len(cleaned):
-                next_line = cleaned[i + 1]
-                if next_line.strip() == f"LABEL {target[0]}":
-                    # redundant jump
-                    continue
-        compacted.append(line)
-
-    return compacted
-
-
-def display_optimization(before, after):
-    print("\n===== OPTIMIZATION =====")
-    print("Before:")
-    for i, line in enumerate(before, 1):
-        print(f"({i}) {line}")
-    print("\nAfter:")
-    for i, line in enumerate(after, 1):
-        print(f"({i}) {line}")
-    print("========================\n")
-
-
-if __name__ == "__main__":
-    import os
-    from tac_generator import generate_tac_from_node, display_tac
-    from parser import parse
-    from lexer import lexical_analysis
-
-    file_path = input("Enter the path of the C source file: ").strip()
-    if not os.path.exists(file_path):
-        print(f"File '{file_path}' not found!")
-        exit(1)
-
-    with open(file_path, "r") as f:
-        code = f.read()
-
-    _, _, tokens = lexical_analysis(code)
-    parse_tree, _ = parse(tokens)
-    tac = generate_tac_from_node(parse_tree)
-
-    optimized_tac = optimize_tac(tac)
-    display_optimization(tac, optimized_tac)
+import gc
+from collections import Counter
+from itertools import count
+from time import perf_counter
+
+from ir import Instr, Op, ARITHMETIC, COMPARISONS, CONVERSIONS, UNARY, JUMPS, Temp, Const, Label, evaluate
+from cfg import CFG
+from liveness import Liveness
+from ssa import to_ssa, from_ssa, sccp, declared_types
+from loops import unroll_loops, hoist_invariants, reduce_strength
+from algebra import simplify_algebra, converting_copies
+from context import CompilationContext
+
+
+def optimize_tac(tac, ctx=None, level=None):
+    """Optimize a list of ir.Instr at -O<level> (default: ctx option opt_level, else 3) and return the new list."""
+    if ctx is None:
+        ctx = CompilationContext()
+        for instr in tac:
+            for operand in (instr.dest, *instr.args):
+                if type(operand) is Temp or type(operand) is Label:
+                    ctx.reserve(operand.value)
+    return PassManager(ctx, level).optimize(tac)
+
+
+# Pass 1: Constant folding + propagation, one basic block at a time
+def fold_constants(cfg, ctx=None):
+    """Returns the number of instructions rewritten."""
+    folded = 0
+    for block in cfg.blocks:
+        consts = {}  # temp -> Const, valid until the end of this block
+        instrs = block.instrs
+        for i, instr in enumerate(instrs):
+            op, dest, args = instr.op, instr.dest, instr.args
+
+            # Replace known constants in operands
+            if consts and any(a in consts for a in args):
+                args = tuple(consts.get(a, a) for a in args)
+                instr = Instr(op, dest, args)
+
+            # Fold arithmetic on two constants: t1 = 3 + 4
+            if (op in ARITHMETIC and type(dest) is Temp
+                    and type(args[0]) is Const and type(args[1]) is Const):
+                value = evaluate(op, args[0].value, args[1].value)
+                if value is not None:
+                    instr = Instr(Op.COPY, dest, (Const(value),))
+
+            # Fold negated constants: t1 = -5
+            elif op == Op.NEG and type(args[0]) is Const:
+                value = evaluate(Op.NEG, args[0].value)
+                instr = Instr(Op.COPY, dest, (Const(value),))
+
+            # Fold conversions of constants: t1 = (int) 2.5
+            elif op in CONVERSIONS and type(args[0]) is Const:
+                value = evaluate(op, args[0].value)
+                if value is not None:
+                    instr = Instr(Op.COPY, dest, (Const(value),))
+
+            # Propagate direct assignments (e.g., t2 = 5)
+            if dest is not None:
+                if instr.op == Op.COPY and type(dest) is Temp and type(instr.args[0]) is Const:
+                    consts[dest] = instr.args[0]
+                else:
+                    consts.pop(dest, None)
+
+            if instr is not instrs[i]:
+                instrs[i] = instr
+                folded += 1
+    return folded
+
+
+# Pass 2: Sparse conditional constant propagation on SSA form
+def propagate_constants(cfg, ctx=None):
+    """Resolves constant branches and deletes the arms they never take; returns rewrites made."""
+    origin = to_ssa(cfg)
+    rewrites = sccp(cfg, declared_types(origin, ctx.symbols if ctx else {}))
+    from_ssa(cfg, origin)
+    return rewrites
+
+
+# Pass 3: Local value numbering (common subexpressions within a block)
+_COMMUTATIVE = frozenset((Op.ADD, Op.MUL, Op.EQ, Op.NE))
+_MIRRORED = {Op.GT: Op.LT, Op.GE: Op.LE}  # a > b is b < a
+
+
+def number_values(cfg, ctx=None):
+    """
+    Reuse a value already computed earlier in the same block instead of
+    computing it again; returns how many computations were removed.
+    Commutative operands are ordered by value number and > / >= are
+    mirrored to < / <=, so b + a matches a + b and b > a matches a < b.
+    A redundant temp that is not live out of its block is dropped and its
+    uses read the earlier temp; anything else becomes a copy. If the
+    earlier temp is assigned again further down, the dropped temp gets its
+    copy back just before that assignment.
+    """
+    live_sets = Liveness(cfg)
+    removed = 0
+    for block in cfg.blocks:
+        live_out = live_sets.live_out[block.index]
+        new_number = count().__next__
+        numbers = {}    # operand (or constant key) -> value number
+        available = {}  # (op, value numbers...) -> (value number, operand holding it)
+        alias = {}      # dropped temp -> temp holding its value
+        aliased_by = {}  # holder temp -> dropped temps reading it
+
+        def number(operand):
+            key = (type(operand.value), operand.value) if type(operand) is Const else operand
+            vn = numbers.get(key)
+            if vn is None:
+                vn = numbers[key] = new_number()
+            return vn
+
+        instrs = []
+        for instr in block.instrs:
+            op, dest, args = instr.op, instr.dest, instr.args
+            if alias and any(a in alias for a in args):
+                args = tuple(alias.get(a, a) for a in args)
+                instr = Instr(op, dest, args)
+            if dest is None:
+                instrs.append(instr)
+                continue
+            if dest in aliased_by:
+                for dropped in aliased_by.pop(dest):
+                    if alias.get(dropped) == dest:
+                        del alias[dropped]
+                        instrs.append(Instr(Op.COPY, dropped, (dest,)))
+            alias.pop(dest, None)
+
+            if op in ARITHMETIC or op in COMPARISONS or op in UNARY:
+                vns = [number(a) for a in args]
+                if op in _MIRRORED:
+                    op = _MIRRORED[op]
+                    vns.reverse()
+                elif op in _COMMUTATIVE and vns[0] > vns[1]:
+                    vns.reverse()
+                key = (op, *vns)
+                hit = available.get(key)
+                if hit is not None and numbers.get(hit[1]) == hit[0]:
+                    vn, holder = hit
+                    removed += 1
+                    bit = live_sets.index.get(dest)
+                    if (type(dest) is Temp and type(holder) is Temp
+                            and (bit is None or not live_out >> bit & 1)):
+                        alias[dest] = holder
+                        aliased_by.setdefault(holder, []).append(dest)
+                        numbers[dest] = vn
+                        continue
+                    instr = Instr(Op.COPY, dest, (holder,))
+                else:
+                    vn = new_number()
+                    available[key] = (vn, dest)
+            elif op == Op.COPY:
+                vn = number(args[0])
+            else:
+                vn = new_number()
+            numbers[dest] = vn
+            instrs.append(instr)
+        block.instrs = instrs
+    return removed
+
+
+# Pass 4: Global copy propagation (available copies, as bitsets)
+def propagate_copies(cfg, ctx=None):
+    """
+    Replace uses of x with y wherever the copy x = y reaches along every
+    path with neither x nor y redefined since. A copy between an int and
+    a float name is a conversion and is not propagated. Returns the number
+    of operands replaced.
+
+    Only copies whose dest can be read in another block (or again in its
+    own block, around a loop) take part in the dataflow, as bits. The
+    rest matter only until the end of their block and are tracked there
+    in a dict, which keeps the bitsets as narrow as the few copies that
+    really cross blocks.
+    """
+    blocks = cfg.blocks
+    converts = converting_copies(cfg, ctx.symbols if ctx else {})
+    read_at = {}  # name -> {block index: first instruction index reading it}
+    for block in blocks:
+        for i, instr in enumerate(block.instrs):
+            for a in instr.uses():
+                read_at.setdefault(a, {}).setdefault(block.index, i)
+
+    copies = []     # global copy number -> (dest, source)
+    copy_at = {}    # (block index, instr index) of a global COPY -> copy number
+    local_at = {}   # (block index, instr index) of a block-local COPY -> its source
+    mentions = {}   # name -> mask of global copies reading or writing it
+    by_dest = {}    # name -> global copy numbers that assign it
+    for block in blocks:
+        for i, instr in enumerate(block.instrs):
+            if instr.op != Op.COPY or instr.dest == instr.args[0]:
+                continue
+            dest, source = instr.dest, instr.args[0]
+            if converts(dest, source):
+                continue
+            reads = read_at.get(dest, {})
+            if all(b == block.index and first > i for b, first in reads.items()):
+                local_at[block.index, i] = source
+                continue
+            n = len(copies)
+            copies.append((dest, source))
+            copy_at[block.index, i] = n
+            mentions[dest] = mentions.get(dest, 0) | 1 << n
+            if type(source) is not Const:
+                mentions[source] = mentions.get(source, 0) | 1 << n
+            by_dest.setdefault(dest, []).append(n)
+    if not copies and not local_at:
+        return 0
+
+    # Per block: global copies still available at its end, and those it kills.
+    gen = [0] * len(blocks)
+    kill = [0] * len(blocks)
+    for block in blocks:
+        g = k = 0
+        for i, instr in enumerate(block.instrs):
+            if instr.dest is not None:
+                mask = mentions.get(instr.dest, 0)
+                if mask:
+                    g &= ~mask
+                    k |= mask
+                n = copy_at.get((block.index, i))
+                if n is not None:
+                    g |= 1 << n
+        gen[block.index] = g
+        kill[block.index] = k
+
+    # Forward "must" dataflow: in[b] is the intersection of out[p] over predecessors.
+    everything = (1 << len(copies)) - 1
+    avail_in = [everything] * len(blocks)
+    avail_out = [everything] * len(blocks)
+    order = cfg.reverse_postorder()
+    if order:
+        avail_in[0] = 0
+    changed = True
+    while changed:
+        changed = False
+        for b in order:
+            if b != 0:
+                avail = everything
+                for pred in blocks[b].preds:
+                    avail &= avail_out[pred]
+                avail_in[b] = avail
+            out = avail_in[b] & ~kill[b] | gen[b]
+            if out != avail_out[b]:
+                avail_out[b] = out
+                changed = True
+
+    # Rewrite each reachable block, replaying the transfer function as we go.
+    replaced = 0
+    for b in order:
+        block = blocks[b]
+        avail = avail_in[b]
+        local = {}    # dest -> source of the block-local copies available here
+        sources = {}  # source -> dests of those copies
+        for i, instr in enumerate(block.instrs):
+            if (avail or local) and instr.op != Op.PHI:
+                new_args = list(instr.args)
+                for k, a in enumerate(new_args):
+                    if a in local:
+                        new_args[k] = local[a]
+                        replaced += 1
+                        continue
+                    for n in by_dest.get(a, ()):
+                        if avail >> n & 1:
+                            new_args[k] = copies[n][1]
+                            replaced += 1
+                            break
+                if new_args != list(instr.args):
+                    block.instrs[i] = instr = Instr(instr.op, instr.dest, tuple(new_args))
+            dest = instr.dest
+            if dest is not None:
+                mask = mentions.get(dest, 0)
+                if mask:
+                    avail &= ~mask
+                if local:
+                    if dest in local:
+                        sources[local.pop(dest)].discard(dest)
+                    for d in sources.pop(dest, ()):
+                        del local[d]
+                n = copy_at.get((b, i))
+                if n is not None:
+                    avail |= 1 << n
+                elif (b, i) in local_at:
+                    source = local_at[b, i]
+                    local[dest] = source
+                    sources.setdefault(source, set()).add(dest)
+    return replaced
+
+
+# Pass 5: Coalesce single-use temps into the variable they are copied to
+def coalesce_temps(cfg, ctx=None):
+    """
+    Turn "t = a + b; x = t" into "x = a + b" when the copy is the temp's
+    only use, sits in the same block, nothing in between touches x, and
+    x has the type of t (otherwise the copy converts it). Returns the
+    number of copies removed.
+    """
+    converts = converting_copies(cfg, ctx.symbols if ctx else {})
+    uses = Counter(a for block in cfg.blocks for instr in block.instrs
+                   for a in instr.args if type(a) is Temp)
+    coalesced = 0
+    for block in cfg.blocks:
+        out = []
+        defined_at = {}  # temp -> index of its definition in out
+        for instr in block.instrs:
+            source = instr.args[0] if instr.op == Op.COPY else None
+            if (type(source) is Temp and uses[source] == 1 and source in defined_at
+                    and not converts(instr.dest, source)):
+                i = defined_at.pop(source)
+                dest = instr.dest
+                if not any(dest == d.dest or dest in d.args for d in out[i + 1:]):
+                    definition = out[i]
+                    out[i] = Instr(definition.op, dest, definition.args)
+                    coalesced += 1
+                    continue
+            if type(instr.dest) is Temp and instr.op != Op.PHI:
+                defined_at[instr.dest] = len(out)
+            out.append(instr)
+        block.instrs = out
+    return coalesced
+
+
+# Pass 6: Dead-store elimination driven by liveness, repeated until nothing changes
+def remove_dead_stores(cfg, ctx=None):
+    """Delete assignments whose target is dead afterwards; returns how many."""
+    removed = 0
+    while True:
+        live_sets = Liveness(cfg)
+        bit = live_sets.index
+        before = removed
+        for block in cfg.blocks:
+            live = live_sets.live_out[block.index]
+            local_live = set()  # live names without a bit (never live across blocks)
+            kept = []
+            for instr in reversed(block.instrs):
+                dest = instr.dest
+                if dest is not None:
+                    index = bit.get(dest)
+                    if index is None:
+                        if dest not in local_live:
+                            removed += 1
+                            continue
+                        local_live.discard(dest)
+                    else:
+                        mask = 1 << index
+                        if not live & mask:
+                            removed += 1
+                            continue
+                        live &= ~mask
+                for operand in instr.uses():
+                    index = bit.get(operand)
+                    if index is None:
+                        local_live.add(operand)
+                    else:
+                        live |= 1 << index
+                kept.append(instr)
+            kept.reverse()
+            block.instrs = kept
+        if removed == before:
+            return removed
+
+
+# Pass 7: Remove redundant jumps (GOTO to the block that follows anyway)
+def remove_redundant_jumps(cfg, ctx=None):
+    removed = 0
+    blocks = cfg.blocks
+    for block in blocks[:-1]:
+        last = block.terminator
+        if last is not None and last.op == Op.GOTO:
+            if cfg.labels.get(last.args[0]) == block.index + 1:
+                del block.instrs[-1]
+                removed += 1
+    if removed:
+        cfg.link()
+    return removed
+
+
+# Pass 8: Remove unused labels
+def remove_unused_labels(cfg, ctx=None):
+    labels = set()
+    for block in cfg.blocks:
+        last = block.terminator
+        if last is not None and last.op in JUMPS:
+            labels.add(last.args[-1])
+    removed = 0
+    for block in cfg.blocks:
+        if block.label is not None and block.label not in labels:
+            del block.instrs[0]
+            removed += 1
+    if removed:
+        cfg.link()
+    return removed
+
+
+# Pass 9: Control-flow simplification and block layout
+def simplify_cfg(cfg, ctx):
+    """
+    Thread jumps through blocks that only jump (or only return), drop
+    branches whose two ways meet, delete unreachable blocks, merge a block
+    into its only predecessor, then lay the blocks out so that each one is
+    followed by its preferred successor and needs no GOTO.
+    Returns the number of blocks and jumps removed.
+    """
+    blocks = cfg.blocks
+    if not blocks:
+        return 0
+    jumps_before = sum(instr.op in JUMPS for block in blocks for instr in block.instrs)
+    by_label = {block.label: block for block in blocks if block.label is not None}
+
+    # Each block becomes a body plus an exit, with every fall-through made explicit:
+    #   ("goto", block or None)   None is the end of the function
+    #   ("branch", cond, target, fallthrough)   IF_FALSE cond GOTO target
+    #   ("return", instr)
+    body = {}
+    exits = {}
+    for block, following in zip(blocks, blocks[1:] + [None]):
+        instrs = block.instrs[1:] if block.label is not None else block.instrs[:]
+        last = block.terminator
+        if last is not None:
+            instrs.pop()
+        body[block] = instrs
+        if last is None:
+            exits[block] = ("goto", following)
+        elif last.op == Op.GOTO:
+            exits[block] = ("goto", by_label[last.args[0]])
+        elif last.op == Op.RETURN:
+            exits[block] = ("return", last)
+        else:
+            exits[block] = ("branch", last.args[0], by_label[last.args[1]], following)
+
+    resolved = {}  # block that only jumps -> where it ends up
+
+    def forward(block):
+        """
+        Where a jump to block really ends up, skipping blocks that only jump.
+        Every block on the way is resolved to the same place (path
+        compression), so each chain is walked once in all.
+        """
+        path = {}  # block -> position on this walk
+        while block is not None and not body[block] and exits[block][0] == "goto":
+            if block in resolved:
+                block = resolved[block]
+                break
+            if block in path:
+                # A cycle of empty blocks: each of its blocks stays where it is
+                cycle = list(path)[path[block]:]
+                for looping in cycle:
+                    resolved[looping] = looping
+                    del path[looping]
+                break
+            path[block] = len(path)
+            block = exits[block][1]
+        for waypoint in path:
+            resolved[waypoint] = block
+        return block
+
+    # --- Jump threading ---
+    for block in blocks:
+        exit = exits[block]
+        if exit[0] == "goto":
+            target = forward(exit[1])
+            if target is not None and not body[target] and exits[target][0] == "return":
+                exit = ("return", Instr(Op.RETURN, None, exits[target][1].args))  # return right here
+            else:
+                exit = ("goto", target)
+        elif exit[0] == "branch":
+            cond, target, fall = exit[1], forward(exit[2]), forward(exit[3])
+            if target is fall:
+                exit = ("goto", fall)
+            elif type(cond) is Const:
+                exit = ("goto", target if cond.value == 0 else fall)
+            else:
+                exit = ("branch", cond, target, fall)
+        exits[block] = exit
+
+    def successors(block):
+        exit = exits[block]
+        if exit[0] == "goto":
+            return [exit[1]] if exit[1] is not None else []
+        if exit[0] == "branch":
+            return [b for b in exit[2:] if b is not None]
+        return []
+
+    # --- Unreachable blocks ---
+    entry = blocks[0]
+    reached = {entry}
+    work = [entry]
+    while work:
+        for succ in successors(work.pop()):
+            if succ not in reached:
+                reached.add(succ)
+                work.append(succ)
+    live_blocks = [block for block in blocks if block in reached]
+
+    # --- Merge a block into its only predecessor ---
+    preds = Counter(succ for block in live_blocks for succ in successors(block))
+    merged = set()
+    for block in live_blocks:
+        if block in merged:
+            continue
+        while True:
+            exit = exits[block]
+            succ = exit[1] if exit[0] == "goto" else None
+            if succ is None or succ is block or succ is entry or preds[succ] != 1:
+                break
+            body[block] = body[block] + body[succ]
+            exits[block] = exits[succ]
+            merged.add(succ)
+    live_blocks = [block for block in live_blocks if block not in merged]
+
+    # --- Layout: follow each block with its preferred successor ---
+    order = []
+    placed = set()
+    for block in live_blocks:
+        while block is not None and block not in placed:
+            placed.add(block)
+            order.append(block)
+            exit = exits[block]
+            block = exit[1] if exit[0] == "goto" else exit[3] if exit[0] == "branch" else None
+
+    # --- Emit, with labels only where something still jumps ---
+    following = dict(zip(order, order[1:] + [None]))
+    jumps = []  # (block, its exit as a list of (op, cond, target) jumps)
+    targets = {}  # in order of first jump, so fresh labels are numbered the same every run
+    for block in order:
+        exit = exits[block]
+        code = []
+        if exit[0] == "goto" and exit[1] is not following[block]:
+            code.append((Op.GOTO, None, exit[1]))
+        elif exit[0] == "branch":
+            code.append((Op.IF_FALSE, exit[1], exit[2]))
+            if exit[3] is not following[block]:
+                code.append((Op.GOTO, None, exit[3]))
+        targets.update(dict.fromkeys(target for _, _, target in code))
+        jumps.append((block, code))
+
+    labels = {}
+    for target in targets:
+        if target is None or target.label is None:
+            labels[target] = Label(ctx.new_label())
+        else:
+            labels[target] = target.label
+    tac = []
+    for block, code in jumps:
+        if block in labels:
+            tac.append(Instr(Op.LABEL, None, (labels[block],)))
+        tac += body[block]
+        for op, cond, target in code:
+            args = (labels[target],) if cond is None else (cond, labels[target])
+            tac.append(Instr(op, None, args))
+        if exits[block][0] == "return":
+            tac.append(exits[block][1])
+    if None in labels:
+        tac.append(Instr(Op.LABEL, None, (labels[None],)))
+
+    jumps_after = sum(instr.op in JUMPS for instr in tac)
+    cfg.blocks = CFG(tac).blocks
+    cfg.link()
+    return len(blocks) - len(order) + max(0, jumps_before - jumps_after)
+
+
+# --- Pass manager ---
+# Every pass takes (cfg, ctx) and returns how many changes it made.
+PASSES = {
+    "fold": fold_constants,
+    "algebra": simplify_algebra,
+    "sccp": propagate_constants,
+    "lvn": number_values,
+    "copies": propagate_copies,
+    "coalesce": coalesce_temps,
+    "unroll": unroll_loops,
+    "licm": hoist_invariants,
+    "strength": reduce_strength,
+    "dse": remove_dead_stores,
+    "jumps": remove_redundant_jumps,
+    "labels": remove_unused_labels,
+    "simplify": simplify_cfg,
+}
+
+# Per -O level, a list of stages; the passes of a stage are repeated
+# until one whole round of them changes nothing.
+PIPELINES = {
+    0: [],
+    1: [("fold", "algebra", "lvn", "copies", "coalesce", "dse"),
+        ("jumps", "labels")],
+    2: [("fold", "sccp", "algebra", "lvn", "copies", "coalesce"),
+        ("licm", "strength", "copies", "fold", "algebra"),
+        ("dse",),
+        ("simplify",)],
+    3: [("fold", "sccp", "algebra", "lvn", "copies", "coalesce"),
+        ("unroll", "sccp"),
+        ("licm", "strength", "copies", "fold", "algebra"),
+        ("sccp", "algebra", "lvn", "copies", "coalesce", "dse"),
+        ("simplify",)],
+}
+
+
+class PassStats:
+    __slots__ = ("runs", "seconds", "changes", "delta")
+
+    def __init__(self):
+        self.runs = 0
+        self.seconds = 0.0
+        self.changes = 0
+        self.delta = 0  # instructions added (negative: removed)
+
+
+class PassManager:
+    """
+    Runs the pipeline of one -O level over a CFG and keeps per-pass
+    statistics: runs, wall time, changes reported and instruction delta.
+    A stage stops repeating after max_rounds rounds (ctx option, default 4)
+    even if its passes still report changes.
+
+    The cyclic garbage collector is paused while the passes run. They
+    build large tables that never form cycles and are freed by reference
+    counting, and on big programs the collector's rescans of everything
+    alive (the TAC, and usually the parse tree) cost more than the passes
+    and grew faster than the program.
+    """
+
+    def __init__(self, ctx, level=None):
+        self.ctx = ctx
+        self.level = ctx.option("opt_level", 3) if level is None else level
+        if self.level not in PIPELINES:
+            raise ValueError(f"Unknown optimization level -O{self.level}")
+        self.max_rounds = ctx.option("max_rounds", 4)
+        self.stats = {}  # pass name -> PassStats, in first-run order
+
+    def optimize(self, tac):
+        cfg = CFG(tac)
+        self.run(cfg)
+        return cfg.instructions()
+
+    def run(self, cfg):
+        paused = gc.isenabled()
+        gc.disable()
+        try:
+            for stage in PIPELINES[self.level]:
+                for _ in range(self.max_rounds):
+                    changes = [self.run_pass(name, cfg) for name in stage]
+                    if not any(changes):
+                        break
+        finally:
+            if paused:
+                gc.enable()
+
+    def run_pass(self, name, cfg):
+        size = sum(len(block.instrs) for block in cfg.blocks)
+        start = perf_counter()
+        changes = PASSES[name](cfg, self.ctx) or 0
+        elapsed = perf_counter() - start
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = PassStats()
+        stats.runs += 1
+        stats.seconds += elapsed
+        stats.changes += changes
+        stats.delta += sum(len(block.instrs) for block in cfg.blocks) - size
+        return changes
+
+    def display_stats(self):
+        print(f"\n===== PASS STATISTICS (-O{self.level}) =====")
+        print(f"{'pass':<10}{'runs':>6}{'time (ms)':>12}{'changes':>10}{'instrs':>9}")
+        total = PassStats()
+        for name, stats in self.stats.items():
+            print(f"{name:<10}{stats.runs:>6}{stats.seconds * 1000:>12.2f}"
+                  f"{stats.changes:>10}{stats.delta:>+9}")
+            total.runs += stats.runs
+            total.seconds += stats.seconds
+            total.changes += stats.changes
+            total.delta += stats.delta
+        print(f"{'total':<10}{total.runs:>6}{total.seconds * 1000:>12.2f}"
+              f"{total.changes:>10}{total.delta:>+9}")
+        print("=" * 37 + "\n")
+
+
+def display_optimization(before, after):
+    print("\n===== OPTIMIZATION =====")
+    print("Before:")
+    for i, line in enumerate(before, 1):
+        print(f"({i}) {line}")
+    print("\nAfter:")
+    for i, line in enumerate(after, 1):
+        print(f"({i}) {line}")
+    print("========================\n")
+
+
+if __name__ == "__main__":
+    import os
+    from tac_generator import generate_tac_from_node
+    from parser import parse
+    from lexer import lexical_analysis
+    from context import CompilationContext
+
+    file_path = input("Enter the path of the C source file: ").strip()
+    if not os.path.exists(file_path):
+        print(f"File '{file_path}' not found!")
+        exit(1)
+
+    with open(file_path, "r") as f:
+        code = f.read()
+
+    ctx = CompilationContext()
+    _, _, tokens = lexical_analysis(code)
+    parse_tree, _ = parse(tokens, ctx=ctx)
+    tac = generate_tac_from_node(parse_tree, ctx=ctx)
+
+    optimized_tac = optimize_tac(tac, ctx)
+    display_optimization(tac, optimized_tac)
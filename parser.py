@@ -1,250 +1,464 @@
-# parser.py
-import re
-
-# --- Lexer definitions ---
-KEYWORDS = {"int", "float", "string", "void", "return", "if", "else", "for", "while", "printf"}
-OPERATORS = {"+", "-", "*", "/", "=", ">", "<", "==", ">=", "<=", "!=", "++", "--"}
-PUNCTUATIONS = {";", ",", "(", ")", "{", "}"}
-
-def lexical_analysis(code):
-    token_pattern = (
-        r'\".*?\"'                # string literals
-        r'|[A-Za-z_][A-Za-z0-9_]*'  # identifiers
-        r'|\d+\.\d+'              # float constants
-        r'|\d+'                   # integer constants
-        r'|==|!=|<=|>=|[+\-*/=<>;,(){}]'  # operators & punctuations
-    )
-    tokens = re.findall(token_pattern, code)
-    ordered_tokens = []
-    for token in tokens:
-        if token in KEYWORDS:
-            ordered_tokens.append(("Keyword", token))
-        elif re.match(r'^".*"$', token):
-            ordered_tokens.append(("String", token))
-        elif re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', token):
-            ordered_tokens.append(("Identifier", token))
-        elif re.match(r'^\d+\.\d+$', token):
-            ordered_tokens.append(("Constant", token))
-        elif re.match(r'^\d+$', token):
-            ordered_tokens.append(("Constant", token))
-        elif token in OPERATORS:
-            ordered_tokens.append(("Operator", token))
-        elif token in PUNCTUATIONS:
-            ordered_tokens.append(("Punctuation", token))
-        else:
-            ordered_tokens.append(("Unknown", token))
-    return ordered_tokens
-
-# --- Node definition ---
-class Node:
-    def __init__(self, name, children=None):
-        self.name = name
-        self.children = children if children else []
-
-    def display(self, level=0):
-        print(" " * (level * 4) + ("├── " if level > 0 else "") + self.name)
-        for child in self.children:
-            if isinstance(child, Node):
-                child.display(level + 1)
-            else:
-                print(" " * ((level + 1) * 4) + "└── " + str(child))
-
-# --- Parser ---
-def parse(tokens):
-    parse_tree = Node("Program", [])
-    errors = []
-    i = 0
-    n = len(tokens)
-
-    def get_val(idx):
-        return tokens[idx][1] if idx < n else None
-
-    # Expect: void main ( ) { ... }
-    if n < 5 or get_val(0) != "void" or get_val(1) != "main":
-        errors.append("Missing or invalid function header (expected 'void main()').")
-        return parse_tree, errors
-
-    func_node = Node("Function", [
-        Node("Keyword", ["void"]),
-        Node("Identifier", ["main"]),
-        Node("Punctuation", ["("]),
-        Node("Punctuation", [")"]),
-    ])
-
-    i = 4
-    if get_val(i) != "{":
-        errors.append("Missing opening '{'")
-        return parse_tree, errors
-    i += 1
-
-    body_node = Node("Body", [])
-
-    while i < n and get_val(i) != "}":
-        token_type, token_value = tokens[i]
-
-        if token_value in ("int", "float", "string"):
-            decl_node = Node("Declaration", [Node("Type", [token_value])])
-            i += 1
-            while i < n and get_val(i) not in {";", "}"}:
-                decl_node.children.append(Node(tokens[i][0], [get_val(i)]))
-                i += 1
-            if get_val(i) == ";":
-                decl_node.children.append(Node("Punctuation", [";"]))
-                i += 1
-            body_node.children.append(decl_node)
-            continue
-
-        elif token_value == "if":
-            if_node = Node("IfStatement", [Node("Keyword", ["if"])])
-            i += 1
-            if get_val(i) == "(":
-                cond_node = Node("Condition", [])
-                i += 1
-                while i < n and get_val(i) != ")":
-                    cond_node.children.append(Node(tokens[i][0], [get_val(i)]))
-                    i += 1
-                if_node.children.append(cond_node)
-                if get_val(i) == ")":
-                    i += 1
-            if get_val(i) == "{":
-                body = Node("IfBody", [])
-                i += 1
-                while i < n and get_val(i) != "}":
-                    body.children.append(Node(tokens[i][0], [get_val(i)]))
-                    i += 1
-                if get_val(i) == "}":
-                    i += 1
-                if_node.children.append(body)
-            if i < n and get_val(i) == "else":
-                else_node = Node("ElseStatement", [Node("Keyword", ["else"])])
-                i += 1
-                if get_val(i) == "{":
-                    else_body = Node("ElseBody", [])
-                    i += 1
-                    while i < n and get_val(i) != "}":
-                        else_body.children.append(Node(tokens[i][0], [get_val(i)]))
-                        i += 1
-                    if get_val(i) == "}":
-                        i += 1
-                    else_node.children.append(else_body)
-                if_node.children.append(else_node)
-            body_node.children.append(if_node)
-            continue
-
-        elif token_value == "while":
-            while_node = Node("WhileLoop", [Node("Keyword", ["while"])])
-            i += 1
-            if get_val(i) == "(":
-                cond = Node("Condition", [])
-                i += 1
-                while i < n and get_val(i) != ")":
-                    cond.children.append(Node(tokens[i][0], [get_val(i)]))
-                    i += 1
-                if get_val(i) == ")":
-                    i += 1
-                while_node.children.append(cond)
-            if get_val(i) == "{":
-                loop_body = Node("LoopBody", [])
-                i += 1
-                while i < n and get_val(i) != "}":
-                    loop_body.children.append(Node(tokens[i][0], [get_val(i)]))
-                    i += 1
-                if get_val(i) == "}":
-                    i += 1
-                while_node.children.append(loop_body)
-            body_node.children.append(while_node)
-            continue
-
-        elif token_value == "for":
-            for_node = Node("ForLoop", [Node("Keyword", ["for"])])
-            i += 1
-            if get_val(i) == "(":
-                header = Node("Header", [])
-                i += 1
-                while i < n and get_val(i) != ")":
-                    header.children.append(Node(tokens[i][0], [get_val(i)]))
-                    i += 1
-                if get_val(i) == ")":
-                    i += 1
-                for_node.children.append(header)
-            if get_val(i) == "{":
-                loop_body = Node("LoopBody", [])
-                i += 1
-                while i < n and get_val(i) != "}":
-                    loop_body.children.append(Node(tokens[i][0], [get_val(i)]))
-                    i += 1
-                if get_val(i) == "}":
-                    i += 1
-                for_node.children.append(loop_body)
-            body_node.children.append(for_node)
-            continue
-
-        elif token_value == "printf":
-            printf_node = Node("PrintStatement", [Node("Keyword", ["printf"])])
-            i += 1
-            if get_val(i) == "(":
-                args_node = Node("Arguments", [])
-                i += 1
-                while i < n and get_val(i) != ")":
-                    args_node.children.append(Node(tokens[i][0], [get_val(i)]))
-                    i += 1
-                printf_node.children.append(args_node)
-                if get_val(i) == ")":
-                    i += 1
-            if get_val(i) == ";":
-                printf_node.children.append(Node("Punctuation", [";"]))
-                i += 1
-            body_node.children.append(printf_node)
-            continue
-
-        elif token_value == "return":
-            ret_node = Node("ReturnStatement", [Node("Keyword", ["return"])])
-            i += 1
-            while i < n and get_val(i) != ";":
-                ret_node.children.append(Node(tokens[i][0], [get_val(i)]))
-                i += 1
-            if get_val(i) == ";":
-                ret_node.children.append(Node("Punctuation", [";"]))
-                i += 1
-            body_node.children.append(ret_node)
-            continue
-
-        else:
-            stmt_node = Node("Statement", [Node(token_type, [token_value])])
-            i += 1
-            while i < n and get_val(i) != ";":
-                stmt_node.children.append(Node(tokens[i][0], [get_val(i)]))
-                i += 1
-            if get_val(i) == ";":
-                stmt_node.children.append(Node("Punctuation", [";"]))
-                i += 1
-            body_node.children.append(stmt_node)
-
-    parse_tree.children.append(func_node)
-    func_node.children.append(Node("Punctuation", ["{"]))
-    func_node.children.append(body_node)
-    func_node.children.append(Node("Punctuation", ["}"]))
-
-    return parse_tree, []
-
-# --- Run parser on a file ---
-if __name__ == "__main__":
-    file_path = input("Enter the path of the C source file: ").strip()
-
-    try:
-        with open(file_path, "r") as f:
-            code = f.read()
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        exit(1)
-
-    tokens = lexical_analysis(code)
-    parse_tree, errors = parse(tokens)
-
-    print("\n--- Parse Tree ---")
-    parse_tree.display()
-
-    if errors:
-        print("\nErrors:")
-        for e in errors:
-            print(" -", e)
+# parser.py
+from lexer import scan, TokenTable, KIND_CODES
+import ast_nodes
+from arena import ArenaBuilder
+from context import CompilationContext
+
+# --- Lexer definitions ---
+def lexical_analysis(code):
+    return TokenTable.from_tokens(scan(code))
+
+
+TYPES = {"int", "float", "string"}
+
+# Binary operator binding powers; all binary operators are left-associative.
+PRECEDENCE = {
+    "==": 1, "!=": 1,
+    "<": 2, ">": 2, "<=": 2, ">=": 2,
+    "+": 3, "-": 3,
+    "*": 4, "/": 4,
+}
+
+IDENTIFIER = KIND_CODES["Identifier"]
+CONSTANT = KIND_CODES["Constant"]
+STRING = KIND_CODES["String"]
+
+
+# Requests a statement generator yields to _Parser._run()
+STATEMENT = "statement"  # parse one nested statement
+RECOVER = "recover"      # the same, recording a syntax error in it and yielding None
+
+# Operator-stack entries that are not binary operators
+_OPEN, _UNARY = 0, -1
+
+
+class ParseError(Exception):
+    def __init__(self, msg, pos):
+        super().__init__(msg)
+        self.msg = msg
+        self.pos = pos
+
+
+def format_errors(errors):
+    """Render (token index or None, message) pairs as error strings."""
+    return [msg if pos is None else f"{msg} (token {pos})" for pos, msg in errors]
+
+
+# --- Parser ---
+class _Parser:
+    """
+    Recursive-descent statement parser with precedence climbing for
+    expressions; both keep their nesting on explicit stacks.
+    """
+
+    def __init__(self, tokens, nodes=ast_nodes, ctx=None):
+        self.nodes = nodes
+        self.ctx = CompilationContext() if ctx is None else ctx
+        self.kinds = tokens.kinds
+        self.ids = tokens.ids
+        self.texts = tokens.texts
+        self.n = len(tokens.ids)
+        self.i = 0
+        self.errors = []      # (token index or None, message)
+        self.segments = None  # set to a list to record top-level statement spans
+        self.body_end = None  # index of the '}' closing main, once parsed
+        # Token texts are compared by interned id; absent texts get -1.
+        self.tid = {t: tokens.lookup(t) for t in (
+            "(", ")", "{", "}", ";", ",", "=", "-", "++", "--",
+            "if", "else", "while", "for", "return", "printf")}
+        self.binding = {tokens.lookup(op): prec for op, prec in PRECEDENCE.items()}
+        self.binding.pop(-1, None)
+        self.compound_ids = {self.tid[t] for t in ("if", "while", "for", "{")} - {-1}
+
+    # --- Token helpers ---
+    def text(self, idx=None):
+        idx = self.i if idx is None else idx
+        return self.texts[self.ids[idx]] if idx < self.n else "end of input"
+
+    def at(self, text):
+        return self.i < self.n and self.ids[self.i] == self.tid[text]
+
+    def accept(self, text):
+        if self.at(text):
+            self.i += 1
+            return True
+        return False
+
+    def expect(self, text):
+        if not self.accept(text):
+            self.fail(f"'{text}'")
+
+    def fail(self, what):
+        raise ParseError(f"Expected {what} but found '{self.text()}'", self.i)
+
+    def identifier(self):
+        if self.i < self.n and self.kinds[self.i] == IDENTIFIER:
+            self.i += 1
+            return self.texts[self.ids[self.i - 1]]
+        self.fail("an identifier")
+
+    def synchronize(self):
+        """Skip past the next ';', or up to a '}', after a syntax error."""
+        semi, rbrace = self.tid[";"], self.tid["}"]
+        while self.i < self.n and self.ids[self.i] != rbrace:
+            self.i += 1
+            if self.ids[self.i - 1] == semi:
+                return
+
+    # --- Program structure ---
+    def program(self):
+        if self.n < 5 or self.text(0) != "void" or self.text(1) != "main":
+            self.errors.append((None, "Missing or invalid function header (expected 'void main()')."))
+            return self.nodes.Program(None)
+        self.i = 2
+        try:
+            self.expect("(")
+            self.expect(")")
+        except ParseError as e:
+            self.errors.append((e.pos, e.msg))
+            return self.nodes.Program(None)
+        if not self.at("{"):
+            self.errors.append((None, "Missing opening '{'"))
+            return self.nodes.Program(None)
+        body = self.block(self.segments)
+        if self.i < self.n:
+            self.errors.append((self.i, f"Unexpected '{self.text()}' after end of main"))
+        return self.nodes.Program(self.nodes.Function("void", "main", body, 0), 0)
+
+    # --- Statement driver ---
+    # Statements are parsed without recursion. A compound statement is a
+    # generator that yields STATEMENT (or RECOVER) where it needs a nested
+    # statement and is sent back that statement's node. _run() keeps the
+    # suspended generators on an explicit stack, so nesting depth is bounded
+    # by memory rather than by Python's recursion limit.
+    def _run(self, parser):
+        """Drive a statement generator to completion and return its node."""
+        stack = [parser]
+        recovering = []  # (stack height, first token) of each statement requested with RECOVER
+        value = None
+        while stack:
+            try:
+                request = stack[-1].send(value)
+                if request is RECOVER:
+                    recovering.append((len(stack), self.i))
+                compound = self.compound()
+                if compound is not None:
+                    stack.append(compound)
+                    value = None
+                    continue
+                value = self.simple()
+            except StopIteration as done:
+                stack.pop()
+                value = done.value
+            except ParseError as e:
+                if not recovering:
+                    raise
+                # Abandon the recovered statement and everything nested in it
+                height, start = recovering.pop()
+                del stack[height:]
+                self.skip_error(e, start)
+                value = None
+                continue
+            if recovering and recovering[-1][0] == len(stack):
+                recovering.pop()
+        return value
+
+    def skip_error(self, error, start):
+        """Record a syntax error in the statement that began at start and resynchronize."""
+        self.errors.append((error.pos, error.msg))
+        self.synchronize()
+        if self.i == start:
+            self.i += 1
+
+    def block(self, segments=None):
+        return self._run(self._block(segments))
+
+    def recover_statement(self):
+        """Parse one statement; on a syntax error record it, resynchronize and return None."""
+        return self._run(self._recover())
+
+    def statement(self):
+        return self._run(self._statement())
+
+    def _recover(self):
+        return (yield RECOVER)
+
+    def _statement(self):
+        return (yield STATEMENT)
+
+    def _block(self, segments=None):
+        """
+        Parse a braced block. When segments is a list, append one
+        (start token, node or None, errors) entry per statement parsed.
+        """
+        pos = self.i
+        self.expect("{")
+        statements = []
+        rbrace = self.tid["}"]
+        while self.i < self.n and self.ids[self.i] != rbrace:
+            start = self.i
+            mark = len(self.errors)
+            if self.compound_at():
+                node = yield RECOVER
+            else:
+                # Simple statements never nest: parse them here, without the driver
+                try:
+                    node = self.simple()
+                except ParseError as e:
+                    self.skip_error(e, start)
+                    node = None
+            if node is not None:
+                statements.append(node)
+            if segments is not None:
+                segments.append((start, node, self.errors[mark:]))
+        if self.accept("}"):
+            if segments is not None:
+                self.body_end = self.i - 1
+        else:
+            self.errors.append((None, "Missing closing '}'"))
+        return self.nodes.Block(statements, pos)
+
+    def _body(self):
+        """Loop/branch body: a braced block or a single statement."""
+        if self.at("{"):
+            return (yield from self._block())
+        pos = self.i
+        return self.nodes.Block([(yield STATEMENT)], pos)
+
+    # --- Statements ---
+    def compound_at(self):
+        return self.i < self.n and self.ids[self.i] in self.compound_ids
+
+    def compound(self):
+        """Generator for the compound statement at the current token, or None for a simple one."""
+        if self.i < self.n:
+            tid, token = self.tid, self.ids[self.i]
+            if token == tid["if"]:
+                return self.if_statement()
+            if token == tid["while"]:
+                return self.while_statement()
+            if token == tid["for"]:
+                return self.for_statement()
+            if token == tid["{"]:
+                return self._block()
+        return None
+
+    def simple(self):
+        """Declaration, return, assignment, update or printf call, with its ';'."""
+        if self.text() in TYPES:
+            node = self.declaration()
+        elif self.at("return"):
+            pos = self.i
+            self.i += 1
+            value = None if self.at(";") else self.expression()
+            self.expect(";")
+            return self.nodes.Return(value, pos)
+        else:
+            node = self.simple_statement()
+        self.expect(";")
+        return node
+
+    def declaration(self):
+        pos = self.i
+        var_type = self.text()
+        self.i += 1
+        items = []
+        while True:
+            name_pos = self.i
+            ident = self.identifier()
+            self.ctx.declare(ident, var_type)
+            target = self.nodes.Name(ident, name_pos)
+            if self.at("="):
+                assign_pos = self.i
+                self.i += 1
+                items.append(self.nodes.Assign(target, self.expression(), assign_pos))
+            else:
+                items.append(target)
+            if not self.accept(","):
+                return self.nodes.Declaration(var_type, items, pos)
+
+    def simple_statement(self):
+        """Assignment, ++/-- update or printf call (without the trailing ';')."""
+        pos = self.i
+        if self.at("printf"):
+            return self.call()
+        ident = self.identifier()
+        target = self.nodes.Name(ident, pos)
+        if self.at("="):
+            op_pos = self.i
+            self.i += 1
+            return self.nodes.Assign(target, self.expression(), op_pos)
+        if self.at("++") or self.at("--"):
+            op_pos = self.i
+            op = "+" if self.at("++") else "-"
+            self.i += 1
+            one = self.nodes.Const("1", op_pos)
+            step = self.nodes.BinOp(op, self.nodes.Name(ident, pos), one, op_pos)
+            return self.nodes.Assign(target, step, op_pos)
+        self.fail("'=', '++' or '--'")
+
+    def call(self):
+        pos = self.i
+        func = self.text()
+        self.i += 1
+        self.expect("(")
+        args = []
+        if not self.at(")"):
+            args.append(self.expression())
+            while self.accept(","):
+                args.append(self.expression())
+        self.expect(")")
+        return self.nodes.Call(func, args, pos)
+
+    def if_statement(self):
+        pos = self.i
+        self.i += 1
+        self.expect("(")
+        cond = self.expression()
+        self.expect(")")
+        then = yield from self._body()
+        orelse = None
+        if self.accept("else"):
+            if self.at("if"):
+                else_pos = self.i
+                orelse = self.nodes.Block([(yield STATEMENT)], else_pos)
+            else:
+                orelse = yield from self._body()
+        return self.nodes.If(cond, then, orelse, pos)
+
+    def while_statement(self):
+        pos = self.i
+        self.i += 1
+        self.expect("(")
+        cond = self.expression()
+        self.expect(")")
+        return self.nodes.While(cond, (yield from self._body()), pos)
+
+    def for_statement(self):
+        pos = self.i
+        self.i += 1
+        self.expect("(")
+        init = cond = step = None
+        if not self.at(";"):
+            init = self.declaration() if self.text() in TYPES else self.simple_statement()
+        self.expect(";")
+        if not self.at(";"):
+            cond = self.expression()
+        self.expect(";")
+        if not self.at(")"):
+            step = self.simple_statement()
+        self.expect(")")
+        return self.nodes.For(init, cond, step, (yield from self._body()), pos)
+
+    # --- Expressions ---
+    def expression(self):
+        """
+        Precedence climbing with explicit operand and operator stacks, so
+        parentheses and unary minus nest as deep as memory allows. Operator
+        entries are (binding power, text, token index); an open '(' and a
+        pending unary '-' sit on the same stack with powers below any
+        binary operator, so reductions stop at them.
+        """
+        operands = []
+        operators = []
+        open_parens = 0
+        ids, n, binding = self.ids, self.n, self.binding
+        lparen, rparen, minus = self.tid["("], self.tid[")"], self.tid["-"]
+        while True:
+            # Prefixes, then an operand
+            while self.i < n and (ids[self.i] == lparen or ids[self.i] == minus):
+                if ids[self.i] == lparen:
+                    operators.append((_OPEN, "(", self.i))
+                    open_parens += 1
+                else:
+                    # Unary minus binds tighter than any binary operator: -a * b is (-a) * b
+                    operators.append((_UNARY, "-", self.i))
+                self.i += 1
+            operands.append(self.primary())
+            while True:
+                while operators and operators[-1][0] == _UNARY:
+                    operands.append(self.nodes.UnaryOp("-", operands.pop(), operators.pop()[2]))
+                if not open_parens or self.i >= n or ids[self.i] != rparen:
+                    break
+                self._reduce(operands, operators, 1)
+                operators.pop()
+                open_parens -= 1
+                self.i += 1
+            prec = binding.get(ids[self.i], 0) if self.i < n else 0
+            if not prec:
+                if operators:
+                    self._reduce(operands, operators, 1)
+                    if open_parens:
+                        self.fail("')'")
+                return operands[0]
+            if operators and operators[-1][0] >= prec:
+                self._reduce(operands, operators, prec)
+            operators.append((prec, self.texts[ids[self.i]], self.i))
+            self.i += 1
+
+    def _reduce(self, operands, operators, prec):
+        """Apply stacked binary operators of binding power >= prec (all are left-associative)."""
+        while operators and operators[-1][0] >= prec:
+            _, op, op_pos = operators.pop()
+            right = operands.pop()
+            operands.append(self.nodes.BinOp(op, operands.pop(), right, op_pos))
+
+    def primary(self):
+        pos = self.i
+        if pos >= self.n:
+            self.fail("an expression")
+        kind = self.kinds[pos]
+        if kind == IDENTIFIER:
+            self.i += 1
+            return self.nodes.Name(self.text(pos), pos)
+        if kind == CONSTANT:
+            self.i += 1
+            return self.nodes.Const(self.text(pos), pos)
+        if kind == STRING:
+            self.i += 1
+            return self.nodes.Str(self.text(pos), pos)
+        self.fail("an expression")
+
+
+def parse(tokens, arena=False, ctx=None):
+    """
+    Parse a token stream into a typed syntax tree.
+    With arena=True the tree is built as a flat arena.Arena instead.
+    Declared variables are recorded in ctx.symbols.
+    Returns:
+        tree: Program node (its function is None if the header is invalid),
+              or the Arena holding it
+        errors: list of syntax error messages
+    """
+    if not isinstance(tokens, TokenTable):
+        tokens = TokenTable.from_tokens(tokens)
+    if arena:
+        builder = ArenaBuilder()
+        parser = _Parser(tokens, builder, ctx)
+        parser.program()
+        return builder.finish(), format_errors(parser.errors)
+    parser = _Parser(tokens, ctx=ctx)
+    tree = parser.program()
+    return tree, format_errors(parser.errors)
+
+# --- Run parser on a file ---
+if __name__ == "__main__":
+    file_path = input("Enter the path of the C source file: ").strip()
+
+    try:
+        with open(file_path, "r") as f:
+            code = f.read()
+    except FileNotFoundError:
+        print(f"Error: File '{file_path}' not found.")
+        exit(1)
+
+    tokens = lexical_analysis(code)
+    parse_tree, errors = parse(tokens)
+
+    print("\n--- Parse Tree ---")
+    parse_tree.display()
+
+    if errors:
+        print("\nErrors:")
+        for e in errors:
+            print(" -", e)
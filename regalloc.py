@@ -0,0 +1,181 @@
+# regalloc.py
+"""
+Linear-scan register allocation (Poletto and Sarkar) over a list of
+ir.Instr.
+
+Every Temp and Var gets a live interval [start, end] of instruction
+positions. It covers each definition and use, plus every block it is
+live into or out of (from liveness), so values that flow around a loop
+stay live over the whole loop. Intervals are visited by start point,
+and each takes a register freed by intervals that have already ended.
+When all registers are busy, the interval that ends last is spilled to
+a stack slot: it keeps no register, and the code generator loads it
+into a scratch register where it is read and stores it where it is
+written.
+
+If anything spills, allocation is redone with the last two registers
+kept back as those scratch registers, so an instruction with spilled
+operands always has somewhere to put them.
+"""
+from cfg import CFG
+from liveness import Liveness
+from ir import Temp, Var
+
+SCRATCH = 2
+
+
+class Interval:
+    __slots__ = ("name", "start", "end", "register", "slot")
+
+    def __init__(self, name, start):
+        self.name = name
+        self.start = self.end = start
+        self.register = None  # e.g. "R3"
+        self.slot = None      # stack slot number when spilled
+
+    def __repr__(self):
+        where = self.register or f"slot {self.slot}"
+        return f"<Interval {self.name} [{self.start}, {self.end}] {where}>"
+
+
+class Allocation:
+    """Where every name lives, plus the numbers for the spill/pressure report."""
+    __slots__ = ("intervals", "registers", "scratch", "slots", "pressure", "pressure_at")
+
+    def __init__(self, intervals, registers, scratch, slots, pressure, pressure_at):
+        self.intervals = intervals    # name -> Interval
+        self.registers = registers    # size of the register file
+        self.scratch = scratch        # registers kept back for spill code
+        self.slots = slots            # stack slots used
+        self.pressure = pressure      # most names live at one point
+        self.pressure_at = pressure_at
+
+    def register(self, operand):
+        """Register holding operand, or None if it is spilled (or not a name)."""
+        interval = self.intervals.get(operand)
+        return interval.register if interval is not None else None
+
+    def slot(self, operand):
+        interval = self.intervals.get(operand)
+        return interval.slot if interval is not None else None
+
+    @property
+    def spilled(self):
+        return [i.name for i in self.intervals.values() if i.slot is not None]
+
+    def used_registers(self):
+        return sorted({i.register for i in self.intervals.values() if i.register is not None},
+                      key=lambda r: int(r[1:]))
+
+
+def live_intervals(tac, exclude=()):
+    """
+    {Temp/Var: Interval} for every name in tac, in order of first
+    appearance. Names in exclude never need a register (the code generator
+    does not materialize them) and get no interval.
+    """
+    cfg = CFG(tac)
+    live = Liveness(cfg)
+    intervals = {}
+
+    def extend(name, position):
+        interval = intervals.get(name)
+        if interval is None:
+            if name in exclude:
+                return
+            intervals[name] = Interval(name, position)
+        elif position < interval.start:
+            interval.start = position
+        elif position > interval.end:
+            interval.end = position
+
+    position = 0
+    for block in cfg.blocks:
+        first, last = position, position + len(block.instrs) - 1
+        for name in live.decode(live.live_in[block.index]):
+            extend(name, first)
+        for instr in block.instrs:
+            for name in instr.uses():
+                extend(name, position)
+            if type(instr.dest) is Temp or type(instr.dest) is Var:
+                extend(instr.dest, position)
+            position += 1
+        for name in live.decode(live.live_out[block.index]):
+            extend(name, last)
+    return intervals
+
+
+def _linear_scan(intervals, registers):
+    """Assign registers R1..R<registers> in place; returns the number of stack slots used."""
+    free = [f"R{n}" for n in range(registers, 0, -1)]  # pop() hands out R1 first
+    active = []  # intervals holding a register, by increasing end
+    slots = 0
+    for interval in sorted(intervals, key=lambda i: i.start):
+        interval.register = interval.slot = None
+        while active and active[0].end < interval.start:
+            free.append(active.pop(0).register)
+        if free:
+            interval.register = free.pop()
+        else:
+            victim = active[-1] if active else None
+            if victim is not None and victim.end > interval.end:
+                interval.register, victim.register = victim.register, None
+                victim.slot = slots
+                active.pop()
+            else:
+                interval.slot = slots
+            slots += 1
+        if interval.register is not None:
+            at = len(active)
+            while at and active[at - 1].end > interval.end:
+                at -= 1
+            active.insert(at, interval)
+    return slots
+
+
+def _pressure(intervals):
+    """(most names live at once, first position where that happens)."""
+    events = []
+    for i in intervals:
+        events.append((i.start, 1))
+        events.append((i.end + 1, -1))
+    events.sort()  # at a tie, an interval ending (-1) is counted before one starting
+    live = best = at = 0
+    for position, step in events:
+        live += step
+        if live > best:
+            best, at = live, position
+    return best, at
+
+
+def allocate_registers(tac, registers=8, exclude=(), scratch=SCRATCH):
+    """
+    Allocate registers for tac with a register file of the given size;
+    returns an Allocation. scratch registers are kept back once anything
+    spills; pass 0 when the code generator has its own.
+    """
+    if registers < scratch + 1:
+        raise ValueError(f"Need at least {scratch + 1} registers, got {registers}")
+    intervals = live_intervals(tac, exclude)
+    values = list(intervals.values())
+    slots = _linear_scan(values, registers)
+    if slots and scratch:
+        slots = _linear_scan(values, registers - scratch)
+    else:
+        scratch = 0
+    pressure, pressure_at = _pressure(values)
+    return Allocation(intervals, registers, scratch, slots, pressure, pressure_at)
+
+
+def display_allocation(allocation, function="main"):
+    print(f"\n--- Register Allocation ({function}) ---")
+    used = allocation.used_registers()
+    print(f"Register file: {allocation.registers} "
+          f"({allocation.registers - allocation.scratch} allocatable, "
+          f"{allocation.scratch} scratch), used: {len(used)}")
+    if allocation.pressure:
+        print(f"Pressure: {allocation.pressure} names live at once "
+              f"(first at instruction {allocation.pressure_at + 1})")
+    spilled = allocation.spilled
+    print(f"Spilled: {len(spilled)} names to {allocation.slots} stack slots"
+          + (f" ({', '.join(map(str, spilled))})" if spilled else ""))
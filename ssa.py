@@ -0,0 +1,303 @@
+# ssa.py
+"""
+SSA construction and destruction over a CFG, and sparse conditional
+constant propagation (SCCP) on the SSA form.
+
+to_ssa() places pruned phi functions at the dominance frontiers of each
+name's definitions (only where the name is live on entry) and renames
+every definition to a fresh version, written name.N (e.g. x.2, t7.1).
+Uses before any definition keep the bare name. The result is
+conventional SSA: no two versions of one name are ever live at the same
+time. SCCP only replaces uses with constants and deletes branches and
+blocks, and that property survives it. from_ssa() can therefore leave
+SSA by dropping the phis and mapping every version back to its name,
+with no copies.
+
+sccp() is the Wegman-Zadeck algorithm. Values start unknown (TOP) and
+only move down to a constant and then to varying (BOTTOM). Only blocks
+reached along edges already proved executable are evaluated. Afterwards
+constant definitions and uses are rewritten, IF_FALSE on a known
+condition becomes a GOTO or disappears, and never-executed blocks are
+removed.
+"""
+from cfg import BasicBlock, dominance_frontiers
+from ir import Instr, Op, ARITHMETIC, COMPARISONS, UNARY, Temp, Var, Const, evaluate
+from liveness import Liveness
+
+TOP = "top"
+BOTTOM = "bottom"
+
+_FOLDABLE = ARITHMETIC | COMPARISONS | UNARY
+_CONVERT_TO = {"int": Op.TO_INT, "float": Op.TO_FLOAT}
+
+
+# --- SSA construction ---
+def to_ssa(cfg):
+    """
+    Rewrite cfg into SSA form in place.
+    Returns the version map {versioned operand: original operand} for from_ssa().
+    """
+    blocks = cfg.blocks
+    if blocks and blocks[0].preds:
+        # Give the entry its own block so no phi is needed for the entry edge.
+        blocks.insert(0, BasicBlock(0, []))
+        cfg.link()
+    idom = cfg.dominators()
+    frontiers = dominance_frontiers(cfg, idom)
+    live = Liveness(cfg)
+
+    # --- 1. Phi placement (pruned by liveness) ---
+    def_blocks = {}
+    for block in blocks:
+        if idom[block.index] is None:
+            continue
+        for instr in block.instrs:
+            if instr.dest is not None and instr.dest in live.index:
+                def_blocks.setdefault(instr.dest, set()).add(block.index)
+
+    phi_names = [[] for _ in blocks]  # original name of each phi, per block
+    for name, defined_in in def_blocks.items():
+        mask = 1 << live.index[name]
+        placed = set()
+        work = list(defined_in)
+        while work:
+            for f in frontiers[work.pop()]:
+                if f not in placed and live.live_in[f] & mask:
+                    placed.add(f)
+                    phi_names[f].append(name)
+                    if f not in defined_in:
+                        work.append(f)
+
+    for block in blocks:
+        names = phi_names[block.index]
+        if names:
+            at = 1 if block.label is not None else 0
+            width = len(block.preds)
+            block.instrs[at:at] = [Instr(Op.PHI, name, [name] * width) for name in names]
+
+    # --- 2. Renaming along the dominator tree ---
+    origin = {}
+    counters = {}
+    stacks = {}
+
+    def new_version(name):
+        number = counters.get(name, 0) + 1
+        counters[name] = number
+        version = type(name)(f"{name.value}.{number}")
+        origin[version] = name
+        stacks.setdefault(name, []).append(version)
+        return version
+
+    def current(operand):
+        if type(operand) is Temp or type(operand) is Var:
+            stack = stacks.get(operand)
+            if stack:
+                return stack[-1]
+        return operand
+
+    children = [[] for _ in blocks]
+    for b, parent in enumerate(idom):
+        if parent is not None and b != 0:
+            children[parent].append(b)
+
+    pushed = {}
+    walk = [(0, False)] if blocks else []
+    while walk:
+        b, leaving = walk.pop()
+        if leaving:
+            for name in pushed.pop(b):
+                stacks[name].pop()
+            continue
+        block = blocks[b]
+        defined = []
+        for i, instr in enumerate(block.instrs):
+            if instr.op == Op.PHI:
+                defined.append(instr.dest)
+                instr.dest = new_version(instr.dest)
+                continue
+            args = instr.args
+            if any(type(a) is Temp or type(a) is Var for a in args):
+                args = tuple(map(current, args))
+            dest = instr.dest
+            if dest is not None:
+                defined.append(dest)
+                dest = new_version(dest)
+            block.instrs[i] = Instr(instr.op, dest, args)
+        for succ in block.succs:
+            j = blocks[succ].preds.index(b)
+            names = phi_names[succ]
+            at = 1 if blocks[succ].label is not None else 0
+            for k, name in enumerate(names):
+                blocks[succ].instrs[at + k].args[j] = current(name)
+        pushed[b] = defined
+        walk.append((b, True))
+        walk.extend((child, False) for child in reversed(children[b]))
+
+    for block in blocks:
+        for instr in block.instrs:
+            if instr.op == Op.PHI:
+                instr.args = tuple(instr.args)
+    return origin
+
+
+def from_ssa(cfg, origin):
+    """Leave SSA form: drop the phis and map every version back to its name."""
+    for block in cfg.blocks:
+        instrs = []
+        for instr in block.instrs:
+            if instr.op == Op.PHI:
+                continue
+            args = instr.args
+            if any(a in origin for a in args):
+                args = tuple(origin.get(a, a) for a in args)
+            instrs.append(Instr(instr.op, origin.get(instr.dest, instr.dest), args))
+        block.instrs = instrs
+    cfg.link()
+
+
+# --- Sparse conditional constant propagation ---
+def declared_types(origin, symbols):
+    """{SSA version: "int" or "float"} for versions of declared variables, for sccp()."""
+    return {version: symbols[name.value] for version, name in origin.items()
+            if type(name) is Var and symbols.get(name.value) in _CONVERT_TO}
+
+
+def _meet(a, b):
+    if a is TOP:
+        return b
+    if b is TOP or a == b:
+        return a
+    return BOTTOM
+
+
+def sccp(cfg, declared=None):
+    """
+    Run SCCP on a CFG in SSA form; returns the number of rewrites made.
+    declared maps SSA names to "int" or "float": a constant copied into
+    one is converted to that type first, as C assignment does.
+    """
+    declared = declared or {}
+    blocks = cfg.blocks
+    if not blocks:
+        return 0
+    values = {}  # SSA name -> TOP, a Const or BOTTOM
+    users = {}   # SSA name -> [(block index, instr)]
+    for block in blocks:
+        for instr in block.instrs:
+            if instr.dest is not None:
+                values[instr.dest] = TOP
+            for a in instr.uses():
+                users.setdefault(a, []).append((block.index, instr))
+
+    def lattice(operand):
+        if type(operand) is Const:
+            return operand
+        return values.get(operand, BOTTOM)  # strings and never-defined names vary
+
+    edges = set()       # executable (pred, succ) edges
+    reached = set()     # executable blocks
+    flow = [(-1, 0)]
+    ssa_work = []
+
+    def branch_targets(block):
+        b = block.index
+        last = block.terminator
+        if last is None:
+            return [b + 1] if b + 1 < len(blocks) else []
+        if last.op == Op.GOTO:
+            return [cfg.labels[last.args[0]]]
+        if last.op == Op.RETURN:
+            return []
+        cond = lattice(last.args[0])
+        if cond is TOP:
+            return []
+        target = cfg.labels[last.args[1]]
+        fall = [b + 1] if b + 1 < len(blocks) else []
+        if cond is BOTTOM:
+            return [target] + fall
+        return [target] if cond.value == 0 else fall
+
+    def visit(b, instr):
+        block = blocks[b]
+        op = instr.op
+        if op == Op.PHI:
+            new = TOP
+            for pred, arg in zip(block.preds, instr.args):
+                if (pred, b) in edges:
+                    new = _meet(new, lattice(arg))
+        elif instr.dest is None:
+            if instr is block.terminator:
+                flow.extend((b, succ) for succ in branch_targets(block))
+            return
+        elif op == Op.COPY:
+            new = lattice(instr.args[0])
+            if type(new) is Const and instr.dest in declared:
+                result = evaluate(_CONVERT_TO[declared[instr.dest]], new.value)
+                new = BOTTOM if result is None else Const(result)
+        elif op in _FOLDABLE:
+            operands = [lattice(a) for a in instr.args]
+            if BOTTOM in operands:
+                new = BOTTOM
+            elif TOP in operands:
+                new = TOP
+            else:
+                result = evaluate(op, *(c.value for c in operands))
+                new = BOTTOM if result is None else Const(result)
+        else:
+            new = BOTTOM
+        old = values[instr.dest]
+        if new != old and old is not BOTTOM:
+            values[instr.dest] = new
+            ssa_work.extend(users.get(instr.dest, ()))
+
+    while flow or ssa_work:
+        while flow:
+            edge = flow.pop()
+            if edge in edges:
+                continue
+            edges.add(edge)
+            b = edge[1]
+            if b in reached:
+                for instr in blocks[b].instrs:
+                    if instr.op == Op.PHI:
+                        visit(b, instr)
+                continue
+            reached.add(b)
+            for instr in blocks[b].instrs:
+                visit(b, instr)
+            if blocks[b].terminator is None:
+                flow.extend((b, succ) for succ in branch_targets(blocks[b]))
+        while ssa_work:
+            b, instr = ssa_work.pop()
+            if b in reached:
+                visit(b, instr)
+
+    # --- Rewrite with the results ---
+    rewrites = 0
+    kept = []
+    for block in blocks:
+        if block.index not in reached:
+            rewrites += len(block.instrs)
+            continue
+        instrs = []
+        for instr in block.instrs:
+            dest = instr.dest
+            if dest is not None and type(values[dest]) is Const:
+                if instr.op != Op.COPY or instr.args[0] != values[dest]:
+                    instr = Instr(Op.COPY, dest, (values[dest],))
+                    rewrites += 1
+            elif instr.op != Op.PHI and any(type(lattice(a)) is Const for a in instr.uses()):
+                args = tuple(lattice(a) if type(lattice(a)) is Const else a for a in instr.args)
+                instr = Instr(instr.op, dest, args)
+                rewrites += 1
+            if instr.op == Op.IF_FALSE and type(instr.args[0]) is Const:
+                rewrites += 1
+                if instr.args[0].value == 0:
+                    instrs.append(Instr(Op.GOTO, None, (instr.args[1],)))
+                continue
+            instrs.append(instr)
+        block.instrs = instrs
+        kept.append(block)
+    cfg.blocks = kept
+    cfg.link()
+    return rewrites
@@ -1,201 +1,376 @@
-from parser import parse, Node
-from lexer import lexical_analysis
-
-label_counter = 1
-temp_counter = 1
-
-def new_label():
-    global label_counter
-    lbl = f"L{label_counter}"
-    label_counter += 1
-    return lbl
-
-def new_temp():
-    global temp_counter
-    tmp = f"t{temp_counter}"
-    temp_counter += 1
-    return tmp
-
-def generate_tac_from_node(node, tac=None):
-    """Recursively traverse parse tree node to generate TAC."""
-    if tac is None:
-        tac = []
-
-    # --- Declaration ---
-    if node.name == "Declaration":
-        if len(node.children) > 1:
-            lhs_node = node.children[0]
-            lhs = lhs_node.children[0] if hasattr(lhs_node, "children") else lhs_node
-
-            # handle initializer if exists
-            if len(node.children) > 1:
-                rhs_node = Node("Expr", [node.children[1]])
-                rhs_temp = generate_expression_tac(rhs_node, tac)
-                tac.append(f"{lhs} = {rhs_temp}")
-
-    # --- Assignment / Statement ---
-    elif node.name == "Statement":
-        if len(node.children) >= 3:
-            lhs = node.children[0].children[0]
-            op = node.children[1].children[0]
-            rhs_node = Node("Expr", [node.children[2]])
-            rhs_temp = generate_expression_tac(rhs_node, tac)
-            if op == "=":
-                tac.append(f"{lhs} = {rhs_temp}")
-
-    # --- Return ---
-    elif node.name == "ReturnStatement":
-        ret_val = ""
-        if node.children[1:]:
-            rhs_node = Node("Expr", node.children[1:])
-            ret_val = generate_expression_tac(rhs_node, tac)
-        tac.append(f"RETURN {ret_val if ret_val else 0}")
-
-    # --- Print ---
-    elif node.name == "PrintStatement":
-        args = []
-        for c in node.children:
-            if c.name == "Arguments":
-                args = [ch.children[0] for ch in c.children]
-        tac.append(f"PRINT {', '.join(args)}")
-
-    # --- If / Else ---
-    elif node.name == "IfStatement":
-        cond_node = next((c for c in node.children if c.name == "Condition"), None)
-        if_body = next((c for c in node.children if c.name == "IfBody"), None)
-        else_node = next((c for c in node.children if c.name == "ElseStatement"), None)
-
-        cond_temp = generate_expression_tac(cond_node, tac) if cond_node else ""
-
-        lbl_false = new_label()
-        lbl_end = new_label()
-
-        tac.append(f"IF_FALSE {cond_temp} GOTO {lbl_false}")
-        if if_body:
-            for stmt in if_body.children:
-                generate_tac_from_node(stmt, tac)
-        tac.append(f"GOTO {lbl_end}")
-        tac.append(f"LABEL {lbl_false}")
-
-        if else_node:
-            for stmt in else_node.children:
-                if stmt.name.endswith("Body"):
-                    for s in stmt.children:
-                        generate_tac_from_node(s, tac)
-        tac.append(f"LABEL {lbl_end}")
-
-    # --- While Loop ---
-    elif node.name == "WhileLoop":
-        cond_node = next((c for c in node.children if c.name == "Condition"), None)
-        body_node = next((c for c in node.children if c.name == "LoopBody"), None)
-
-        lbl_start = new_label()
-        lbl_end = new_label()
-        tac.append(f"LABEL {lbl_start}")
-
-        if cond_node:
-            cond_temp = generate_expression_tac(cond_node, tac)
-            tac.append(f"IF_FALSE {cond_temp} GOTO {lbl_end}")
-
-        if body_node:
-            for stmt in body_node.children:
-                generate_tac_from_node(stmt, tac)
-
-        tac.append(f"GOTO {lbl_start}")
-        tac.append(f"LABEL {lbl_end}")
-
-    # --- For Loop ---
-    elif node.name == "ForLoop":
-        header_node = next((c for c in node.children if c.name == "Header"), None)
-        body_node = next((c for c in node.children if c.name == "LoopBody"), None)
-
-        # Init
-        if header_node:
-            for i in range(len(header_node.children) - 2):
-                ch1, ch2, ch3 = header_node.children[i:i+3]
-                lhs, op, rhs = ch1.children[0], ch2.children[0], ch3.children[0]
-                if op == "=":
-                    rhs_node = Node("Expr", [ch3])
-                    rhs_temp = generate_expression_tac(rhs_node, tac)
-                    tac.append(f"{lhs} = {rhs_temp}")
-                    break
-
-        lbl_start = new_label()
-        lbl_end = new_label()
-        tac.append(f"LABEL {lbl_start}")
-
-        # Condition
-        if header_node:
-            for i in range(1, len(header_node.children) - 1):
-                ch2 = header_node.children[i]
-                if hasattr(ch2, "children") and ch2.children[0] in ("<", "<=", ">", ">=", "==", "!="):
-                    lhs = header_node.children[i-1].children[0]
-                    op = ch2.children[0]
-                    rhs = header_node.children[i+1].children[0]
-                    cond_temp = new_temp()
-                    tac.append(f"{cond_temp} = {lhs} {op} {rhs}")
-                    tac.append(f"IF_FALSE {cond_temp} GOTO {lbl_end}")
-                    break
-
-        # Body
-        if body_node:
-            for stmt in body_node.children:
-                generate_tac_from_node(stmt, tac)
-
-        # Increment
-        if header_node:
-            for i in range(1, len(header_node.children)):
-                ch = header_node.children[i]
-                if hasattr(ch, "children") and ch.children[0] in ("++", "--"):
-                    var = header_node.children[i-1].children[0]
-                    tac.append(f"{var} = {var} + 1" if ch.children[0] == "++" else f"{var} = {var} - 1")
-
-        tac.append(f"GOTO {lbl_start}")
-        tac.append(f"LABEL {lbl_end}")
-
-    else:
-        # Recursive call for other nodes
-        for child in node.children:
-            if isinstance(child, Node):
-                generate_tac_from_node(child, tac)
-
-    return tac
-
-
-def generate_expression_tac(node, tac):
-    """Convert expression node to a temporary variable."""
-    expr_parts = []
-    for c in node.children:
-        if hasattr(c, "children"):
-            expr_parts.append(str(c.children[0]))
-    temp = new_temp()
-    tac.append(f"{temp} = {' '.join(expr_parts)}")
-    return temp
-
-
-def display_tac(tac):
-    print("\n--- Three Address Code (TAC) ---")
-    for line in tac:
-        print(line)
-
-
-# --- Run independently ---
-if __name__ == "__main__":
-    import os
-    file_path = input("Enter the path of the C source file: ").strip()
-    if not os.path.exists(file_path):
-        print(f"File '{file_path}' not found!")
-        exit(1)
-
-    with open(file_path, "r") as f:
-        code = f.read()
-
-    # Lexical analysis
-    _, _, ordered_tokens = lexical_analysis(code)
-
-    # Parse
-    parse_tree, _ = parse(ordered_tokens)
-
-    # Generate TAC
-    tac = generate_tac_from_node(parse_tree)
-    display_tac(tac)
+from parser import parse
+from lexer import lexical_analysis
+from ast_nodes import Assign
+from arena import Arena, KIND_CODES as ARENA_KINDS
+from visitor import Visitor
+from context import CompilationContext
+from ir import Instr, Op, BINARY_OPS, COMPARISONS, SHIFTS, Temp, Var, Const, Str, Label, number, evaluate
+
+
+# --- C types ---
+INT, FLOAT, DOUBLE, STRING = "int", "float", "double", "string"
+
+
+class Typer:
+    """
+    C types of the operands being lowered, and the conversions C applies
+    implicitly, emitted as explicit TO_INT / TO_FLOAT instructions so that
+    every pass and backend sees them.
+    Literals with a '.' are double, variables have their declared type and
+    temps the type of the expression they hold. Arithmetic follows the
+    usual conversions. Float arithmetic is done in double and rounded with
+    TO_FLOAT, which gives exactly the single-precision result.
+    """
+
+    def __init__(self, tac, ctx):
+        self.tac = tac
+        self.ctx = ctx
+        self.temps = {}  # Temp -> type
+
+    def type_of(self, operand):
+        kind = type(operand)
+        if kind is Const:
+            return DOUBLE if type(operand.value) is float else INT
+        if kind is Str:
+            return STRING
+        if kind is Var:
+            declared = self.ctx.symbols.get(operand.value)
+            return declared if declared in (FLOAT, STRING) else INT
+        return self.temps.get(operand, INT)
+
+    def temp(self, kind):
+        temp = Temp(self.ctx.new_temp())
+        self.temps[temp] = kind
+        return temp
+
+    def materialize(self, operand):
+        """operand itself if it is a temp, else a fresh temp copied from it."""
+        if type(operand) is Temp:
+            return operand
+        temp = self.temp(self.type_of(operand))
+        self.tac.append(Instr(Op.COPY, temp, (operand,)))
+        return temp
+
+    def convert(self, operand, to):
+        """operand converted to INT or FLOAT; constants are converted in place."""
+        have = self.type_of(operand)
+        if have == to or have == STRING:
+            return operand
+        op = Op.TO_INT if to == INT else Op.TO_FLOAT
+        if type(operand) is Const:
+            value = evaluate(op, operand.value)
+            if value is not None:
+                return Const(value)
+        temp = self.temp(to)
+        self.tac.append(Instr(op, temp, (operand,)))
+        return temp
+
+    def binary(self, op, left, right):
+        """Temp (or rounded temp) holding left op right."""
+        kinds = (self.type_of(left), self.type_of(right))
+        single = FLOAT in kinds and DOUBLE not in kinds and STRING not in kinds and op not in SHIFTS
+        if single:
+            left, right = self.convert(left, FLOAT), self.convert(right, FLOAT)
+        if op in COMPARISONS or op in SHIFTS or STRING in kinds or kinds == (INT, INT):
+            result = INT
+        else:
+            result = DOUBLE
+        temp = self.temp(result)
+        self.tac.append(Instr(op, temp, (left, right)))
+        return self.convert(temp, FLOAT) if single and result == DOUBLE else temp
+
+    def negate(self, operand):
+        result = negate(operand, self.tac, self.ctx)
+        if type(result) is Temp:
+            self.temps[result] = self.type_of(operand)
+        return result
+
+    def assign(self, target, value):
+        """COPY target = value, converted to target's declared type."""
+        kind = self.type_of(target)
+        if kind in (INT, FLOAT):
+            value = self.convert(value, kind)
+        self.tac.append(Instr(Op.COPY, target, (self.materialize(value),)))
+
+    def returned(self, value):
+        """RETURN value, as an int."""
+        self.tac.append(Instr(Op.RETURN, None, (self.materialize(self.convert(value, INT)),)))
+
+
+class TacGenerator(Visitor):
+    """
+    Lowers a typed syntax tree to TAC instructions without recursion.
+    Expression handlers run post-order and leave ir operands on an operand
+    stack; statement enter handlers schedule their children with callbacks
+    that emit the branches and labels between them.
+    """
+
+    def __init__(self, tac=None, ctx=None):
+        super().__init__()
+        self.tac = [] if tac is None else tac
+        self.ctx = CompilationContext() if ctx is None else ctx
+        self.values = []
+        self.typer = Typer(self.tac, self.ctx)
+
+    def materialize(self):
+        """Pop the top operand, copying plain leaves into a fresh temp."""
+        return self.typer.materialize(self.values.pop())
+
+    def emit(self, op, *args):
+        return lambda: self.tac.append(Instr(op, None, args))
+
+    # --- Expressions ---
+    def leave_Name(self, node):
+        self.values.append(Var(node.ident))
+
+    def leave_Const(self, node):
+        self.values.append(Const(number(node.value)))
+
+    def leave_Str(self, node):
+        self.values.append(Str(node.value))
+
+    def leave_BinOp(self, node):
+        right = self.values.pop()
+        left = self.values.pop()
+        self.values.append(self.typer.binary(BINARY_OPS[node.op], left, right))
+
+    def leave_UnaryOp(self, node):
+        self.values.append(self.typer.negate(self.values.pop()))
+
+    # --- Declaration / Assignment ---
+    def enter_Declaration(self, node):
+        return [item for item in node.items if isinstance(item, Assign)]
+
+    def enter_Assign(self, node):
+        def store():
+            self.typer.assign(Var(node.target.ident), self.values.pop())
+        return (node.value, store)
+
+    # --- Return ---
+    def enter_Return(self, node):
+        if node.value is None:
+            return (self.emit(Op.RETURN, Const(0)),)
+
+        def ret():
+            self.typer.returned(self.values.pop())
+        return (node.value, ret)
+
+    # --- Print ---
+    def enter_Call(self, node):
+        mark = len(self.values)
+
+        def call():
+            args = tuple(self.values[mark:])
+            del self.values[mark:]
+            self.tac.append(Instr(Op.PRINT, None, args))
+        return (*node.args, call)
+
+    # --- If / Else ---
+    def enter_If(self, node):
+        lbl_false = Label(self.ctx.new_label())
+        lbl_end = Label(self.ctx.new_label())
+
+        def branch():
+            self.tac.append(Instr(Op.IF_FALSE, None, (self.materialize(), lbl_false)))
+        steps = [node.cond, branch, node.then,
+                 self.emit(Op.GOTO, lbl_end), self.emit(Op.LABEL, lbl_false)]
+        if node.orelse:
+            steps.append(node.orelse)
+        steps.append(self.emit(Op.LABEL, lbl_end))
+        return steps
+
+    # --- While Loop ---
+    def enter_While(self, node):
+        lbl_start = Label(self.ctx.new_label())
+        lbl_end = Label(self.ctx.new_label())
+        self.tac.append(Instr(Op.LABEL, None, (lbl_start,)))
+
+        def branch():
+            self.tac.append(Instr(Op.IF_FALSE, None, (self.materialize(), lbl_end)))
+        return (node.cond, branch, node.body,
+                self.emit(Op.GOTO, lbl_start), self.emit(Op.LABEL, lbl_end))
+
+    # --- For Loop ---
+    def enter_For(self, node):
+        labels = []
+
+        def start():
+            labels.extend((Label(self.ctx.new_label()), Label(self.ctx.new_label())))
+            self.tac.append(Instr(Op.LABEL, None, (labels[0],)))
+
+        def branch():
+            self.tac.append(Instr(Op.IF_FALSE, None, (self.materialize(), labels[1])))
+
+        def end():
+            self.tac.append(Instr(Op.GOTO, None, (labels[0],)))
+            self.tac.append(Instr(Op.LABEL, None, (labels[1],)))
+
+        steps = [node.init] if node.init else []
+        steps.append(start)
+        if node.cond:
+            steps += [node.cond, branch]
+        steps.append(node.body)
+        if node.step:
+            steps.append(node.step)
+        steps.append(end)
+        return steps
+
+
+def negate(operand, tac, ctx):
+    """Operand holding -operand: literals are negated in place, anything else gets a NEG."""
+    if type(operand) is Const:
+        return Const(-operand.value)
+    temp = Temp(ctx.new_temp())
+    tac.append(Instr(Op.NEG, temp, (operand,)))
+    return temp
+
+
+def generate_tac_from_node(node, tac=None, ctx=None):
+    """Traverse the syntax tree (typed nodes or an Arena) to generate a list of ir.Instr."""
+    if tac is None:
+        tac = []
+
+    # --- Flat arena trees have their own event-driven lowering ---
+    if isinstance(node, Arena):
+        return generate_tac_from_arena(node, tac, ctx)
+
+    TacGenerator(tac, ctx).walk(node)
+    return tac
+
+
+def generate_expression_tac(node, tac, ctx=None):
+    """Lower an expression tree into TAC and return the temp holding its value."""
+    gen = TacGenerator(tac, ctx)
+    gen.walk(node)
+    return gen.materialize()
+
+
+# Arena kind codes used by the event-driven lowering below.
+_EMPTY, _DECL, _ASSIGN, _IF, _WHILE, _FOR, _CALL, _RETURN, _BINOP, _UNARY, _NAME, _CONST, _STR = (
+    ARENA_KINDS[k] for k in ("Empty", "Declaration", "Assign", "If", "While", "For", "Call",
+                             "Return", "BinOp", "UnaryOp", "Name", "Const", "Str"))
+
+
+def generate_tac_from_arena(arena, tac=None, ctx=None):
+    """
+    Lower an arena tree to TAC by iterating Arena.walk() events.
+    Expression values live on an explicit operand stack and control
+    constructs keep their labels on a second stack, so the output matches
+    generate_tac_from_node on the equivalent typed tree.
+    """
+    if tac is None:
+        tac = []
+    if ctx is None:
+        ctx = CompilationContext()
+    kinds, texts, text_ids = arena.kinds, arena.texts, arena.text_ids
+    values = []      # expression operands
+    controls = []    # label pairs of the enclosing If/While/For nodes
+    call_marks = []  # operand-stack depth at the start of each Call
+    typer = Typer(tac, ctx)
+
+    def new_label():
+        return Label(ctx.new_label())
+
+    def materialize():
+        return typer.materialize(values.pop())
+
+    for node, parent, index, entering in arena.walk():
+        kind = kinds[node]
+        if entering:
+            if kind == _IF:
+                controls.append([new_label(), new_label()])
+            elif kind == _WHILE:
+                labels = [new_label(), new_label()]
+                controls.append(labels)
+                tac.append(Instr(Op.LABEL, None, (labels[0],)))
+            elif kind == _FOR:
+                controls.append([None, None])
+            elif kind == _CALL:
+                call_marks.append(len(values))
+            continue
+
+        # --- Leaving a node: expressions ---
+        parent_kind = kinds[parent] if parent >= 0 else _EMPTY
+        if kind == _NAME or kind == _CONST or kind == _STR:
+            if parent_kind != _DECL:
+                text = texts[text_ids[node]]
+                values.append(Var(text) if kind == _NAME else
+                              Const(number(text)) if kind == _CONST else Str(text))
+        elif kind == _BINOP:
+            right = values.pop()
+            left = values.pop()
+            values.append(typer.binary(BINARY_OPS[texts[text_ids[node]]], left, right))
+        elif kind == _UNARY:
+            values.append(typer.negate(values.pop()))
+
+        # --- Leaving a node: statements ---
+        elif kind == _ASSIGN:
+            value = values.pop()
+            typer.assign(values.pop(), value)
+        elif kind == _RETURN:
+            if arena.first_child[node] >= 0:
+                typer.returned(values.pop())
+            else:
+                tac.append(Instr(Op.RETURN, None, (Const(0),)))
+        elif kind == _CALL:
+            mark = call_marks.pop()
+            args = tuple(values[mark:])
+            del values[mark:]
+            tac.append(Instr(Op.PRINT, None, args))
+        elif kind == _IF:
+            tac.append(Instr(Op.LABEL, None, (controls.pop()[1],)))
+        elif kind == _WHILE or kind == _FOR:
+            lbl_start, lbl_end = controls.pop()
+            tac.append(Instr(Op.GOTO, None, (lbl_start,)))
+            tac.append(Instr(Op.LABEL, None, (lbl_end,)))
+
+        # --- Control flow between the children of If / While / For ---
+        if parent_kind == _IF:
+            lbl_false, lbl_end = controls[-1]
+            if index == 0:
+                tac.append(Instr(Op.IF_FALSE, None, (materialize(), lbl_false)))
+            elif index == 1:
+                tac.append(Instr(Op.GOTO, None, (lbl_end,)))
+                tac.append(Instr(Op.LABEL, None, (lbl_false,)))
+        elif parent_kind == _WHILE and index == 0:
+            tac.append(Instr(Op.IF_FALSE, None, (materialize(), controls[-1][1])))
+        elif parent_kind == _FOR:
+            # Children are init, cond, body, step (see arena.py)
+            labels = controls[-1]
+            if index == 0:
+                labels[0], labels[1] = new_label(), new_label()
+                tac.append(Instr(Op.LABEL, None, (labels[0],)))
+            elif index == 1 and kind != _EMPTY:
+                tac.append(Instr(Op.IF_FALSE, None, (materialize(), labels[1])))
+
+    return tac
+
+
+def display_tac(tac):
+    print("\n--- Three Address Code (TAC) ---")
+    for line in tac:
+        print(line)
+
+
+# --- Run independently ---
+if __name__ == "__main__":
+    import os
+    file_path = input("Enter the path of the C source file: ").strip()
+    if not os.path.exists(file_path):
+        print(f"File '{file_path}' not found!")
+        exit(1)
+
+    with open(file_path, "r") as f:
+        code = f.read()
+
+    # Lexical analysis
+    _, _, ordered_tokens = lexical_analysis(code)
+
+    ctx = CompilationContext()
+
+    # Parse
+    parse_tree, _ = parse(ordered_tokens, ctx=ctx)
+
+    # Generate TAC
+    tac = generate_tac_from_node(parse_tree, ctx=ctx)
+    display_tac(tac)
@@ -0,0 +1,78 @@
+# visitor.py
+"""
+Explicit-stack traversal framework for typed syntax trees.
+
+A Visitor subclass defines enter_<NodeName> and leave_<NodeName> methods.
+They are collected into per-node-type dispatch tables the first time a
+node type is seen; lookup follows the class MRO, so enter_Node acts as a
+fallback for every node. Nothing recurses on the Python call stack, so
+the depth of the tree is limited only by memory.
+
+An enter handler controls what is walked below its node:
+    - returning None walks node.iter_children() in order;
+    - returning an iterable walks exactly those steps in order, where a
+      step is either a node (walked fully) or a zero-argument callable
+      run at that point. An empty iterable prunes the subtree.
+The leave handler runs after all of the node's steps.
+"""
+
+_ENTER, _LEAVE, _CALL = 0, 1, 2
+
+
+class Visitor:
+
+    def __init__(self):
+        self._pre = {}
+        self._post = {}
+
+    def _resolve(self, table, prefix, cls):
+        for klass in cls.__mro__:
+            handler = getattr(self, prefix + klass.__name__, None)
+            if handler is not None:
+                break
+        table[cls] = handler
+        return handler
+
+    def walk(self, root):
+        pre, post = self._pre, self._post
+        stack = [(_ENTER, root)]
+        pop, push = stack.pop, stack.append
+        while stack:
+            action, item = pop()
+            if action == _CALL:
+                item()
+                continue
+            cls = type(item)
+            if action == _LEAVE:
+                post[cls](item)
+                continue
+
+            enter = pre[cls] if cls in pre else self._resolve(pre, "enter_", cls)
+            leave = post[cls] if cls in post else self._resolve(post, "leave_", cls)
+            steps = enter(item) if enter is not None else None
+            if leave is not None:
+                push((_LEAVE, item))
+            if steps is None:
+                steps = item.iter_children()
+            for step in reversed(list(steps)):
+                push((_CALL, step) if callable(step) else (_ENTER, step))
+        return self
+
+
+class TreePrinter(Visitor):
+    """
+    Prints the indented tree layout used by Node.display. Each line is
+    indented by its node's depth, so a tree n levels deep prints O(n^2)
+    characters; walking it is linear, the output is not.
+    """
+
+    def __init__(self, level=0):
+        super().__init__()
+        self.level = level
+
+    def enter_Node(self, node):
+        print(" " * (self.level * 4) + ("├── " if self.level > 0 else "") + node.label())
+        self.level += 1
+
+    def leave_Node(self, node):
+        self.level -= 1
@@ -0,0 +1,360 @@
+# vm.py
+"""
+Bytecode virtual machine: the reference runtime for TAC.
+
+compile_bytecode() encodes a list of ir.Instr as a flat array of ints,
+four per instruction:
+
+    opcode, dest, a, b
+
+Operands are indices into one memory array. Constants and string
+literals come first and are loaded once. Every Temp and Var then gets a
+slot, zero-initialized. Labels disappear: a jump's dest is the index of
+its target instruction. A comparison whose only reader is the next
+IF_FALSE becomes one JUMP_UNLESS_<cmp> instruction, so loop conditions
+dispatch once instead of twice. PRINT's a indexes a table of
+(format, argument indices).
+
+run() executes a Program with the same semantics as ir.evaluate():
+values are Python ints and floats, int arithmetic wraps to 32 bits and
+'/' truncates toward zero. Declared types are kept by the TO_INT and
+TO_FLOAT instructions the TAC generator puts at every conversion, so a
+float variable holds a single-precision value. It also counts how often each instruction
+executed, so the dynamic instruction count of a program is known at
+every optimization level.
+"""
+import math
+import re
+import sys
+from array import array
+
+from lexer import lexical_analysis
+from parser import parse
+from tac_generator import generate_tac_from_node
+from optimizer import optimize_tac
+from context import CompilationContext
+from ir import Op, Temp, Var, Const, Str, wrap_int, to_int, to_float32, INT_MIN, INT_MAX
+from ac_generator import fused_branches
+
+# --- Opcodes (plain ints: the dispatch loop compares against them directly) ---
+MOVE, ADD, SUB, MUL, DIV, SHL, SHR, NEG = range(8)
+LT, GT, LE, GE, EQ, NE = range(8, 14)
+JUMP, JUMP_IF_FALSE = 14, 15
+JUMP_UNLESS_LT, JUMP_UNLESS_GT, JUMP_UNLESS_LE, JUMP_UNLESS_GE, JUMP_UNLESS_EQ, JUMP_UNLESS_NE = range(16, 22)
+PRINT, RETURN = 22, 23
+TO_INT, TO_FLOAT = 24, 25
+
+NAMES = ("MOVE", "ADD", "SUB", "MUL", "DIV", "SHL", "SHR", "NEG",
+         "LT", "GT", "LE", "GE", "EQ", "NE", "JUMP", "JUMP_IF_FALSE",
+         "JUMP_UNLESS_LT", "JUMP_UNLESS_GT", "JUMP_UNLESS_LE", "JUMP_UNLESS_GE",
+         "JUMP_UNLESS_EQ", "JUMP_UNLESS_NE", "PRINT", "RETURN", "TO_INT", "TO_FLOAT")
+
+_FROM_OP = {
+    Op.COPY: MOVE, Op.ADD: ADD, Op.SUB: SUB, Op.MUL: MUL, Op.DIV: DIV,
+    Op.SHL: SHL, Op.SHR: SHR, Op.NEG: NEG, Op.TO_INT: TO_INT, Op.TO_FLOAT: TO_FLOAT,
+    Op.LT: LT, Op.GT: GT, Op.LE: LE, Op.GE: GE, Op.EQ: EQ, Op.NE: NE,
+}
+_UNLESS = {Op.LT: JUMP_UNLESS_LT, Op.GT: JUMP_UNLESS_GT, Op.LE: JUMP_UNLESS_LE,
+           Op.GE: JUMP_UNLESS_GE, Op.EQ: JUMP_UNLESS_EQ, Op.NE: JUMP_UNLESS_NE}
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0", "\\": "\\", '"': '"', "'": "'"}
+_CONVERSION = re.compile(r"%[-+ #0]*\d*(?:\.\d+)?([diouxXeEfFgGcs%])")
+
+
+class VMError(Exception):
+    """A run-time fault: division by zero, an invalid operand or a bad print."""
+
+
+class Program:
+    __slots__ = ("code", "memory", "names", "prints")
+
+    def __init__(self, code, memory, names, prints):
+        self.code = code        # array('i'): opcode, dest, a, b per instruction
+        self.memory = memory    # initial memory: constants, then one zeroed slot per name
+        self.names = names      # memory index -> operand, for disassembly
+        self.prints = prints    # PRINT table: (format or None, argument indices)
+
+    def __len__(self):
+        return len(self.code) // 4
+
+
+class Execution:
+    """Outcome of run(): the returned value and per-instruction execution counts."""
+    __slots__ = ("value", "hits", "program")
+
+    def __init__(self, value, hits, program):
+        self.value = value
+        self.hits = hits
+        self.program = program
+
+    @property
+    def steps(self):
+        return sum(self.hits)
+
+    def counts(self):
+        """{opcode name: dynamic count}, most executed first."""
+        code = self.program.code
+        found = {}
+        for index, hits in enumerate(self.hits):
+            if hits:
+                name = NAMES[code[4 * index]]
+                found[name] = found.get(name, 0) + hits
+        return dict(sorted(found.items(), key=lambda item: -item[1]))
+
+
+# --- Encoding ---
+def _unescape(literal):
+    """Contents of a C string literal (quotes included), escapes decoded."""
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), literal[1:-1])
+
+
+def compile_bytecode(tac):
+    """Encode a list of ir.Instr as a Program."""
+    index = {}
+    constants = []
+    slots = []
+
+    def operand(x):
+        if x not in index:
+            if type(x) is Const or type(x) is Str:
+                index[x] = len(constants)
+                constants.append(x)
+            else:
+                index[x] = None  # numbered after all constants are known
+                slots.append(x)
+        return x
+
+    for instr in tac:
+        for x in instr.args:
+            if type(x) in (Const, Str, Temp, Var):
+                operand(x)
+        if instr.dest is not None:
+            operand(instr.dest)
+    for n, name in enumerate(slots):
+        index[name] = len(constants) + n
+    memory = [_unescape(c.value) if type(c) is Str else c.value for c in constants]
+    memory += [0] * len(slots)
+    names = constants + slots
+
+    fused = fused_branches(tac)
+    targets = {}
+    position = 0
+    for i, instr in enumerate(tac):
+        if instr.op == Op.LABEL:
+            targets[instr.args[0]] = position
+        elif i - 1 not in fused:
+            position += 1
+
+    code = array("i")
+    prints = []
+    for i, instr in enumerate(tac):
+        op, args = instr.op, instr.args
+        if i in fused:
+            words = (_UNLESS[op], targets[tac[i + 1].args[1]], index[args[0]], index[args[1]])
+        elif i - 1 in fused or op == Op.LABEL:
+            continue
+        elif op in _FROM_OP:
+            b = index[args[1]] if len(args) > 1 else 0
+            words = (_FROM_OP[op], index[instr.dest], index[args[0]], b)
+        elif op == Op.IF_FALSE:
+            words = (JUMP_IF_FALSE, targets[args[1]], index[args[0]], 0)
+        elif op == Op.GOTO:
+            words = (JUMP, targets[args[0]], 0, 0)
+        elif op == Op.PRINT:
+            if args and type(args[0]) is Str:
+                fmt, values = _unescape(args[0].value), args[1:]
+                conversions = [m.group(1) for m in _CONVERSION.finditer(fmt)]
+                values = values[:len(conversions) - conversions.count("%")]
+            else:
+                fmt, values = None, args
+            words = (PRINT, 0, len(prints), 0)
+            prints.append((fmt, tuple(index[x] for x in values)))
+        elif op == Op.RETURN:
+            words = (RETURN, 0, index[args[0]], 0)
+        else:
+            raise ValueError(f"Cannot encode instruction: {instr}")
+        code.extend(words)
+    return Program(code, memory, names, prints)
+
+
+def disassemble(program):
+    """Readable listing of a Program, one line per instruction."""
+    def name(i):
+        operand = program.names[i]
+        return repr(program.memory[i]) if type(operand) is Str else str(operand)
+
+    lines = []
+    code = program.code
+    for pc in range(len(program)):
+        op, d, a, b = code[4 * pc:4 * pc + 4]
+        text = NAMES[op]
+        if op == JUMP:
+            text += f" @{d}"
+        elif op == JUMP_IF_FALSE:
+            text += f" {name(a)}, @{d}"
+        elif JUMP_UNLESS_LT <= op <= JUMP_UNLESS_NE:
+            text += f" {name(a)}, {name(b)}, @{d}"
+        elif op == PRINT:
+            fmt, values = program.prints[a]
+            text += " " + ", ".join(([repr(fmt)] if fmt is not None else []) + [name(i) for i in values])
+        elif op == RETURN:
+            text += f" {name(a)}"
+        elif op in (MOVE, NEG, TO_INT, TO_FLOAT):
+            text += f" {name(d)}, {name(a)}"
+        else:
+            text += f" {name(d)}, {name(a)}, {name(b)}"
+        lines.append(f"{pc:>5}  {text}")
+    return lines
+
+
+# --- Execution ---
+def _divide(x, y):
+    if type(x) is int and type(y) is int:
+        if y == 0:
+            raise VMError("integer division by zero")
+        quotient = abs(x) // abs(y)
+        return wrap_int(quotient if (x < 0) == (y < 0) else -quotient)
+    x, y = float(x), float(y)
+    if y == 0.0:
+        if x == 0.0 or x != x:
+            return math.nan
+        return math.copysign(math.inf, x) * math.copysign(1.0, y)
+    return x / y
+
+
+def _shift(op, x, y):
+    if type(x) is not int or type(y) is not int:
+        raise VMError("shift of a non-integer")
+    return wrap_int(x << (y & 31) if op == SHL else x >> (y & 31))
+
+
+def _convert(op, x):
+    if type(x) is str:
+        raise VMError("conversion of a string")
+    return to_int(x) if op == TO_INT else to_float32(x)
+
+
+def _print(fmt, values):
+    if fmt is None:
+        return " ".join(str(v) for v in values)
+    try:
+        return fmt % values
+    except (TypeError, ValueError) as e:
+        raise VMError(f"bad printf arguments for {fmt!r}: {e}") from None
+
+
+def run(program, out=None):
+    """
+    Execute program, writing PRINT output to out (default sys.stdout).
+    Returns an Execution; its value is RETURN's operand, or None if the
+    code runs off its end.
+    """
+    write = (out or sys.stdout).write
+    code = program.code
+    instrs = [tuple(code[i:i + 4]) for i in range(0, len(code), 4)]
+    prints = program.prints
+    memory = list(program.memory)
+    hits = [0] * len(instrs)
+    end = len(instrs)
+    pc = 0
+    while pc < end:
+        op, d, a, b = instrs[pc]
+        hits[pc] += 1
+        pc += 1
+        if op == MOVE:
+            memory[d] = memory[a]
+        elif op == ADD:
+            x = memory[a] + memory[b]
+            memory[d] = x if type(x) is float or INT_MIN <= x <= INT_MAX else wrap_int(x)
+        elif op == JUMP_UNLESS_LT:
+            if not memory[a] < memory[b]:
+                pc = d
+        elif op == JUMP:
+            pc = d
+        elif op == JUMP_IF_FALSE:
+            if not memory[a]:
+                pc = d
+        elif op == SUB:
+            x = memory[a] - memory[b]
+            memory[d] = x if type(x) is float or INT_MIN <= x <= INT_MAX else wrap_int(x)
+        elif op == MUL:
+            x = memory[a] * memory[b]
+            memory[d] = x if type(x) is float or INT_MIN <= x <= INT_MAX else wrap_int(x)
+        elif op == JUMP_UNLESS_LE:
+            if not memory[a] <= memory[b]:
+                pc = d
+        elif op == JUMP_UNLESS_GT:
+            if not memory[a] > memory[b]:
+                pc = d
+        elif op == JUMP_UNLESS_GE:
+            if not memory[a] >= memory[b]:
+                pc = d
+        elif op == JUMP_UNLESS_NE:
+            if not memory[a] != memory[b]:
+                pc = d
+        elif op == JUMP_UNLESS_EQ:
+            if not memory[a] == memory[b]:
+                pc = d
+        elif op == DIV:
+            memory[d] = _divide(memory[a], memory[b])
+        elif op == LT:
+            memory[d] = 1 if memory[a] < memory[b] else 0
+        elif op == GT:
+            memory[d] = 1 if memory[a] > memory[b] else 0
+        elif op == LE:
+            memory[d] = 1 if memory[a] <= memory[b] else 0
+        elif op == GE:
+            memory[d] = 1 if memory[a] >= memory[b] else 0
+        elif op == EQ:
+            memory[d] = 1 if memory[a] == memory[b] else 0
+        elif op == NE:
+            memory[d] = 1 if memory[a] != memory[b] else 0
+        elif op == NEG:
+            x = memory[a]
+            memory[d] = -x if type(x) is float else wrap_int(-x)
+        elif op == SHL or op == SHR:
+            memory[d] = _shift(op, memory[a], memory[b])
+        elif op == TO_INT or op == TO_FLOAT:
+            memory[d] = _convert(op, memory[a])
+        elif op == PRINT:
+            fmt, args = prints[a]
+            write(_print(fmt, tuple(memory[i] for i in args)))
+        elif op == RETURN:
+            return Execution(memory[a], hits, program)
+        else:
+            raise VMError(f"Unknown opcode {op} at {pc - 1}")
+    return Execution(None, hits, program)
+
+
+def display_execution(execution):
+    print("\n--- Bytecode VM ---")
+    print(f"Instructions: {len(execution.program)} static, {execution.steps} executed")
+    for name, count in execution.counts().items():
+        print(f"{name:<16} {count:>10}")
+    print(f"Returned: {execution.value}")
+
+
+# --- Run independently ---
+if __name__ == "__main__":
+    file_path = input("Enter the path of the C source file: ").strip()
+    try:
+        with open(file_path, "r") as f:
+            code = f.read()
+    except FileNotFoundError:
+        print(f"Error: File '{file_path}' not found.")
+        exit(1)
+
+    ctx = CompilationContext()
+    _, _, ordered_tokens = lexical_analysis(code)
+    parse_tree, _ = parse(ordered_tokens, ctx=ctx)
+    program = compile_bytecode(optimize_tac(generate_tac_from_node(parse_tree, ctx=ctx), ctx))
+    print("\n--- Bytecode ---")
+    for line in disassemble(program):
+        print(line)
+    print("\n--- Output ---")
+    try:
+        execution = run(program)
+    except VMError as e:
+        print(f"Error: {e}")
+        exit(1)
+    display_execution(execution)
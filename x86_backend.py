@@ -0,0 +1,513 @@
+# x86_backend.py
+"""
+x86-64 System V backend: GAS (AT&T syntax) assembly for a list of
+ir.Instr, assembled and linked into a native executable by the system C
+compiler.
+
+The program is a single function, main, with an rbp frame. Values are
+int, double or string pointer. The TAC generator makes C's conversions
+explicit (TO_INT truncates, TO_FLOAT rounds to single precision), so a
+float variable is kept as a double that already holds a float value,
+and float arithmetic is done in double and rounded by the TO_FLOAT after
+it, exactly as the single-precision instruction would. Where an int
+still meets a double (mixed arithmetic, hand-written TAC), it is
+converted the way C would.
+
+Ints live in the callee-saved registers picked by the linear-scan
+allocator, so they survive printf calls. Spilled ints, doubles and
+string pointers get an 8-byte stack slot. Floating-point arithmetic uses
+SSE scalar instructions in xmm0/xmm1. %eax, %ecx and %edx are scratch.
+PRINT becomes a varargs call to printf, with %al holding the number of
+vector registers used.
+"""
+import os
+import shutil
+import struct
+import subprocess
+
+from lexer import lexical_analysis
+from parser import parse
+from tac_generator import generate_tac_from_node
+from optimizer import optimize_tac
+from context import CompilationContext
+from ir import (Op, Temp, Var, Const, Str, ARITHMETIC, COMPARISONS, CONVERSIONS, SHIFTS,
+                evaluate, wrap_int)
+from regalloc import allocate_registers
+from ac_generator import SWAPPED, fused_branches
+
+INT, FLOAT, DOUBLE, STRING = "int", "float", "double", "string"
+_RANK = {INT: 0, DOUBLE: 1}
+
+CALLEE_SAVED = ("%rbx", "%r12", "%r13", "%r14", "%r15")
+LOW32 = {"%rbx": "%ebx", "%r12": "%r12d", "%r13": "%r13d", "%r14": "%r14d", "%r15": "%r15d"}
+INT_ARGS = ("%rdi", "%rsi", "%rdx", "%rcx", "%r8", "%r9")
+INT_ARGS32 = ("%edi", "%esi", "%edx", "%ecx", "%r8d", "%r9d")
+SSE_ARGS = 8
+
+# setcc / jcc condition codes for signed int comparisons.
+CONDITION = {Op.LT: "l", Op.GT: "g", Op.LE: "le", Op.GE: "ge", Op.EQ: "e", Op.NE: "ne"}
+NEGATED = {Op.LT: "ge", Op.GT: "le", Op.LE: "g", Op.GE: "l", Op.EQ: "ne", Op.NE: "e"}
+INT_OPS = {Op.ADD: "addl", Op.SUB: "subl", Op.MUL: "imull", Op.SHL: "sall", Op.SHR: "sarl"}
+SSE_OPS = {Op.ADD: "add", Op.SUB: "sub", Op.MUL: "mul", Op.DIV: "div"}
+
+
+# --- Types ---
+def value_types(tac, symbols):
+    """
+    Returns type_of(operand) -> INT, DOUBLE or STRING; float variables are
+    DOUBLE. A temp with several definitions (e.g. a strength-reduced
+    running sum) gets the widest of their types.
+    """
+    declared = {Var(name): DOUBLE if t == FLOAT else t
+                for name, t in symbols.items() if t in (FLOAT, STRING)}
+    temps = {}
+
+    def type_of(operand):
+        kind = type(operand)
+        if kind is Const:
+            return DOUBLE if type(operand.value) is float else INT
+        if kind is Str:
+            return STRING
+        if kind is Var:
+            return declared.get(operand, INT)
+        return temps.get(operand, INT)
+
+    changed = True
+    while changed:
+        changed = False
+        for instr in tac:
+            if type(instr.dest) is not Temp:
+                continue
+            new = _result_type(instr, type_of)
+            old = temps.get(instr.dest)
+            if old is not None:
+                new = _widest(old, new, instr)
+            if new != old:
+                temps[instr.dest] = new
+                changed = True
+    return type_of
+
+
+def _widest(a, b, instr):
+    if a == b:
+        return a
+    if STRING in (a, b):
+        raise ValueError(f"Unsupported mix of string and number in: {instr}")
+    return a if _RANK[a] > _RANK[b] else b
+
+
+def _result_type(instr, type_of):
+    op = instr.op
+    if op in COMPARISONS or op in SHIFTS:
+        kinds = {type_of(a) for a in instr.args}
+        if STRING in kinds or (op in SHIFTS and kinds != {INT}):
+            raise ValueError(f"Unsupported operand types in: {instr}")
+        return INT
+    if op == Op.COPY:
+        return type_of(instr.args[0])
+    if op in CONVERSIONS:
+        if type_of(instr.args[0]) == STRING:
+            raise ValueError(f"Unsupported operand types in: {instr}")
+        return INT if op == Op.TO_INT else DOUBLE
+    if op == Op.NEG or op in ARITHMETIC:
+        kinds = [type_of(a) for a in instr.args]
+        if STRING in kinds:
+            raise ValueError(f"Unsupported operand types in: {instr}")
+        return max(kinds, key=_RANK.get)
+    return None
+
+
+# --- Code generation ---
+class X86Generator:
+    """Assembly for one function; see generate_x86_assembly()."""
+
+    def __init__(self, tac, ctx, function="main"):
+        self.tac = tac
+        self.function = function
+        self.type_of = value_types(tac, ctx.symbols)
+        self.lines = []
+        self.strings = {}  # Str value -> .LC label
+
+        # Compare-and-branch pairs on ints become cmpl + jcc; their temp is never stored.
+        self.fused = {i for i in fused_branches(tac)
+                      if all(self.type_of(a) == INT for a in tac[i].args)}
+        names = []
+        for instr in tac:
+            names += instr.uses()
+            if type(instr.dest) is Temp or type(instr.dest) is Var:
+                names.append(instr.dest)
+        names = list(dict.fromkeys(names))
+        fused_temps = {tac[i].dest for i in self.fused}
+        others = {name for name in names if self.type_of(name) != INT}
+        allocation = allocate_registers(tac, len(CALLEE_SAVED), fused_temps | others, scratch=0)
+        self.registers = {}
+        for name in names:
+            reg = allocation.register(name)
+            if reg is not None:
+                self.registers[name] = CALLEE_SAVED[int(reg[1:]) - 1]
+        self.saved = [r for r in CALLEE_SAVED if r in self.registers.values()]
+        self.slots = {}  # everything else -> offset from %rbp, below the saved registers
+        for name in names:
+            if name not in self.registers and name not in fused_temps:
+                self.slots[name] = -8 * (len(self.saved) + len(self.slots) + 1)
+
+    def emit(self, line):
+        self.lines.append("    " + line)
+
+    # --- Operands ---
+    def string_label(self, s):
+        if s.value not in self.strings:
+            self.strings[s.value] = f".LC{len(self.strings)}"
+        return self.strings[s.value]
+
+    def where(self, x):
+        """Register or stack slot of a name; the immediate of an int constant."""
+        if type(x) is Const:
+            return f"${wrap_int(int(x.value))}"
+        reg = self.registers.get(x)
+        if reg is not None:
+            return LOW32[reg]
+        return f"{self.slots[x]}(%rbp)"
+
+    def load_int(self, x, reg):
+        """x converted to int in the 32-bit register reg."""
+        kind = self.type_of(x)
+        if kind == INT or type(x) is Const:
+            source = self.where(x)
+            if source != reg:
+                self.emit(f"movl {source}, {reg}")
+        elif kind == STRING:
+            self.load_string(x, reg)
+        else:
+            self.emit(f"cvttsd2si {self.where(x)}, {reg}")
+
+    def load_sse(self, x, xmm):
+        """x converted to double in xmm."""
+        if type(x) is Const:
+            bits = struct.unpack("<q", struct.pack("<d", float(x.value)))[0]
+            self.emit(f"movabsq ${bits}, %rax")
+            self.emit(f"movq %rax, {xmm}")
+        elif self.type_of(x) == INT:
+            self.emit(f"cvtsi2sdl {self.where(x)}, {xmm}")
+        else:
+            self.emit(f"movsd {self.where(x)}, {xmm}")
+
+    def load_string(self, x, reg):
+        """The char pointer x in the 64-bit register reg."""
+        if type(x) is Str:
+            self.emit(f"leaq {self.string_label(x)}(%rip), {reg}")
+        else:
+            self.emit(f"movq {self.where(x)}, {reg}")
+
+    def load(self, x):
+        """x in its own type's accumulator: %eax, %xmm0 or %rax. Returns the type."""
+        kind = self.type_of(x)
+        if kind == INT:
+            self.load_int(x, "%eax")
+        elif kind == STRING:
+            self.load_string(x, "%rax")
+        else:
+            self.load_sse(x, "%xmm0")
+        return kind
+
+    def store(self, dest, kind):
+        """Store the accumulator of type kind into dest, converting to dest's type."""
+        want = self.type_of(dest)
+        if want == INT:
+            if kind == DOUBLE:
+                self.emit("cvttsd2si %xmm0, %eax")
+            self.emit(f"movl %eax, {self.where(dest)}")
+        elif want == STRING:
+            self.emit(f"movq %rax, {self.where(dest)}")
+        else:
+            if kind == INT:
+                self.emit("cvtsi2sdl %eax, %xmm0")
+            self.emit(f"movsd %xmm0, {self.where(dest)}")
+
+    # --- Instructions ---
+    def copy(self, dest, src):
+        if self.type_of(dest) == INT and self.type_of(src) == INT:
+            target, source = self.where(dest), self.where(src)
+            if target == source:
+                return
+            if target.startswith("%") or not source.endswith("(%rbp)"):
+                self.emit(f"movl {source}, {target}")
+                return
+        self.store(dest, self.load(src))
+
+    def convert(self, instr):
+        """TO_INT truncates with cvttsd2si; TO_FLOAT rounds through single precision."""
+        src = instr.args[0]
+        if instr.op == Op.TO_INT:
+            self.load_int(src, "%eax")
+            self.store(instr.dest, INT)
+            return
+        if self.type_of(src) == INT and type(src) is not Const:
+            self.emit(f"cvtsi2ssl {self.where(src)}, %xmm0")
+        else:
+            self.load_sse(src, "%xmm0")
+            self.emit("cvtsd2ss %xmm0, %xmm0")
+        self.emit("cvtss2sd %xmm0, %xmm0")
+        self.store(instr.dest, DOUBLE)
+
+    def arithmetic(self, instr):
+        op, (a, b) = instr.op, instr.args
+        kind = _result_type(instr, self.type_of)
+        if kind == INT and op in COMPARISONS:
+            kind = max((self.type_of(a), self.type_of(b)), key=_RANK.get)
+        if kind == DOUBLE:
+            self.load_sse(a, "%xmm0")
+            self.load_sse(b, "%xmm1")
+            if op in SSE_OPS:
+                self.emit(f"{SSE_OPS[op]}sd %xmm1, %xmm0")
+                self.store(instr.dest, DOUBLE)
+                return
+            self.compare_sse(op)
+        elif op in COMPARISONS:
+            self.load_int(a, "%eax")
+            self.emit(f"cmpl {self.where(b)}, %eax")
+            self.emit(f"set{CONDITION[op]} %al")
+            self.emit("movzbl %al, %eax")
+        elif op == Op.DIV:
+            self.load_int(a, "%eax")
+            self.emit("cltd")
+            if type(b) is Const:
+                self.load_int(b, "%ecx")
+                self.emit("idivl %ecx")
+            else:
+                self.emit(f"idivl {self.where(b)}")
+        elif op in SHIFTS:
+            self.load_int(a, "%eax")
+            if type(b) is Const:
+                self.emit(f"{INT_OPS[op]} ${b.value & 31}, %eax")
+            else:
+                self.load_int(b, "%ecx")
+                self.emit(f"{INT_OPS[op]} %cl, %eax")
+        else:
+            target = self.where(instr.dest) if self.type_of(instr.dest) == INT else ""
+            if target == self.where(b) and op != Op.SUB:
+                a, b = b, a
+            if target.startswith("%") and target != self.where(b):
+                # Two-address form straight into dest's register
+                self.load_int(a, target)
+                self.emit(f"{INT_OPS[op]} {self.where(b)}, {target}")
+                return
+            self.load_int(a, "%eax")
+            self.emit(f"{INT_OPS[op]} {self.where(b)}, %eax")
+        self.store(instr.dest, INT)
+
+    def compare_sse(self, op):
+        """%eax = xmm0 op xmm1; unordered (NaN) compares false except !=."""
+        if op in (Op.LT, Op.LE):
+            self.emit("ucomisd %xmm0, %xmm1")  # a < b is b > a
+        else:
+            self.emit("ucomisd %xmm1, %xmm0")
+        if op in (Op.LT, Op.GT):
+            self.emit("seta %al")
+        elif op in (Op.LE, Op.GE):
+            self.emit("setae %al")
+        elif op == Op.EQ:
+            self.emit("sete %al")
+            self.emit("setnp %cl")
+            self.emit("andb %cl, %al")
+        else:
+            self.emit("setne %al")
+            self.emit("setp %cl")
+            self.emit("orb %cl, %al")
+        self.emit("movzbl %al, %eax")
+
+    def negate(self, instr):
+        kind = self.load(instr.args[0])
+        if kind == INT:
+            self.emit("negl %eax")
+        else:
+            self.emit("movq %xmm0, %rax")
+            self.emit("btcq $63, %rax")
+            self.emit("movq %rax, %xmm0")
+        self.store(instr.dest, kind)
+
+    def branch_unless(self, op, a, b, label):
+        """Jump to label unless the int comparison a op b holds."""
+        if type(a) is Const and type(b) is Const:
+            if not evaluate(op, a.value, b.value):
+                self.emit(f"jmp .{label}")
+            return
+        if type(a) is Const:
+            op, a, b = SWAPPED[op], b, a
+        left, right = self.where(a), self.where(b)
+        if left.endswith("(%rbp)") and right.endswith("(%rbp)"):
+            self.emit(f"movl {left}, %eax")
+            left = "%eax"
+        self.emit(f"cmpl {right}, {left}")
+        self.emit(f"j{NEGATED[op]} .{label}")
+
+    def if_false(self, x, label):
+        kind = self.type_of(x)
+        if type(x) is Const or kind == INT:
+            where = self.where(x)
+            if where.startswith("%"):
+                self.emit(f"testl {where}, {where}")
+                self.emit(f"je .{label}")
+            else:
+                self.branch_unless(Op.NE, x, Const(0), label)
+        elif kind == STRING:
+            self.load_string(x, "%rax")
+            self.emit("testq %rax, %rax")
+            self.emit(f"je .{label}")
+        else:
+            self.load_sse(x, "%xmm0")
+            self.emit("pxor %xmm1, %xmm1")
+            self.emit("ucomisd %xmm1, %xmm0")
+            self.emit("jp 1f")  # NaN is true
+            self.emit(f"je .{label}")
+            self.lines.append("1:")
+
+    def print_call(self, args):
+        """printf(args...) following the System V varargs convention."""
+        ints, sses, stack = [], [], []
+        for x in args:
+            kind = self.type_of(x)
+            if kind == DOUBLE:
+                (sses if len(sses) < SSE_ARGS else stack).append(x)
+            else:
+                (ints if len(ints) < len(INT_ARGS) else stack).append(x)
+        if len(stack) % 2:
+            self.emit("subq $8, %rsp")  # keep %rsp 16-byte aligned at the call
+        for x in reversed(stack):
+            kind = self.type_of(x)
+            if kind == DOUBLE:
+                self.load_sse(x, "%xmm0")
+                self.emit("movq %xmm0, %rax")
+            elif kind == STRING:
+                self.load_string(x, "%rax")
+            else:
+                self.load_int(x, "%eax")
+            self.emit("pushq %rax")
+        for n, x in enumerate(sses):
+            self.load_sse(x, f"%xmm{n}")
+        for n, x in enumerate(ints):
+            if self.type_of(x) == STRING:
+                self.load_string(x, INT_ARGS[n])
+            else:
+                self.load_int(x, INT_ARGS32[n])
+        self.emit(f"movl ${len(sses)}, %eax")
+        self.emit("call printf@PLT")
+        if stack:
+            self.emit(f"addq ${8 * (len(stack) + len(stack) % 2)}, %rsp")
+
+    def generate(self):
+        """The complete assembly file as a list of lines."""
+        tac = self.tac
+        for position, instr in enumerate(tac):
+            op, args = instr.op, instr.args
+            if position in self.fused:
+                self.branch_unless(op, args[0], args[1], tac[position + 1].args[1])
+            elif position - 1 in self.fused:
+                continue
+            elif op == Op.LABEL:
+                self.lines.append(f".{args[0]}:")
+            elif op == Op.GOTO:
+                self.emit(f"jmp .{args[0]}")
+            elif op == Op.IF_FALSE:
+                self.if_false(args[0], args[1])
+            elif op == Op.COPY:
+                self.copy(instr.dest, args[0])
+            elif op == Op.NEG:
+                self.negate(instr)
+            elif op in CONVERSIONS:
+                self.convert(instr)
+            elif op in ARITHMETIC or op in COMPARISONS:
+                self.arithmetic(instr)
+            elif op == Op.PRINT:
+                self.print_call(args)
+            elif op == Op.RETURN:
+                self.load_int(args[0], "%eax")
+                if position < len(tac) - 1:
+                    self.emit("jmp .Lreturn")
+        if not tac or tac[-1].op != Op.RETURN:
+            self.emit("xorl %eax, %eax")
+        return self.prologue() + self.lines + self.epilogue()
+
+    def prologue(self):
+        lines = []
+        if self.strings:
+            lines.append("    .section .rodata")
+            for value, label in self.strings.items():
+                lines += [f"{label}:", f"    .string {value}"]
+        lines += ["    .text", f"    .globl {self.function}",
+                  f"    .type {self.function}, @function", f"{self.function}:",
+                  "    pushq %rbp", "    movq %rsp, %rbp"]
+        lines += [f"    pushq {reg}" for reg in self.saved]
+        frame = 8 * len(self.slots)
+        if (frame + 8 * len(self.saved)) % 16:
+            frame += 8
+        if frame:
+            lines.append(f"    subq ${frame}, %rsp")
+        return lines
+
+    def epilogue(self):
+        lines = [".Lreturn:"]
+        if self.saved:
+            lines.append(f"    leaq -{8 * len(self.saved)}(%rbp), %rsp")
+            lines += [f"    popq {reg}" for reg in reversed(self.saved)]
+        else:
+            lines.append("    movq %rbp, %rsp")
+        lines += ["    popq %rbp", "    ret", f"    .size {self.function}, .-{self.function}",
+                  '    .section .note.GNU-stack,"",@progbits']
+        return lines
+
+
+def generate_x86_assembly(tac, ctx=None, function="main"):
+    """Translate a list of ir.Instr into the lines of a GAS x86-64 assembly file."""
+    ctx = ctx or CompilationContext()
+    return X86Generator(tac, ctx, function).generate()
+
+
+def build_executable(assembly, output, cc=None):
+    """
+    Write assembly to output + ".s" and link it into the executable output
+    with the system C compiler (cc, else $CC, else gcc). Returns the path
+    of the .s file; raises RuntimeError if the toolchain fails.
+    """
+    cc = cc or os.environ.get("CC") or "gcc"
+    if shutil.which(cc) is None:
+        raise RuntimeError(f"C compiler '{cc}' not found")
+    source = output + ".s"
+    with open(source, "w") as f:
+        f.write("\n".join(assembly) + "\n")
+    result = subprocess.run([cc, source, "-o", output], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{cc} failed:\n{result.stderr}")
+    return source
+
+
+def display_x86_assembly(assembly):
+    print("\n--- x86-64 Assembly ---")
+    for line in assembly:
+        print(line)
+
+
+# --- Run independently ---
+if __name__ == "__main__":
+    file_path = input("Enter the path of the C source file: ").strip()
+    try:
+        with open(file_path, "r") as f:
+            code = f.read()
+    except FileNotFoundError:
+        print(f"Error: File '{file_path}' not found.")
+        exit(1)
+
+    ctx = CompilationContext()
+    _, _, ordered_tokens = lexical_analysis(code)
+    parse_tree, _ = parse(ordered_tokens, ctx=ctx)
+    tac = optimize_tac(generate_tac_from_node(parse_tree, ctx=ctx), ctx)
+    assembly = generate_x86_assembly(tac, ctx, parse_tree.function.ident)
+    display_x86_assembly(assembly)
+
+    output = os.path.splitext(file_path)[0]
+    try:
+        source = build_executable(assembly, output)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        exit(1)
+    print(f"\nWrote {source} and linked {output}")